@@ -9,27 +9,321 @@ import os
 import json
 import subprocess
 import shutil
+import queue
+import threading
+import time
+import hashlib
+import heapq
+import itertools
+import math
+import csv
+import re
+import signal
+import resource
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from datetime import datetime
 
+# Workspace e ferramentas instaladas pelo Dockerfile. As variáveis de ambiente
+# permitem rodar o pipeline fora do container (ex: benchmark_pipeline.py, com
+# stand-ins das ferramentas)
+WORKSPACE_DIR = os.environ.get('WORKSPACE_DIR', '/workspace')
+CK_BIN = os.environ.get('CK_BIN', 'ck')
+PMD_BIN = os.environ.get('PMD_BIN', '/tools/pmd/bin/pmd')
+SPOTBUGS_BIN = os.environ.get('SPOTBUGS_BIN', '/tools/spotbugs/bin/spotbugs')
+FINDSECBUGS_PLUGIN = os.environ.get('FINDSECBUGS_PLUGIN',
+                                    '/tools/spotbugs/plugin/findsecbugs-plugin.jar')
+REFACTORING_MINER_BIN = os.environ.get('REFACTORING_MINER_BIN',
+                                       '/tools/refactoring-miner/refactoring-miner.sh')
+FETCH_RELEASES_BIN = os.environ.get('FETCH_RELEASES_BIN', 'fetch-github-releases')
+
+class Telemetry:
+    """
+    Tempo e uso de recursos de cada etapa (checkout, build, ck, pmd, spotbugs,
+    refactoring-miner) de cada release.
+
+    begin()/end() delimitam uma etapa de um projeto na thread atual (no modo
+    --batch vários projetos dividem a mesma telemetria); os processos esperados
+    por wait_process() nessa thread (ou em threads ligadas com attach())
+    somam CPU e pico de memória à etapa. Cada registro tem tempo de parede,
+    CPU de usuário/sistema (processos filhos + a própria thread), pico de RSS
+    do maior processo e o último código de saída diferente de zero.
+
+    O pico de RSS vem do wait4 e inclui a memória herdada no fork, então
+    comandos leves (git) aparecem com o tamanho do próprio pipeline; para as
+    JVMs das ferramentas o valor é o da JVM.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.origin = time.perf_counter()
+        self.threads = {}
+
+    def current(self):
+        """Etapa em andamento na thread atual (ou None)."""
+        stack = getattr(self.local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def begin(self, tag_name, stage, project=None):
+        """Inicia a medição de uma etapa na thread atual."""
+        thread_name = threading.current_thread().name
+        with self.lock:
+            thread_id = self.threads.setdefault(thread_name, len(self.threads) + 1)
+        record = {
+            'project': project,
+            'tag': tag_name,
+            'stage': stage,
+            'thread': thread_id,
+            'start_seconds': time.perf_counter() - self.origin,
+            'wall_seconds': None,
+            'cpu_user_seconds': 0.0,
+            'cpu_sys_seconds': 0.0,
+            'max_rss_kb': 0,
+            'processes': 0,
+            'exit_status': 0,
+            'success': None,
+            '_thread_usage': thread_usage(),
+        }
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        self.local.stack.append(record)
+        return record
+
+    def end(self, record, success):
+        """Encerra a etapa iniciada com begin() e guarda o registro."""
+        stack = getattr(self.local, 'stack', [])
+        if record in stack:
+            stack.remove(record)
+        record['wall_seconds'] = round(time.perf_counter() - self.origin
+                                       - record['start_seconds'], 3)
+        user, system = thread_usage()
+        start_user, start_system = record.pop('_thread_usage')
+        with self.lock:
+            record['cpu_user_seconds'] = round(record['cpu_user_seconds'] + user - start_user, 3)
+            record['cpu_sys_seconds'] = round(record['cpu_sys_seconds'] + system - start_system, 3)
+            record['start_seconds'] = round(record['start_seconds'], 3)
+            record['success'] = None if success is None else bool(success)
+            self.records.append(record)
+        return record
+
+    @contextmanager
+    def attach(self, record):
+        """Contabiliza na etapa `record` os processos de outra thread (ex: pool de JVMs)."""
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        self.local.stack.append(record)
+        try:
+            yield record
+        finally:
+            self.local.stack.remove(record)
+
+    def add_process(self, usage, returncode):
+        """Soma o uso de recursos de um processo encerrado à etapa em andamento."""
+        record = self.current()
+        if record is None:
+            return
+        with self.lock:
+            record['cpu_user_seconds'] += usage.ru_utime
+            record['cpu_sys_seconds'] += usage.ru_stime
+            record['max_rss_kb'] = max(record['max_rss_kb'], usage.ru_maxrss)
+            record['processes'] += 1
+            if returncode:
+                record['exit_status'] = returncode
+
+    def project_records(self, project=None):
+        """Registros de um projeto (todos, se project for None), por início."""
+        with self.lock:
+            records = [r for r in self.records if project is None or r['project'] == project]
+        return sorted(records, key=lambda r: r['start_seconds'])
+
+    def trace_events(self, project=None):
+        """Eventos no formato Chrome Trace (chrome://tracing, ui.perfetto.dev)."""
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                   'args': {'name': name}}
+                  for name, thread_id in self.threads.items()]
+        for record in self.project_records(project):
+            events.append({
+                'name': f"{record['stage']} {record['tag']}",
+                'cat': record['stage'],
+                'ph': 'X',
+                'pid': pid,
+                'tid': record['thread'],
+                'ts': int(record['start_seconds'] * 1e6),
+                'dur': int(record['wall_seconds'] * 1e6),
+                'args': {key: record[key] for key in
+                         ('project', 'tag', 'cpu_user_seconds', 'cpu_sys_seconds', 'max_rss_kb',
+                          'processes', 'exit_status', 'success')},
+            })
+        return events
+
+    def save(self, results_base_dir, project=None):
+        """
+        Grava telemetry.json (registros por etapa) e trace.json (linha do
+        tempo no formato Chrome Trace) de um projeto em results_base_dir.
+        """
+        telemetry_file = os.path.join(results_base_dir, "telemetry.json")
+        trace_file = os.path.join(results_base_dir, "trace.json")
+        records = self.project_records(project)
+        with open(telemetry_file, 'w') as f:
+            json.dump({
+                'started_at': self.started_at,
+                'wall_seconds': round(time.perf_counter() - self.origin, 3),
+                'stages': records,
+            }, f, indent=2)
+        with open(trace_file, 'w') as f:
+            json.dump({'traceEvents': self.trace_events(project), 'displayTimeUnit': 'ms'}, f)
+        return telemetry_file, trace_file
+
+def thread_usage():
+    """CPU (usuário, sistema) consumida pela thread atual, em segundos."""
+    if not hasattr(resource, 'RUSAGE_THREAD'):
+        return 0.0, 0.0
+    usage = resource.getrusage(resource.RUSAGE_THREAD)
+    return usage.ru_utime, usage.ru_stime
+
+# Telemetria da execução atual (gravada ao final por main)
+TELEMETRY = Telemetry()
+
+def wait_process(proc, timeout=None):
+    """
+    Espera o processo terminar (como Popen.wait), coletando com wait4 o uso
+    de recursos dele e dos filhos que ele esperou para a telemetria.
+
+    Raises:
+        subprocess.TimeoutExpired se `timeout` segundos passarem
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.005
+    while True:
+        pid, status, usage = os.wait4(proc.pid, 0 if deadline is None else os.WNOHANG)
+        if pid:
+            break
+        if time.monotonic() >= deadline:
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.1)
+
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    TELEMETRY.add_process(usage, proc.returncode)
+    return proc.returncode
+
 def run_command(cmd, cwd=None, capture_output=False):
     """Executa um comando shell."""
     print(f"[CMD] {cmd}")
     if capture_output:
-        result = subprocess.run(cmd, shell=True, cwd=cwd,
-                              capture_output=True, text=True)
-        return result.returncode, result.stdout, result.stderr
+        # Saída em arquivos temporários em vez de pipes: o processo é esperado
+        # com wait_process (uso de recursos na telemetria)
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(cmd, shell=True, cwd=cwd, stdout=stdout, stderr=stderr)
+            returncode = wait_process(proc)
+            stdout.seek(0)
+            stderr.seek(0)
+            return (returncode, stdout.read().decode('utf-8', errors='replace'),
+                    stderr.read().decode('utf-8', errors='replace'))
     else:
-        result = subprocess.run(cmd, shell=True, cwd=cwd)
-        return result.returncode, None, None
+        proc = subprocess.Popen(cmd, shell=True, cwd=cwd)
+        return wait_process(proc), None, None
+
+# Tempo máximo (segundos) de cada ferramenta; ajustável com --timeouts
+TOOL_TIMEOUTS = {
+    'build': 3600,
+    'ck': 3600,
+    'pmd': 3600,
+    'spotbugs': 3600,
+    'refactoring-miner': 6 * 3600,
+}
+
+# Código de saída de um comando encerrado por tempo (o mesmo do `timeout`)
+TIMEOUT_RETURNCODE = 124
 
-def fetch_releases(owner, repo):
-    """Busca releases usando o script fetch-github-releases."""
+# Espera entre SIGTERM e SIGKILL ao encerrar um comando
+KILL_GRACE_SECONDS = 10
+
+# Final do log mantido em memória para mensagens de erro
+LOG_TAIL_BYTES = 8192
+
+def kill_process_group(proc):
+    """Encerra o processo e todos os seus filhos (SIGTERM, depois SIGKILL)."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        wait_process(proc, timeout=KILL_GRACE_SECONDS)
+        return
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    wait_process(proc)
+
+def read_log_tail(log_file, start=0, size=LOG_TAIL_BYTES):
+    """Últimos `size` bytes do log escritos a partir de `start`."""
+    with open(log_file, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        f.seek(max(start, end - size))
+        return f.read().decode('utf-8', errors='replace')
+
+def run_logged(cmd, log_file, cwd=None, timeout=None, append=False):
+    """
+    Executa um comando com stdout e stderr gravados direto no arquivo de log.
+
+    A saída vai do processo para o arquivo sem passar pela memória do Python;
+    só o final do log (LOG_TAIL_BYTES) é lido de volta, para mensagens de
+    erro. O comando roda em uma sessão própria: ao exceder `timeout`, o grupo
+    de processos inteiro (shell, JVM e filhos) é encerrado.
+
+    Returns:
+        (returncode, final do log); TIMEOUT_RETURNCODE se o tempo acabou
+    """
+    print(f"[CMD] {cmd if isinstance(cmd, str) else ' '.join(cmd)}")
+    with open(log_file, 'ab' if append else 'wb') as log:
+        start = log.tell()
+        try:
+            proc = subprocess.Popen(cmd, shell=isinstance(cmd, str), cwd=cwd,
+                                    stdin=subprocess.DEVNULL, stdout=log,
+                                    stderr=subprocess.STDOUT, start_new_session=True)
+        except OSError as e:
+            log.write(f"Erro ao executar comando: {e}\n".encode())
+            return 1, str(e)
+
+        try:
+            returncode = wait_process(proc, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_group(proc)
+            log.write(f"\n=== Tempo limite de {timeout}s excedido; processo encerrado ===\n".encode())
+            print(f"    ⚠ Tempo limite de {timeout}s excedido: {log_file}")
+            returncode = TIMEOUT_RETURNCODE
+        except BaseException:
+            # Ctrl+C: o grupo não recebe o sinal do terminal (sessão própria)
+            kill_process_group(proc)
+            raise
+
+    return returncode, read_log_tail(log_file, start)
+
+def fetch_releases(owner, repo, cache_dir=None, offline_repo_dir=None):
+    """
+    Busca releases usando o script fetch-github-releases.
+
+    Com cache_dir, as respostas da API ficam em cache (revalidadas por ETag);
+    com offline_repo_dir, as releases vêm das tags do clone, sem acessar a rede.
+    """
     print(f"\n{'='*60}")
     print(f"Buscando releases de {owner}/{repo}...")
     print(f"{'='*60}\n")
 
-    cmd = f"fetch-github-releases {owner}/{repo} --output json"
+    cmd = f"{FETCH_RELEASES_BIN} {owner}/{repo} --output json"
+    if offline_repo_dir:
+        cmd += f" --offline --repo-dir {offline_repo_dir}"
+    elif cache_dir:
+        cmd += f" --cache-dir {cache_dir}"
     returncode, stdout, stderr = run_command(cmd, capture_output=True)
 
     if returncode != 0:
@@ -40,11 +334,27 @@ def fetch_releases(owner, repo):
     print(f"✓ Encontradas {len(releases)} releases\n")
     return releases
 
-def clone_or_update_repo(repo_url, project_dir):
-    """Clona ou atualiza o repositório."""
+def clone_or_update_repo(repo_url, project_dir, clone_mode='full', sparse=False):
+    """
+    Clona ou atualiza o repositório.
+
+    Com clone_mode 'blobless', o clone traz todo o histórico (commits e
+    árvores) mas nenhum conteúdo de arquivo (`--filter=blob:none`); os blobs
+    vêm do remoto sob demanda, apenas os das releases analisadas. Com sparse,
+    as working copies (clone e worktrees) materializam só SPARSE_PATTERNS.
+    """
     if os.path.exists(project_dir):
         print(f"Repositório já existe em {project_dir}, atualizando...")
         run_command("git fetch --all --tags", cwd=project_dir)
+        if clone_mode == 'blobless' and not is_partial_clone(project_dir):
+            print("  ℹ Clone existente é completo; --clone blobless vale só para clones novos")
+    elif clone_mode == 'blobless':
+        # O filtro só é aceito pelo protocolo file:// em repositórios locais
+        clone_url = repo_url
+        if os.path.isdir(repo_url):
+            clone_url = f"file://{os.path.abspath(repo_url)}"
+        print(f"Clonando repositório {clone_url} (sem blobs)...")
+        run_command(f"git clone --filter=blob:none --no-checkout {clone_url} {project_dir}")
     else:
         print(f"Clonando repositório {repo_url}...")
         run_command(f"git clone {repo_url} {project_dir}")
@@ -52,6 +362,125 @@ def clone_or_update_repo(repo_url, project_dir):
     # Configurar safe directory
     run_command(f"git config --global --add safe.directory {project_dir}")
 
+    if sparse:
+        patterns = " ".join(f"'{pattern}'" for pattern in SPARSE_PATTERNS)
+        run_command(f"git sparse-checkout set --no-cone {patterns}", cwd=project_dir)
+    elif is_sparse_checkout(project_dir):
+        run_command("git sparse-checkout disable", cwd=project_dir)
+
+def is_partial_clone(project_dir):
+    """Indica se o clone é parcial (blobs buscados do remoto sob demanda)."""
+    returncode, stdout, _ = run_command("git config --get remote.origin.promisor",
+                                        cwd=project_dir, capture_output=True)
+    return returncode == 0 and stdout.strip() == 'true'
+
+def is_sparse_checkout(project_dir):
+    """Indica se o clone está com sparse checkout habilitado."""
+    returncode, stdout, _ = run_command("git config --get core.sparseCheckout",
+                                        cwd=project_dir, capture_output=True)
+    return returncode == 0 and stdout.strip() == 'true'
+
+def missing_objects(project_dir, revisions):
+    """
+    Objetos alcançáveis por `revisions` (argumentos do `git rev-list`) que
+    ainda não estão no clone parcial. O `--missing=print` lista os ausentes
+    sem disparar a busca no remoto.
+    """
+    returncode, stdout, _ = run_command(
+        f"git rev-list --objects --missing=print {revisions}",
+        cwd=project_dir, capture_output=True)
+    if returncode != 0:
+        return set()
+    return {line[1:] for line in stdout.splitlines() if line.startswith('?')}
+
+def fetch_blobs(project_dir, oids):
+    """
+    Busca do remoto, em lotes de PREFETCH_BATCH, blobs ausentes de um clone
+    parcial. Um `git fetch` por lote em vez de uma busca por objeto, que é o
+    que aconteceria se cada blob fosse lido sob demanda.
+
+    Returns:
+        True se todos os lotes foram buscados
+    """
+    oids = sorted(oids)
+    for start in range(0, len(oids), PREFETCH_BATCH):
+        batch = oids[start:start + PREFETCH_BATCH]
+        process = subprocess.run(
+            ["git", "-c", "fetch.negotiationAlgorithm=noop", "fetch", "origin",
+             "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+             "--filter=blob:none", "--stdin"],
+            cwd=project_dir, input="".join(f"{oid}\n" for oid in batch),
+            capture_output=True, text=True)
+        if process.returncode != 0:
+            print(f"    ⚠ Erro ao buscar {len(batch)} blob(s): {process.stderr.strip()}")
+            return False
+    return True
+
+def fetch_java_history(project_dir, revision_ranges):
+    """
+    Traz para um clone parcial as versões (antes/depois) dos .java alterados
+    nos commits de cada intervalo: o que o RefactoringMiner lê. O JGit não
+    busca objetos ausentes sob demanda, então sem isso a mineração falharia
+    no primeiro blob que não veio no clone.
+    """
+    wanted = set()
+    missing = set()
+    for revisions in revision_ranges:
+        returncode, stdout, _ = run_command(
+            f"git log --raw --no-abbrev --no-renames --format= {revisions} -- '*.java'",
+            cwd=project_dir, capture_output=True)
+        if returncode != 0:
+            continue
+        for line in stdout.splitlines():
+            # formato: ":<modo> <modo> <oid antigo> <oid novo> <status>\t<caminho>"
+            if line.startswith(':'):
+                fields = line.split('\t', 1)[0].split()
+                wanted.update(oid for oid in fields[2:4] if oid.strip('0'))
+        missing |= missing_objects(project_dir, revisions)
+
+    wanted &= missing
+    if not wanted:
+        return True
+    print(f"  ↓ Buscando {len(wanted)} blob(s) .java do histórico para o RefactoringMiner...")
+    return fetch_blobs(project_dir, wanted)
+
+def create_worktrees(project_dir, worktrees_dir, count):
+    """
+    Cria uma worktree git isolada para cada worker.
+
+    Todas as worktrees compartilham o object store do clone principal,
+    então o custo é apenas o de materializar os arquivos de cada uma.
+
+    Returns:
+        Lista com os caminhos das worktrees criadas
+    """
+    print(f"Preparando {count} worktree(s) em {worktrees_dir}...")
+    os.makedirs(worktrees_dir, exist_ok=True)
+    # Remove registros de worktrees apagadas manualmente (ex: execução interrompida)
+    run_command("git worktree prune", cwd=project_dir)
+
+    worktrees = []
+    for i in range(1, count + 1):
+        worktree_dir = os.path.join(worktrees_dir, f"worker-{i}")
+        if os.path.exists(worktree_dir):
+            run_command(f"git worktree remove --force {worktree_dir}", cwd=project_dir)
+            shutil.rmtree(worktree_dir, ignore_errors=True)
+        returncode, _, stderr = run_command(f"git worktree add --detach {worktree_dir}",
+                                            cwd=project_dir, capture_output=True)
+        if returncode != 0:
+            print(f"⚠ Erro ao criar worktree {worktree_dir}: {stderr}")
+            sys.exit(1)
+        run_command(f"git config --global --add safe.directory {worktree_dir}")
+        worktrees.append(worktree_dir)
+
+    return worktrees
+
+def remove_worktrees(project_dir, worktrees):
+    """Remove as worktrees criadas para os workers."""
+    for worktree_dir in worktrees:
+        run_command(f"git worktree remove --force {worktree_dir}", cwd=project_dir)
+    run_command("git worktree prune", cwd=project_dir)
+
 def checkout_release(project_dir, tag_name):
     """Faz checkout de uma release específica."""
     print(f"  → Checkout {tag_name}")
@@ -74,13 +503,311 @@ def checkout_release(project_dir, tag_name):
     run_command("git clean -fdx", cwd=project_dir)
     return True
 
-def build_project(project_dir):
-    """Compila o projeto (Maven ou Gradle)."""
+def snapshot_release(project_dir, tag_name, snapshot_dir, sparse=False, partial=False):
+    """
+    Materializa a árvore de uma tag em um diretório novo.
+
+    Usa um índice temporário (GIT_INDEX_FILE) com `git read-tree` +
+    `git checkout-index`, então a working copy do clone (e seu índice) não
+    é tocada: nada de `git clean`/`git reset`, e um clone sujo não atrapalha.
+    O diretório pode ficar em tmpfs (ex: /dev/shm) para evitar I/O de disco.
+
+    Com sparse, só os arquivos lidos pelas ferramentas (is_analysis_input)
+    são materializados. Em um clone parcial (partial), os blobs ausentes
+    desses arquivos são buscados antes, em lote (ver fetch_blobs).
+    """
+    print(f"  → Snapshot {tag_name} em {snapshot_dir}")
+    if os.path.exists(snapshot_dir):
+        shutil.rmtree(snapshot_dir)
+    os.makedirs(snapshot_dir)
+
+    paths = None
+    if sparse:
+        files = git_tree_files(project_dir, tag_name, is_analysis_input)
+        if files is None:
+            print(f"    ⚠ ERRO ao listar a árvore de {tag_name}")
+            return False
+        paths = [path for path, _ in files]
+    if partial:
+        wanted = missing_objects(project_dir, f"--no-walk {tag_name}")
+        if sparse:
+            wanted &= {blob for _, blob in files}
+        if wanted:
+            print(f"    ↓ Buscando {len(wanted)} blob(s) do remoto")
+            if not fetch_blobs(project_dir, wanted):
+                return False
+
+    index_file = snapshot_dir.rstrip("/") + ".index"
+    try:
+        if paths is None:
+            returncode, _, stderr = run_command(
+                f"GIT_INDEX_FILE={index_file} git read-tree {tag_name} && "
+                f"GIT_INDEX_FILE={index_file} git checkout-index -a -f --prefix={snapshot_dir}/",
+                cwd=project_dir, capture_output=True)
+        else:
+            returncode, _, stderr = run_command(
+                f"GIT_INDEX_FILE={index_file} git read-tree {tag_name}",
+                cwd=project_dir, capture_output=True)
+            if returncode == 0:
+                process = subprocess.run(
+                    ["git", "checkout-index", "-f", "-z", "--stdin", f"--prefix={snapshot_dir}/"],
+                    cwd=project_dir, input="".join(f"{path}\0" for path in paths),
+                    env={**os.environ, 'GIT_INDEX_FILE': index_file},
+                    capture_output=True, text=True)
+                returncode, stderr = process.returncode, process.stderr
+    finally:
+        if os.path.exists(index_file):
+            os.remove(index_file)
+
+    if returncode != 0:
+        print(f"    ⚠ ERRO no snapshot: {stderr}")
+        return False
+
+    # Marca o commit materializado (permite reaproveitar o snapshot ao retomar)
+    sha = resolve_commit(project_dir, tag_name)
+    with open(os.path.join(snapshot_dir, SNAPSHOT_MARKER), 'w') as f:
+        f.write(sha or "")
+    return True
+
+def snapshot_commit(snapshot_dir):
+    """Retorna o SHA materializado em um snapshot (ou None)."""
+    marker = os.path.join(snapshot_dir, SNAPSHOT_MARKER)
+    if not os.path.exists(marker):
+        return None
+    with open(marker) as f:
+        return f.read().strip() or None
+
+# Arquivos que influenciam o build, além de tudo que está sob algum 'src/'
+BUILD_FILES = {
+    'pom.xml', 'mvnw', 'mvnw.cmd',
+    'build.gradle', 'build.gradle.kts', 'settings.gradle', 'settings.gradle.kts',
+    'gradle.properties', 'gradlew', 'gradlew.bat',
+}
+BUILD_DIRS = {'.mvn', 'gradle'}
+
+def is_build_input(path):
+    """Indica se um arquivo do repositório afeta o build/análise."""
+    parts = path.split('/')
+    return 'src' in parts[:-1] or parts[-1] in BUILD_FILES or parts[0] in BUILD_DIRS
+
+def is_analysis_input(path):
+    """Entradas do build mais qualquer .java (o CK percorre a working copy inteira)."""
+    return is_build_input(path) or path.endswith('.java')
+
+# Padrões do sparse checkout (sintaxe do .gitignore, modo não-cone) que
+# selecionam os mesmos arquivos que is_analysis_input
+SPARSE_PATTERNS = (['*.java', 'src/'] + sorted(BUILD_FILES) +
+                   [f"/{directory}/" for directory in sorted(BUILD_DIRS)])
+
+# Blobs pedidos por `git fetch` de uma vez ao completar um clone parcial
+PREFETCH_BATCH = 5000
+
+def git_tree_files(project_dir, tag_name, include=is_analysis_input):
+    """
+    Arquivos de uma tag selecionados por `include`, com o blob de cada um.
+    Lê só as árvores (`git ls-tree -r`), que um clone parcial já tem.
+
+    Returns:
+        Lista de (caminho, blob), ou None se o `git ls-tree` falhar
+    """
+    returncode, stdout, _ = run_command(f"git ls-tree -r -z --full-tree {tag_name}",
+                                        cwd=project_dir, capture_output=True)
+    if returncode != 0:
+        return None
+
+    files = []
+    for entry in stdout.split('\0'):
+        if not entry:
+            continue
+        meta, path = entry.split('\t', 1)
+        _, object_type, blob = meta.split()
+        if object_type == 'blob' and include(path):
+            files.append((path, blob))
+    return files
+
+def build_inputs_hash(project_dir, tag_name, include=is_build_input):
+    """
+    Hash de conteúdo das entradas do build de uma tag: fontes (tudo sob
+    'src/') e arquivos de build (pom.xml, build.gradle*, wrappers), ou os
+    arquivos selecionados por `include`.
+
+    Usa os hashes de blob que o git já tem (`git ls-tree -r`), então não lê
+    nenhum arquivo do disco. Releases que só mudaram documentação, CI etc.
+    têm o mesmo hash.
+    """
+    returncode, stdout, _ = run_command(f"git ls-tree -r --full-tree {tag_name}",
+                                        cwd=project_dir, capture_output=True)
+    if returncode != 0:
+        return None
+
+    digest = hashlib.sha256()
+    for line in stdout.splitlines():
+        # formato: "<modo> <tipo> <oid>\t<caminho>"
+        meta, _, path = line.partition("\t")
+        if include(path):
+            digest.update(f"{meta}\t{path}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+# Diretórios onde Maven e Gradle deixam os JARs de cada módulo
+MODULE_ARTIFACT_DIRS = ('target', os.path.join('build', 'libs'))
+
+GRADLE_INCLUDE_RE = re.compile(r'^\s*include\b(.*)$', re.MULTILINE)
+GRADLE_PROJECT_RE = re.compile(r'[\'"]([^\'"]+)[\'"]')
+
+def xml_local_name(tag):
+    """Nome de um elemento XML sem o namespace ('{ns}module' -> 'module')."""
+    return tag.rsplit('}', 1)[-1]
+
+def maven_modules(module_dir, visited):
+    """Módulos declarados em <modules> (inclusive em profiles), recursivamente."""
+    pom_file = os.path.join(module_dir, "pom.xml")
+    real_dir = os.path.realpath(module_dir)
+    if real_dir in visited or not os.path.isfile(pom_file):
+        return []
+    visited.add(real_dir)
+
+    try:
+        root = ET.parse(pom_file).getroot()
+    except ET.ParseError:
+        return []
+
+    modules = []
+    for modules_elem in root.iter():
+        if xml_local_name(modules_elem.tag) != 'modules':
+            continue
+        for module_elem in modules_elem:
+            if xml_local_name(module_elem.tag) == 'module' and module_elem.text:
+                child_dir = os.path.normpath(os.path.join(module_dir, module_elem.text.strip()))
+                modules.append(child_dir)
+                modules.extend(maven_modules(child_dir, visited))
+    return modules
+
+def gradle_modules(project_dir):
+    """Subprojetos declarados com include em settings.gradle(.kts)."""
+    modules = []
+    for settings_name in ('settings.gradle', 'settings.gradle.kts'):
+        settings_file = os.path.join(project_dir, settings_name)
+        if not os.path.isfile(settings_file):
+            continue
+        with open(settings_file, errors='replace') as f:
+            settings = f.read()
+        for include in GRADLE_INCLUDE_RE.findall(settings):
+            for project_path in GRADLE_PROJECT_RE.findall(include):
+                # ':libs:core' -> libs/core
+                modules.append(os.path.join(project_dir, *project_path.strip(':').split(':')))
+    return modules
+
+def find_module_dirs(project_dir):
+    """
+    Diretórios dos módulos do projeto, lidos do layout do build: <modules> do
+    pom.xml (Maven) e include do settings.gradle (Gradle). O diretório raiz
+    vem sempre primeiro.
+    """
+    module_dirs = [project_dir]
+    for module_dir in maven_modules(project_dir, set()) + gradle_modules(project_dir):
+        if module_dir not in module_dirs and os.path.isdir(module_dir):
+            module_dirs.append(module_dir)
+    return module_dirs
+
+def is_analyzable_jar(file_name):
+    """JAR de classes do projeto (exclui -sources, -javadoc, exemplos e testes)."""
+    return file_name.endswith('.jar') and \
+        not any(x in file_name for x in ['-sources', '-javadoc', '-examples', '-tests', '-test'])
+
+def find_built_jars(project_dir):
+    """
+    JARs compilados de cada módulo (target/ no Maven, build/libs/ no Gradle).
+
+    Projetos cujo layout de módulos não é reconhecido caem na busca antiga,
+    percorrendo a árvore atrás de JARs em diretórios target/build.
+    """
+    jar_files = []
+    for module_dir in find_module_dirs(project_dir):
+        for artifact_dir in MODULE_ARTIFACT_DIRS:
+            artifact_path = os.path.join(module_dir, artifact_dir)
+            if not os.path.isdir(artifact_path):
+                continue
+            for file in sorted(os.listdir(artifact_path)):
+                if is_analyzable_jar(file):
+                    jar_files.append(os.path.join(artifact_path, file))
+    if jar_files:
+        return jar_files
+
+    for root, dirs, files in os.walk(project_dir):
+        dirs[:] = [d for d in dirs if d != '.git']
+        for file in files:
+            if is_analyzable_jar(file) and ('target' in root or 'build' in root):
+                jar_files.append(os.path.join(root, file))
+    return jar_files
+
+def restore_build_cache(cache_dir, inputs_hash, project_dir):
+    """
+    Copia para project_dir os JARs de um build anterior com as mesmas entradas.
+
+    Returns:
+        True se havia artefatos em cache para este hash
+    """
+    entry_dir = os.path.join(cache_dir, inputs_hash)
+    manifest_file = os.path.join(entry_dir, "manifest.json")
+    if not os.path.exists(manifest_file):
+        return False
+
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+
+    for relative_path in manifest['jars']:
+        target = os.path.join(project_dir, relative_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(entry_dir, "jars", relative_path), target)
+
+    print(f"    ✓ Build reaproveitado do cache ({len(manifest['jars'])} JAR(s), "
+          f"de {manifest.get('tag_name', '?')})")
+    return True
+
+def store_build_cache(cache_dir, inputs_hash, project_dir, tag_name):
+    """Guarda no cache os JARs gerados pelo build de project_dir."""
+    jar_files = find_built_jars(project_dir)
+    if not jar_files:
+        return
+
+    entry_dir = os.path.join(cache_dir, inputs_hash)
+    if os.path.exists(entry_dir):
+        return
+
+    # Monta a entrada em um diretório temporário e publica com rename atômico,
+    # para que uma execução interrompida (ou um worker paralelo) nunca veja
+    # uma entrada pela metade
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    relative_paths = []
+    for jar_path in jar_files:
+        relative_path = os.path.relpath(jar_path, project_dir)
+        target = os.path.join(tmp_dir, "jars", relative_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(jar_path, target)
+        relative_paths.append(relative_path)
+
+    with open(os.path.join(tmp_dir, "manifest.json"), 'w') as f:
+        json.dump({'tag_name': tag_name, 'jars': relative_paths}, f, indent=2)
+
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Outro worker publicou a mesma entrada primeiro
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# Locks por arquivo no repositório local do Maven (~/.m2): builds simultâneos
+# (--jobs, --stage-jobs, --batch) compartilham o cache sem corromper artefatos.
+# O Gradle já sincroniza o ~/.gradle entre processos.
+MAVEN_SHARED_CACHE_OPTS = ("-Daether.syncContext.named.factory=file-lock "
+                           "-Daether.syncContext.named.nameMapper=file-gav")
+
+def build_project(project_dir, log_file):
+    """Compila o projeto (Maven ou Gradle), com a saída em log_file."""
     print(f"  → Compilando projeto...")
 
     # Detectar tipo de build
     if os.path.exists(os.path.join(project_dir, "pom.xml")):
-        cmd = "mvn clean package -DskipTests -q"
+        cmd = f"mvn clean package -DskipTests -q {MAVEN_SHARED_CACHE_OPTS}"
     elif os.path.exists(os.path.join(project_dir, "build.gradle")) or \
          os.path.exists(os.path.join(project_dir, "build.gradle.kts")):
         cmd = "gradle clean build -x test -q"
@@ -88,14 +815,21 @@ def build_project(project_dir):
         print("    ⚠ Nenhum sistema de build detectado (Maven/Gradle)")
         return False
 
-    returncode, _, stderr = run_command(cmd, cwd=project_dir, capture_output=True)
+    returncode, tail = run_logged(cmd, log_file, cwd=project_dir, timeout=TOOL_TIMEOUTS['build'])
     if returncode != 0:
-        print(f"    ⚠ Falha na compilação: {stderr[:200]}")
+        print(f"    ⚠ Falha na compilação: {tail[-200:]}")
         return False
 
     print("    ✓ Compilação concluída")
     return True
 
+# Arquivos gerados pelo CK em cada release
+CK_FILES = ['class.csv', 'method.csv', 'field.csv', 'variable.csv']
+
+# Metadados gravados junto dos CSVs do CK: de qual commit/diretório vieram os
+# caminhos da coluna 'file' (necessário para reaproveitá-los no modo incremental)
+CK_SOURCE_FILE = '.ck-source.json'
+
 def run_ck_analysis(project_dir, output_dir):
     """Executa análise CK."""
     print(f"  → Executando CK Metrics...")
@@ -104,13 +838,13 @@ def run_ck_analysis(project_dir, output_dir):
 
     # CK gera os arquivos no diretório de onde é executado (cwd)
     # Por isso executamos a partir do diretório de saída
-    cmd = f"ck {project_dir} ."
-    returncode, _, _ = run_command(cmd, cwd=ck_output, capture_output=True)
+    cmd = f"{CK_BIN} {project_dir} ."
+    returncode, _ = run_logged(cmd, os.path.join(output_dir, "ck.log"), cwd=ck_output,
+                               timeout=TOOL_TIMEOUTS['ck'])
 
     if returncode == 0:
         # Verificar se os arquivos foram gerados
-        expected_files = ['class.csv', 'method.csv', 'field.csv', 'variable.csv']
-        files_found = [f for f in expected_files if os.path.exists(os.path.join(ck_output, f))]
+        files_found = [f for f in CK_FILES if os.path.exists(os.path.join(ck_output, f))]
 
         if files_found:
             print(f"    ✓ CK Metrics salvo em {ck_output} ({len(files_found)} arquivos)")
@@ -122,6 +856,515 @@ def run_ck_analysis(project_dir, output_dir):
         print(f"    ⚠ Erro ao executar CK")
         return False
 
+# Comentários e literais (strings, text blocks, chars), removidos antes da análise
+JAVA_COMMENT_RE = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'',
+    re.DOTALL)
+JAVA_PACKAGE_RE = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.MULTILINE)
+JAVA_IMPORT_RE = re.compile(r'^\s*import\s+(?:static\s+)?([\w.]+(?:\.\*)?)\s*;', re.MULTILINE)
+# Declarações de tipo (class, interface, @interface, enum, record) e chaves,
+# na ordem do arquivo, para saber o aninhamento
+JAVA_TYPE_TOKEN_RE = re.compile(
+    r'(?<![\w$.])(?P<kind>class|interface|enum|record)\s+(?P<name>[A-Za-z_$][\w$]*)|[{}]')
+# Classe anônima: `new Tipo(...) {`
+JAVA_ANONYMOUS_RE = re.compile(r'\bnew\s+[\w$.]+\s*(?:<[^;{}]*?>)?\s*\([^;{}]*?\)\s*\{')
+JAVA_NAME_RE = re.compile(r'\b[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*')
+
+def java_supertypes(header):
+    """Tipos de `extends`/`implements` no cabeçalho de uma declaração (sem genéricos)."""
+    previous = None
+    while previous != header:
+        previous, header = header, re.sub(r'<[^<>]*>', '', header)
+    # Componentes de um record e anotações com argumentos
+    header = re.sub(r'\([^()]*\)', '', header)
+    header = re.sub(r'@[\w$.]+', '', header)
+    supertypes = []
+    for clause in re.findall(r'\b(?:extends|implements)\s+([^{]*?)(?=\bimplements\b|\bpermits\b|$)',
+                             header):
+        supertypes.extend(name.strip() for name in clause.split(',') if name.strip())
+    return supertypes
+
+def parse_java_declarations(source):
+    """
+    Extrai (por expressões regulares) o pacote, os imports e os tipos
+    declarados em um arquivo Java e os nomes (simples ou qualificados)
+    citados no arquivo.
+
+    Cada tipo traz o nome binário relativo ao pacote (Externa$Interna, como
+    no CK), o tipo de declaração (class, interface, enum, record), os
+    supertipos (extends/implements, como escritos) e se está aninhado em
+    outro tipo. 'anonymous' conta as classes anônimas.
+    """
+    source = JAVA_COMMENT_RE.sub('', source)
+    package = JAVA_PACKAGE_RE.search(source)
+    types = []
+    enclosing = []   # (nome binário, profundidade das chaves do corpo)
+    depth = 0
+    pending = None
+    for match in JAVA_TYPE_TOKEN_RE.finditer(source):
+        token = match.group(0)
+        if match.group('kind'):
+            pending = pending or match
+        elif token == '{':
+            depth += 1
+            if pending:
+                outer = enclosing[-1][0] if enclosing else None
+                name = f"{outer}${pending.group('name')}" if outer else pending.group('name')
+                types.append({
+                    'name': name,
+                    'kind': pending.group('kind'),
+                    'supertypes': java_supertypes(source[pending.end():match.start()]),
+                    'nested': outer is not None,
+                })
+                enclosing.append((name, depth))
+                pending = None
+        else:
+            if enclosing and enclosing[-1][1] == depth:
+                enclosing.pop()
+            depth -= 1
+    return {
+        'package': package.group(1) if package else '',
+        'imports': JAVA_IMPORT_RE.findall(source),
+        'types': types,
+        'anonymous': len(JAVA_ANONYMOUS_RE.findall(source)),
+        'names': set(JAVA_NAME_RE.findall(source)),
+    }
+
+def declared_java_types(declarations):
+    """Nomes qualificados (binários: pacote.Externa$Interna) dos tipos declarados em um arquivo."""
+    package = declarations['package']
+    return [f"{package}.{declared['name']}" if package else declared['name']
+            for declared in declarations['types']]
+
+def java_binary_name(name, type_index):
+    """
+    Nome com pontos (pacote.Externa.Interna) -> nome binário do type_index
+    (pacote.Externa$Interna); sem correspondência, o próprio nome.
+    """
+    parts = name.split('.')
+    for split in range(len(parts), 0, -1):
+        candidate = '$'.join(['.'.join(parts[:split])] + parts[split:])
+        if candidate in type_index:
+            return candidate
+    return name
+
+def resolve_java_type(name, declarations, type_index):
+    """
+    Resolve o nome de um tipo, como escrito no arquivo (simples ou com
+    pontos, ex: Externa.Interna), para o nome binário qualificado (melhor
+    esforço).
+    """
+    first, _, rest = name.partition('.')
+    suffix = '$' + rest.replace('.', '$') if rest else ''
+    if rest and java_binary_name(name, type_index) in type_index:
+        return java_binary_name(name, type_index)
+    package = declarations['package']
+    # Tipos aninhados do próprio arquivo
+    for declared in declarations['types']:
+        if declared['name'] == first or declared['name'].endswith('$' + first):
+            qualified = f"{package}.{declared['name']}" if package else declared['name']
+            return qualified + suffix
+    for imported in declarations['imports']:
+        if imported.endswith('.' + first):
+            return java_binary_name(imported, type_index) + suffix
+    candidate = f"{package}.{first}" if package else first
+    if candidate in type_index:
+        return candidate + suffix
+    for imported in declarations['imports']:
+        if imported.endswith('.*'):
+            qualified = java_binary_name(f"{imported[:-2]}.{first}", type_index)
+            if qualified in type_index:
+                return qualified + suffix
+    return candidate + suffix
+
+def referenced_java_types(declarations, type_index):
+    """
+    Tipos do projeto (chaves de type_index) citados por um arquivo: nomes
+    simples resolvidos pelo pacote e pelos imports, e nomes qualificados
+    (também quando seguidos de membro, ex: pacote.Classe.CONSTANTE). Melhor
+    esforço, errando para mais: basta o nome aparecer no arquivo.
+    """
+    found = set()
+    for name in declarations['names']:
+        parts = name.split('.')
+        for end in range(len(parts), 1, -1):
+            if '.'.join(parts[:end]) in type_index:
+                found.add('.'.join(parts[:end]))
+                break
+        qualified = resolve_java_type(parts[0], declarations, type_index)
+        if qualified in type_index:
+            found.add(qualified)
+    return found
+
+def git_grep_java_files(project_dir, ref, words):
+    """
+    Arquivos .java de ref que contêm alguma das palavras (`git grep -w -F`,
+    direto nos objetos do git).
+
+    Returns:
+        Conjunto de caminhos relativos, ou None se o grep falhar
+    """
+    if not words:
+        return set()
+    process = subprocess.run(
+        ["git", "grep", "-l", "-w", "-F", "-f", "-", ref, "--", "*.java"],
+        cwd=project_dir, input="".join(f"{word}\n" for word in sorted(words)),
+        capture_output=True, text=True)
+    # Código 1: nenhum arquivo encontrado
+    if process.returncode not in (0, 1):
+        return None
+    prefix = f"{ref}:"
+    return {line[len(prefix):] if line.startswith(prefix) else line
+            for line in process.stdout.splitlines() if line}
+
+def read_git_blobs(project_dir, specs, binary=False):
+    """
+    Lê vários blobs ('<commit>:<caminho>' ou o hash) com um único `git cat-file --batch`.
+
+    Returns:
+        Dicionário spec -> conteúdo (texto, ou bytes com binary); specs
+        inexistentes ficam de fora
+    """
+    if not specs:
+        return {}
+    process = subprocess.Popen(["git", "cat-file", "--batch"], cwd=project_dir,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    # Escreve em outra thread para não travar com o pipe de saída cheio
+    writer = threading.Thread(target=lambda: (
+        process.stdin.write("".join(f"{spec}\n" for spec in specs).encode('utf-8')),
+        process.stdin.close()))
+    writer.start()
+
+    blobs = {}
+    for spec in specs:
+        header = process.stdout.readline().decode('utf-8').split()
+        if len(header) != 3 or header[1] == 'missing':
+            continue
+        content = process.stdout.read(int(header[2]))
+        process.stdout.read(1)  # '\n' que encerra cada objeto
+        blobs[spec] = content if binary else content.decode('utf-8', errors='replace')
+
+    writer.join()
+    process.wait()
+    return blobs
+
+def git_changed_java_files(project_dir, old_ref, new_ref):
+    """
+    Arquivos .java alterados entre duas tags (`git diff --name-status`).
+
+    Renomeações aparecem como remoção + adição (--no-renames), o que já é o
+    tratamento correto: as linhas do caminho antigo saem, o novo é analisado.
+
+    Returns:
+        (changed, removed): caminhos que existem em new_ref e precisam ser
+        reanalisados, e caminhos de old_ref cujas linhas deixam de valer;
+        ou None se o diff falhar
+    """
+    returncode, stdout, _ = run_command(
+        f"git diff --name-status --no-renames -z {old_ref} {new_ref} -- '*.java'",
+        cwd=project_dir, capture_output=True)
+    if returncode != 0:
+        return None
+
+    changed, removed = [], []
+    fields = stdout.split('\0')
+    for status, path in zip(fields[0::2], fields[1::2]):
+        if status.startswith('D'):
+            removed.append(path)
+        elif status.startswith('A'):
+            changed.append(path)
+        else:
+            # Modificado / tipo alterado: a versão antiga sai, a nova entra
+            removed.append(path)
+            changed.append(path)
+    return changed, removed
+
+def read_ck_source(ck_dir):
+    """Lê os metadados de origem dos CSVs do CK (ou None)."""
+    source_file = os.path.join(ck_dir, CK_SOURCE_FILE)
+    if not os.path.exists(source_file):
+        return None
+    with open(source_file) as f:
+        return json.load(f)
+
+def write_ck_source(ck_dir, tag_name, sha, source_dir, incremental_depth=0):
+    """Grava os metadados de origem dos CSVs do CK."""
+    with open(os.path.join(ck_dir, CK_SOURCE_FILE), 'w') as f:
+        json.dump({
+            'tag_name': tag_name,
+            'commit': sha,
+            'source_dir': source_dir,
+            'incremental_depth': incremental_depth,
+        }, f, indent=2)
+
+def strip_source_prefix(path, prefixes):
+    """Converte o caminho absoluto gravado pelo CK em caminho relativo ao projeto."""
+    for prefix in prefixes:
+        if path.startswith(prefix + os.sep):
+            return path[len(prefix) + 1:]
+    return None
+
+def read_ck_csv(csv_file):
+    """Lê um CSV do CK, retornando (cabeçalho, linhas)."""
+    if not os.path.exists(csv_file):
+        return None, []
+    with open(csv_file, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        return header, list(reader)
+
+def merge_ck_rows(previous_groups, replaced):
+    """
+    Junta as linhas do CK por arquivo mantendo a ordem da execução anterior.
+
+    Args:
+        previous_groups: lista de (arquivo, linhas) na ordem do CSV anterior
+        replaced: arquivo -> novas linhas (lista vazia remove o arquivo)
+
+    Arquivos novos entram antes do primeiro arquivo anterior que vem depois
+    deles na ordem dos caminhos (a ordem em que o CK percorre a árvore).
+    """
+    previous_files = {path for path, _ in previous_groups}
+    new_files = sorted(path for path in replaced if path not in previous_files)
+    rows = []
+    position = 0
+    for path, group in previous_groups:
+        while position < len(new_files) and new_files[position] < path:
+            rows.extend(replaced[new_files[position]])
+            position += 1
+        rows.extend(replaced.get(path, group))
+    for path in new_files[position:]:
+        rows.extend(replaced[path])
+    return rows
+
+def run_ck_incremental(project_dir, source_dir, tag_name, sha, output_dir,
+                       previous_release_dir, full_every=0):
+    """
+    Executa o CK apenas nos arquivos afetados pelas mudanças desde a release
+    anterior e mescla o resultado com as linhas dos demais arquivos nos CSVs
+    anteriores, para obter os mesmos CSVs de uma execução completa.
+
+    Além dos arquivos alterados, são afetados os arquivos cujas colunas
+    calculadas sobre o projeto todo podem mudar: os tipos citados pela versão
+    nova ou antiga dos arquivos alterados/removidos (fanin, cboModified, NOC)
+    e os subtipos, diretos ou não, das classes alteradas/removidas (DIT).
+    Cada arquivo afetado é analisado junto dos arquivos que o citam (para
+    fanin, cboModified e NOC) e do seu fecho de dependências: arquivos do
+    mesmo pacote, tipos importados e a cadeia de supertipos (DIT, CBO,
+    RFC). Das linhas dessa execução, só as dos arquivos afetados são usadas.
+
+    Só arquivos alterados/removidos que declaram apenas classes de topo são
+    tratados assim; tipos aninhados ou anônimos, interfaces, enums e records
+    levam à análise completa (ver parse_java_declarations).
+
+    As linhas ficam na ordem do CSV anterior; arquivos novos entram na
+    posição da ordem dos caminhos (ver merge_ck_rows).
+
+    Returns:
+        True/False como run_ck_analysis, ou None se não for possível fazer a
+        análise incremental (o chamador deve executar a análise completa)
+    """
+    previous_ck = os.path.join(previous_release_dir, "ck")
+    previous_source = read_ck_source(previous_ck)
+    if not previous_source or not previous_source.get('commit') or \
+            not os.path.exists(os.path.join(previous_ck, 'class.csv')):
+        return None
+    if full_every and previous_source.get('incremental_depth', 0) + 1 >= full_every:
+        print(f"  → CK incremental: execução completa periódica (a cada {full_every})")
+        return None
+
+    diff = git_changed_java_files(project_dir, previous_source['commit'], sha)
+    if diff is None:
+        return None
+    changed, removed = diff
+    changed_set, removed_set = set(changed), set(removed)
+
+    print(f"  → Executando CK Metrics (incremental desde {previous_source['tag_name']}: "
+          f"{len(changed)} alterado(s), {len(removed_set - changed_set)} removido(s))...")
+    ck_output = os.path.join(output_dir, "ck")
+    os.makedirs(ck_output, exist_ok=True)
+
+    previous_prefixes = [previous_source['source_dir'],
+                         os.path.realpath(previous_source['source_dir'])]
+
+    # Linhas anteriores agrupadas por arquivo (relativo), na ordem do CSV;
+    # os arquivos removidos/alterados saem
+    previous = {}
+    for csv_name in CK_FILES:
+        header, rows = read_ck_csv(os.path.join(previous_ck, csv_name))
+        groups = []
+        for row in rows:
+            relative = strip_source_prefix(row[0], previous_prefixes) if row else None
+            if relative is None or relative in removed_set:
+                continue
+            if not groups or groups[-1][0] != relative:
+                groups.append((relative, []))
+            groups[-1][1].append([os.path.join(source_dir, relative)] + row[1:])
+        previous[csv_name] = (header, groups)
+
+    # Índices nome qualificado -> arquivo e pacote -> arquivos da nova árvore
+    class_header, class_groups = previous['class.csv']
+    if not class_header or 'class' not in class_header:
+        return None
+    class_col = class_header.index('class')
+    type_index, package_index = {}, {}
+    for relative, rows in class_groups:
+        for row in rows:
+            type_index[row[class_col]] = relative
+            package_index.setdefault(row[class_col].rpartition('.')[0], set()).add(relative)
+
+    parsed = {}
+
+    def declarations_of(relative):
+        if relative not in parsed:
+            with open(os.path.join(source_dir, relative), encoding='utf-8', errors='replace') as f:
+                parsed[relative] = parse_java_declarations(f.read())
+        return parsed[relative]
+
+    for relative in changed:
+        declarations = declarations_of(relative)
+        for qualified in declared_java_types(declarations):
+            type_index.setdefault(qualified, relative)
+        package_index.setdefault(declarations['package'], set()).add(relative)
+
+    # Versão anterior dos arquivos removidos/alterados
+    old_declarations = [
+        parse_java_declarations(text) for text in read_git_blobs(
+            project_dir, [f"{previous_source['commit']}:{path}" for path in removed]).values()]
+    new_declarations = [declarations_of(relative) for relative in changed]
+
+    # A equivalência com a execução completa só vale para classes de topo:
+    # tipos aninhados/anônimos, interfaces, enums e records em arquivos
+    # alterados/removidos levam à análise completa
+    for declarations in old_declarations + new_declarations:
+        if declarations['anonymous'] or any(
+                declared['nested'] or declared['kind'] != 'class'
+                for declared in declarations['types']):
+            print(f"  → CK incremental: arquivo alterado declara tipos que não são classes de topo, "
+                  f"executando a análise completa")
+            return None
+
+    # Arquivos afetados: alterados + tipos citados antes/depois da mudança
+    affected = set(changed)
+    for declarations in old_declarations + new_declarations:
+        affected.update(type_index[qualified]
+                        for qualified in referenced_java_types(declarations, type_index))
+
+    # ... + subclasses das classes alteradas/removidas (DIT), nível a nível
+    frontier = {qualified for declarations in old_declarations + new_declarations
+                for qualified in declared_java_types(declarations)}
+    seen = set(frontier)
+    while frontier:
+        words = {re.split(r'[.$]', qualified)[-1] for qualified in frontier}
+        candidates = git_grep_java_files(project_dir, sha, words)
+        if candidates is None:
+            return None
+        subclasses = set()
+        for relative in candidates:
+            declarations = declarations_of(relative)
+            for declared in declarations['types']:
+                if any(resolve_java_type(supertype, declarations, type_index) in frontier
+                       for supertype in declared['supertypes']):
+                    affected.add(relative)
+                    qualified = f"{declarations['package']}.{declared['name']}" \
+                        if declarations['package'] else declared['name']
+                    if qualified not in seen:
+                        subclasses.add(qualified)
+        seen.update(subclasses)
+        frontier = subclasses
+
+    if affected:
+        # Arquivos que citam os afetados (contagens de fanin, cboModified e NOC)
+        affected_types = {qualified for qualified, relative in type_index.items()
+                          if relative in affected}
+        words = {re.split(r'[.$]', qualified)[-1] for qualified in affected_types}
+        referrers = git_grep_java_files(project_dir, sha, words)
+        if referrers is None:
+            return None
+        include = set(affected) | referrers
+
+        # Fecho de dependências dos arquivos afetados
+        pending_files = list(affected)
+        visited = set()
+        while pending_files:
+            relative = pending_files.pop()
+            if relative in visited:
+                continue
+            visited.add(relative)
+            declarations = declarations_of(relative)
+            if relative in affected:
+                include.update(package_index.get(declarations['package'], ()))
+                for imported in declarations['imports']:
+                    if imported.endswith('.*'):
+                        include.update(package_index.get(imported[:-2], ()))
+                    elif java_binary_name(imported, type_index) in type_index:
+                        include.add(type_index[java_binary_name(imported, type_index)])
+            for declared in declarations['types']:
+                for supertype in declared['supertypes']:
+                    parent_file = type_index.get(resolve_java_type(supertype, declarations, type_index))
+                    if parent_file and parent_file not in visited:
+                        include.add(parent_file)
+                        pending_files.append(parent_file)
+
+        # Roda o CK em uma cópia contendo só esses arquivos
+        work_dir = tempfile.mkdtemp(prefix="ck-incremental-")
+        try:
+            partial_src = os.path.join(work_dir, "src")
+            partial_out = os.path.join(work_dir, "out")
+            os.makedirs(partial_out)
+            for relative in include:
+                target = os.path.join(partial_src, relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(source_dir, relative), target)
+
+            print(f"      Analisando {len(include)} arquivo(s) ({len(affected)} afetado(s) "
+                  f"+ dependências e referências)")
+            returncode, _ = run_logged(f"{CK_BIN} {partial_src} .", os.path.join(output_dir, "ck.log"),
+                                       cwd=partial_out, timeout=TOOL_TIMEOUTS['ck'])
+            if returncode != 0:
+                print(f"    ⚠ Erro ao executar CK incremental")
+                return None
+
+            partial_prefixes = [partial_src, os.path.realpath(partial_src)]
+            partial = {}
+            for csv_name in CK_FILES:
+                header, rows = read_ck_csv(os.path.join(partial_out, csv_name))
+                previous_header, groups = previous[csv_name]
+                if previous_header and header and header != previous_header:
+                    return None
+                previous[csv_name] = (previous_header or header, groups)
+                # Só as linhas dos arquivos afetados; os demais entraram
+                # apenas para resolver tipos e contar referências
+                partial[csv_name] = {relative: [] for relative in affected}
+                for row in rows:
+                    relative = strip_source_prefix(row[0], partial_prefixes) if row else None
+                    if relative in affected:
+                        partial[csv_name][relative].append([os.path.join(source_dir, relative)] + row[1:])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    else:
+        partial = {csv_name: {} for csv_name in CK_FILES}
+
+    class_count = 0
+    for csv_name in CK_FILES:
+        header, groups = previous[csv_name]
+        if not header:
+            continue
+        rows = merge_ck_rows(groups, partial[csv_name])
+        if csv_name == 'class.csv':
+            class_count = len(rows)
+        with open(os.path.join(ck_output, csv_name), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    write_ck_source(ck_output, tag_name, sha, source_dir,
+                    previous_source.get('incremental_depth', 0) + 1)
+    print(f"    ✓ CK Metrics salvo em {ck_output} (incremental, {class_count} classes)")
+    return True
+
+PMD_RULESET = 'rulesets/java/quickstart.xml'
+
 def run_pmd_analysis(project_dir, output_dir):
     """Executa análise PMD."""
     print(f"  → Executando PMD...")
@@ -134,16 +1377,12 @@ def run_pmd_analysis(project_dir, output_dir):
     pmd_output = os.path.join(output_dir, "pmd-report.csv")
     pmd_log = os.path.join(output_dir, "pmd.log")
 
-    # PMD retorna exit code != 0 quando encontra problemas, por isso o '|| true'
-    cmd = f"/tools/pmd/bin/pmd check -d {src_dir} -R rulesets/java/quickstart.xml -f csv -r {pmd_output} 2>&1 | tee {pmd_log} || true"
-
-    returncode, stdout, stderr = run_command(cmd, capture_output=True)
-
-    # Salvar log sempre
-    with open(pmd_log, 'w') as f:
-        f.write(stdout if stdout else "")
-        if stderr:
-            f.write("\n" + stderr)
+    # PMD retorna exit code != 0 quando encontra problemas: o código de saída
+    # é ignorado e vale o relatório gerado
+    cmd = f"{PMD_BIN} check -d {src_dir} -R {PMD_RULESET} -f csv -r {pmd_output}"
+    returncode, _ = run_logged(cmd, pmd_log, timeout=TOOL_TIMEOUTS['pmd'])
+    if returncode == TIMEOUT_RETURNCODE:
+        return False
 
     if os.path.exists(pmd_output) and os.path.getsize(pmd_output) > 0:
         print(f"    ✓ PMD report salvo em {pmd_output}")
@@ -153,43 +1392,412 @@ def run_pmd_analysis(project_dir, output_dir):
         print(f"      Log: {pmd_log}")
         return True  # Considerar sucesso mesmo sem problemas
 
-def run_spotbugs_analysis(project_dir, output_dir):
-    """Executa análise SpotBugs com find-sec-bugs."""
+def pmd_cache_key():
+    """
+    Chave do cache de violações: versão do PMD + ruleset.
+
+    Um ruleset em arquivo entra pelo conteúdo, então editá-lo invalida o cache.
+    """
+    digest = hashlib.sha256(f"{TOOL_VERSIONS['pmd']}\n{PMD_RULESET}\n".encode('utf-8'))
+    if os.path.isfile(PMD_RULESET):
+        with open(PMD_RULESET, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def git_java_blobs(project_dir, tag_name, subdir="src"):
+    """
+    Arquivos .java de uma tag sob subdir, com o hash de conteúdo (blob) de cada um.
+
+    Returns:
+        Lista de (caminho relativo, blob) ordenada por caminho, ou None se o
+        `git ls-tree` falhar
+    """
+    returncode, stdout, _ = run_command(
+        f"git ls-tree -r -z --full-tree {tag_name} -- {subdir}",
+        cwd=project_dir, capture_output=True)
+    if returncode != 0:
+        return None
+
+    blobs = []
+    for entry in stdout.split('\0'):
+        if not entry:
+            continue
+        meta, path = entry.split('\t', 1)
+        mode, object_type, blob = meta.split()
+        if object_type == 'blob' and mode != '120000' and path.endswith('.java'):
+            blobs.append((path, blob))
+    return sorted(blobs)
+
+def pmd_cache_entry(cache_dir, blob):
+    """Caminho do arquivo com as violações de um blob no cache."""
+    return os.path.join(cache_dir, blob[:2], f"{blob}.json")
+
+def run_pmd_files(files, cache_dir, pmd_log, timeout=None):
+    """
+    Roda o PMD uma vez sobre os arquivos dados (`--file-list`) e grava as
+    violações de cada um no cache, indexadas pelo blob.
+
+    Args:
+        files: blob -> caminho do arquivo no disco
+        timeout: limite da execução (padrão: TOOL_TIMEOUTS['pmd'])
+
+    Returns:
+        Dicionário blob -> violações, False se o PMD estourou o tempo, ou None
+        se o relatório não pôde ser usado
+    """
+    with tempfile.TemporaryDirectory(prefix="pmd-files-") as tmp_dir:
+        file_list = os.path.join(tmp_dir, "files.txt")
+        with open(file_list, 'w') as f:
+            f.write("".join(f"{path}\n" for path in files.values()))
+        partial_report = os.path.join(tmp_dir, "pmd-report.csv")
+
+        cmd = f"{PMD_BIN} check --file-list {file_list} -R {PMD_RULESET} " \
+              f"-f csv -r {partial_report}"
+        returncode, _ = run_logged(cmd, pmd_log, timeout=timeout or TOOL_TIMEOUTS['pmd'])
+        if returncode == TIMEOUT_RETURNCODE:
+            return False
+
+        if not os.path.exists(partial_report):
+            print(f"    ⚠ PMD não gerou relatório, repetindo sem cache")
+            return None
+        with open(partial_report, newline='') as f:
+            rows = list(csv.reader(f))[1:]
+
+    # Colunas do CSV do PMD: Problem, Package, File, Priority, Line,
+    # Description, Rule set, Rule. O cache guarda tudo menos o número e o
+    # caminho, que dependem da release.
+    blob_by_path = {os.path.normpath(path): blob for blob, path in files.items()}
+    new_entries = {blob: [] for blob in files}
+    for row in rows:
+        blob = blob_by_path.get(os.path.normpath(row[2]))
+        if blob is None:
+            print(f"    ⚠ Arquivo inesperado no relatório do PMD: {row[2]}")
+            return None
+        new_entries[blob].append(row[1:2] + row[3:])
+
+    # Grava cada entrada por rename atômico: workers paralelos podem
+    # analisar o mesmo blob ao mesmo tempo
+    for blob, violations in new_entries.items():
+        entry = pmd_cache_entry(cache_dir, blob)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp_entry = f"{entry}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_entry, 'w') as f:
+            json.dump(violations, f)
+        os.replace(tmp_entry, entry)
+    return new_entries
+
+def run_pmd_incremental(project_dir, source_dir, tag_name, output_dir, cache_dir):
+    """
+    Executa o PMD reaproveitando violações de arquivos já analisados.
+
+    As violações ficam em cache_dir indexadas pelo blob do arquivo (hash do
+    conteúdo no git), então um arquivo que não mudou entre releases, mesmo
+    se renomeado, não volta ao PMD. Só os blobs ausentes do cache são
+    analisados (`--file-list`); o relatório final é montado com todos os
+    arquivos da release, na ordem dos caminhos e com a numeração refeita,
+    igual ao de uma execução completa. Sem auxclasspath as regras do PMD
+    dependem apenas do arquivo analisado, o que torna o reaproveitamento
+    seguro.
+
+    Returns:
+        True/False como run_pmd_analysis, ou None quando não dá para usar o
+        cache (o chamador faz a execução completa)
+    """
+    blobs = git_java_blobs(project_dir, tag_name)
+    if not blobs:
+        return None
+
+    pmd_output = os.path.join(output_dir, "pmd-report.csv")
+    pmd_log = os.path.join(output_dir, "pmd.log")
+
+    # Arquivos com conteúdo idêntico (mesmo blob) são analisados uma só vez
+    cached = {}
+    missing = {}
+    for path, blob in blobs:
+        entry = pmd_cache_entry(cache_dir, blob)
+        if blob in cached or blob in missing:
+            continue
+        if os.path.exists(entry):
+            with open(entry) as f:
+                cached[blob] = json.load(f)
+        else:
+            missing[blob] = os.path.normpath(os.path.join(source_dir, path))
+
+    print(f"  → Executando PMD ({len(blobs) - len(missing)} arquivo(s) do cache, "
+          f"{len(missing)} para analisar)...")
+
+    if missing:
+        new_entries = run_pmd_files(missing, cache_dir, pmd_log)
+        if not new_entries:
+            return new_entries
+        cached.update(new_entries)
+
+    # Relatório completo da release, com o mesmo formato do PMD
+    problem = 0
+    with open(pmd_output, 'w', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        writer.writerow(['Problem', 'Package', 'File', 'Priority', 'Line',
+                         'Description', 'Rule set', 'Rule'])
+        for path, blob in blobs:
+            file_path = os.path.join(source_dir, path)
+            for violation in cached[blob]:
+                problem += 1
+                writer.writerow([str(problem), violation[0], file_path] + violation[1:])
+
+    # Sem arquivos a analisar, o log de uma execução anterior não vale mais
+    with open(pmd_log, 'a' if missing else 'w') as f:
+        f.write(f"\n[cache] {len(blobs) - len(missing)} arquivo(s) reaproveitado(s), "
+                f"{len(missing)} analisado(s)\n")
+
+    print(f"    ✓ PMD report salvo em {pmd_output} ({problem} violação(ões))")
+    return True
+
+def run_pmd_batch(project_dir, missing, release_count, cache_dir, pmd_log):
+    """
+    Analisa com uma única execução do PMD os arquivos de um lote de releases
+    (modo --pmd-batch), pagando a partida da JVM e a leitura do ruleset uma
+    vez por lote em vez de uma vez por release.
+
+    Os arquivos são materializados a partir do git em uma árvore por release
+    sob um diretório temporário e passam juntos pelo `--file-list`. As
+    violações voltam ao cache por blob; o pmd-report.csv de cada release é
+    montado depois pela etapa normal (run_pmd_incremental), que encontra
+    todos os arquivos no cache.
+
+    Args:
+        missing: blob -> (posição da release, caminho) dos arquivos a analisar
+        release_count: número de releases do lote (escala o limite de tempo)
+
+    Returns:
+        Dicionário com arquivos analisados, tempo (segundos) e sucesso
+    """
+    started = time.perf_counter()
+    batch = {'analyzed': len(missing), 'success': True}
+
+    if missing:
+        with tempfile.TemporaryDirectory(prefix="pmd-batch-") as tmp_dir:
+            contents = read_git_blobs(project_dir, list(missing), binary=True)
+            files = {}
+            for blob, (index, path) in missing.items():
+                if blob not in contents:
+                    continue
+                file_path = os.path.join(tmp_dir, str(index), path)
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    f.write(contents[blob])
+                files[blob] = file_path
+
+            # O limite de tempo cresce com o número de releases do lote
+            timeout = TOOL_TIMEOUTS['pmd'] and TOOL_TIMEOUTS['pmd'] * release_count
+            batch['success'] = bool(files) and bool(run_pmd_files(files, cache_dir, pmd_log,
+                                                                  timeout))
+
+    batch['seconds'] = round(time.perf_counter() - started, 2)
+    return batch
+
+# Ordem dos elementos de primeiro nível no XML do SpotBugs
+SPOTBUGS_ELEMENT_ORDER = ['Project', 'BugInstance', 'BugCategory', 'BugPattern', 'BugCode',
+                          'Errors', 'FindBugsSummary', 'ClassFeatures', 'History']
+
+def merge_spotbugs_reports(report_files, output_file):
+    """
+    Junta relatórios XML do SpotBugs (um por JAR) em um único BugCollection.
+
+    O primeiro relatório serve de base; dos demais entram os JARs do
+    <Project>, os <BugInstance> (sem repetir instanceHash), as definições de
+    padrões/categorias ainda ausentes e os erros. Os totais numéricos do
+    <FindBugsSummary> são somados e os <PackageStats> acrescentados.
+
+    Os relatórios são lidos com iterparse (spotbugs_stream.iter_top_level)
+    em duas passadas: a primeira valida cada um e junta as seções pequenas;
+    a segunda grava os <BugInstance> direto no arquivo de saída. A memória fica limitada a um elemento por vez
+    (mais as seções pequenas) e o trabalho é linear no tamanho dos relatórios.
+
+    Relatórios ilegíveis (ex: JVM interrompida no meio da escrita) ficam de
+    fora do resultado.
+
+    Returns:
+        Lista dos relatórios descartados por não serem XML válido
+    """
+    import spotbugs_stream
+
+    definition_keys = {'BugCategory': 'category', 'BugPattern': 'type', 'BugCode': 'abbrev'}
+    valid, skipped = [], []
+    root_element = None
+    sections = {name: [] for name in SPOTBUGS_ELEMENT_ORDER if name != 'BugInstance'}
+    extra = []
+    seen_definitions = set()
+
+    def merge_counts(target, source, summed):
+        for attr, value in source.attrib.items():
+            if summed(attr) and value.isdigit() and (target.get(attr) or '0').isdigit():
+                target.set(attr, str(int(target.get(attr) or 0) + int(value)))
+
+    # Primeira passada: validação e seções pequenas
+    for report_file in report_files:
+        elements = []
+        report_root = None
+        try:
+            for report_root, element in spotbugs_stream.iter_top_level(report_file):
+                if xml_local_name(element.tag) != 'BugInstance':
+                    elements.append(element)
+            if report_root is None:
+                # Sem filhos: o documento é só a raiz
+                report_root = ET.parse(report_file).getroot()
+        except ET.ParseError:
+            skipped.append(report_file)
+            continue
+        is_base = not valid
+        valid.append(report_file)
+        if is_base:
+            root_element = ET.Element(report_root.tag, report_root.attrib)
+
+        for element in elements:
+            name = xml_local_name(element.tag)
+            element.tail = None
+            if name not in sections:
+                if is_base:
+                    extra.append(element)
+            elif name in definition_keys:
+                key = (name, element.get(definition_keys[name]))
+                if is_base or key not in seen_definitions:
+                    seen_definitions.add(key)
+                    sections[name].append(element)
+            elif is_base:
+                sections[name].append(element)
+            elif name in ('ClassFeatures', 'History'):
+                continue  # só os da base
+            elif not sections[name]:
+                sections[name].append(element)
+            elif name == 'Project':
+                project = sections['Project'][0]
+                jars = [child for child in project if xml_local_name(child.tag) == 'Jar']
+                known_jars = {jar.text for jar in jars}
+                for jar in (child for child in element if xml_local_name(child.tag) == 'Jar'):
+                    if jar.text not in known_jars:
+                        known_jars.add(jar.text)
+                        project.insert(list(project).index(jars[-1]) + 1 if jars else 0, jar)
+                        jars.append(jar)
+            elif name == 'Errors':
+                errors = sections['Errors'][0]
+                merge_counts(errors, element, lambda attr: True)
+                errors.extend(list(element))
+            elif name == 'FindBugsSummary':
+                summary = sections['FindBugsSummary'][0]
+                merge_counts(summary, element, lambda attr: attr.startswith('total_') or
+                             attr.startswith('priority_') or
+                             attr in ('num_packages', 'referenced_classes'))
+                summary.extend(child for child in element
+                               if xml_local_name(child.tag) == 'PackageStats')
+    if not valid:
+        return skipped
+
+    def write_element(out, element):
+        element.tail = None
+        out.write(ET.tostring(element, encoding='unicode').encode('utf-8'))
+        out.write(b"\n")
+
+    # Segunda passada: BugInstances direto no arquivo, na ordem do SpotBugs
+    start_tag = ET.tostring(root_element, encoding='unicode')
+    start_tag = start_tag[:-len(" />")] + ">" if start_tag.endswith(" />") else start_tag[:-2] + ">"
+    end_tag = f"</{start_tag[1:].split(None, 1)[0].rstrip('>')}>"
+    with open(output_file, 'wb') as out:
+        out.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        out.write(start_tag.encode('utf-8') + b"\n")
+        for element in sections['Project']:
+            write_element(out, element)
+
+        seen_bugs = set()
+        bug_count = 0
+        for report_file in valid:
+            for _, element in spotbugs_stream.iter_top_level(report_file):
+                if xml_local_name(element.tag) != 'BugInstance':
+                    continue
+                instance_hash = element.get('instanceHash')
+                if instance_hash and instance_hash in seen_bugs:
+                    continue
+                seen_bugs.add(instance_hash)
+                bug_count += 1
+                write_element(out, element)
+
+        # Bugs repetidos entre relatórios entraram uma vez só
+        for summary in sections['FindBugsSummary'][:1]:
+            summary.set('total_bugs', str(bug_count))
+        for name in SPOTBUGS_ELEMENT_ORDER[2:]:
+            for element in sections[name]:
+                write_element(out, element)
+        for element in extra:
+            write_element(out, element)
+        out.write(end_tag.encode('utf-8') + b"\n")
+    return skipped
+
+def run_spotbugs_analysis(project_dir, output_dir, jobs=1):
+    """
+    Executa análise SpotBugs com find-sec-bugs.
+
+    Cada JAR de módulo é analisado em uma JVM própria, até `jobs` ao mesmo
+    tempo, com os demais JARs no auxclasspath (tipos de outros módulos
+    continuam resolvidos). Os relatórios são juntados em spotbugs-report.xml.
+    """
     print(f"  → Executando SpotBugs + find-sec-bugs...")
 
-    # Procurar JARs compilados (excluir -sources, -javadoc, -tests)
-    jar_files = []
-    for root, dirs, files in os.walk(project_dir):
-        for file in files:
-            if file.endswith('.jar') and ('target' in root or 'build' in root):
-                # Excluir JARs de fontes, javadoc, exemplos, testes
-                if not any(x in file for x in ['-sources', '-javadoc', '-examples', '-tests', '-test']):
-                    jar_path = os.path.join(root, file)
-                    jar_files.append(jar_path)
+    # JARs compilados de cada módulo (excluir -sources, -javadoc, -tests)
+    jar_files = find_built_jars(project_dir)
 
     if not jar_files:
         print(f"    ⚠ Nenhum JAR encontrado para análise")
         return False
 
-    print(f"      Analisando {len(jar_files)} JAR(s)...")
+    workers = max(1, min(jobs, len(jar_files)))
+    print(f"      Analisando {len(jar_files)} JAR(s) ({workers} em paralelo)...")
 
     spotbugs_output = os.path.join(output_dir, "spotbugs-report.xml")
     spotbugs_log = os.path.join(output_dir, "spotbugs.log")
 
-    # Limitar a 3 JARs principais para não demorar muito
-    jar_list = " ".join(jar_files[:3])
-
-    cmd = f"/tools/spotbugs/bin/spotbugs -textui -effort:max " \
-          f"-pluginList /tools/spotbugs/plugin/findsecbugs-plugin.jar " \
-          f"-xml:withMessages -output {spotbugs_output} {jar_list} 2>&1 | tee {spotbugs_log} || true"
-
-    returncode, stdout, stderr = run_command(cmd, capture_output=True)
-
-    # Salvar log
-    with open(spotbugs_log, 'w') as f:
-        f.write(stdout if stdout else "")
-        if stderr:
-            f.write("\n" + stderr)
+    # As JVMs rodam em threads do pool, mas contam para a etapa desta release
+    stage_record = TELEMETRY.current()
+
+    with tempfile.TemporaryDirectory(prefix="spotbugs-", dir=output_dir) as tmp_dir:
+        def analyze_jar(index, jar_file):
+            jar_output = os.path.join(tmp_dir, f"{index:03d}-{os.path.basename(jar_file)}.xml")
+            aux_jars = [other for other in jar_files if other != jar_file]
+            aux_option = f"-auxclasspath {':'.join(aux_jars)} " if aux_jars else ""
+            cmd = f"{SPOTBUGS_BIN} -textui -effort:max " \
+                  f"-pluginList {FINDSECBUGS_PLUGIN} " \
+                  f"{aux_option}-xml:withMessages -output {jar_output} {jar_file}"
+            jar_log = f"{jar_output}.log"
+            with TELEMETRY.attach(stage_record):
+                returncode, _ = run_logged(cmd, jar_log, timeout=TOOL_TIMEOUTS['spotbugs'])
+            if returncode == TIMEOUT_RETURNCODE and os.path.exists(jar_output):
+                os.remove(jar_output)
+            return jar_output, jar_log, returncode
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(analyze_jar, range(len(jar_files)), jar_files))
+
+        # Salvar log (saída de cada JVM, na ordem dos JARs)
+        with open(spotbugs_log, 'wb') as f:
+            for jar_file, (_, jar_log, returncode) in zip(jar_files, outcomes):
+                f.write(f"=== {jar_file} (exit {returncode}) ===\n".encode())
+                with open(jar_log, 'rb') as jf:
+                    shutil.copyfileobj(jf, f)
+                f.write(b"\n")
+
+        reports = [report for report, _, _ in outcomes
+                   if os.path.exists(report) and os.path.getsize(report) > 0]
+        if len(reports) == 1:
+            shutil.move(reports[0], spotbugs_output)
+        elif reports:
+            skipped = merge_spotbugs_reports(reports, spotbugs_output)
+            reports = [report for report in reports if report not in skipped]
+
+    if len(reports) < len(jar_files):
+        print(f"    ⚠ {len(jar_files) - len(reports)} JAR(s) sem relatório válido (ver {spotbugs_log})")
+
+    # Relatório incompleto: a etapa fica pendente para a próxima execução
+    if any(returncode == TIMEOUT_RETURNCODE for _, _, returncode in outcomes):
+        print(f"    ✗ SpotBugs excedeu o tempo limite em algum JAR (ver {spotbugs_log})")
+        return False
 
     if os.path.exists(spotbugs_output) and os.path.getsize(spotbugs_output) > 100:
         print(f"    ✓ SpotBugs report salvo em {spotbugs_output}")
@@ -199,10 +1807,522 @@ def run_spotbugs_analysis(project_dir, output_dir):
         print(f"      Log: {spotbugs_log}")
         return True  # Considerar sucesso
 
-def analyze_release(project_dir, release, results_base_dir):
-    """Analisa uma release completa."""
+# Versões das ferramentas instaladas pelo Dockerfile. Fazem parte da chave
+# do journal: atualizar uma ferramenta invalida os resultados anteriores.
+TOOL_VERSIONS = {
+    'ck': '0.7.0',
+    'pmd': '7.7.0',
+    'spotbugs': '4.8.6+findsecbugs-1.13.0',
+    'refactoring-miner': '3.0.9',
+}
+
+# Arquivo que precisa existir para que uma etapa registrada no journal seja
+# considerada reaproveitável (o usuário pode ter apagado resultados).
+STAGE_OUTPUTS = {
+    'ck': os.path.join('ck', 'class.csv'),
+    'pmd': 'pmd.log',
+    'spotbugs': 'spotbugs.log',
+}
+
+# Chave do journal usada para etapas que valem para o repositório inteiro
+REPOSITORY_JOURNAL_TAG = '__repository__'
+
+# Arquivo gravado em cada snapshot com o SHA materializado
+SNAPSHOT_MARKER = '.snapshot-commit'
+
+# Ferramentas executadas por release. Só o SpotBugs precisa do build.
+ANALYSIS_TOOLS = ('ck', 'pmd', 'spotbugs')
+
+class RunJournal:
+    """
+    Journal das etapas concluídas em cada release (checkout, build, ck, pmd,
+    spotbugs, refactoring-miner).
+
+    Cada etapa concluída vira uma linha JSON acrescentada (e sincronizada em
+    disco) ao arquivo, então uma execução interrompida perde no máximo a
+    etapa em andamento. A chave de cada etapa é o SHA do commit mais a versão
+    da ferramenta, de modo que uma tag movida ou uma ferramenta atualizada
+    invalida o que foi registrado antes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        # Uma escrita interrompida pode deixar a última linha incompleta;
+        # descartamos esse trecho para não corromper as próximas linhas.
+        valid_size = data.rfind(b"\n") + 1
+        if valid_size < len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+
+        for line in data[:valid_size].decode('utf-8').splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self.entries[(entry['tag'], entry['stage'])] = entry
+
+    @staticmethod
+    def stage_key(sha, stage):
+        """Chave de uma etapa: SHA do commit + versão da ferramenta."""
+        return f"{sha}:{TOOL_VERSIONS.get(stage, '')}"
+
+    def lookup(self, tag_name, stage, sha):
+        """Retorna o registro da etapa se ela já foi concluída para este SHA."""
+        entry = self.entries.get((tag_name, stage))
+        if entry and entry['key'] == self.stage_key(sha, stage):
+            return entry
+        return None
+
+    def is_done(self, tag_name, stage, sha):
+        """Indica se a etapa terminou com sucesso para este SHA."""
+        entry = self.lookup(tag_name, stage, sha)
+        return bool(entry and entry['success'])
+
+    def record(self, tag_name, stage, sha, success):
+        """Registra a conclusão de uma etapa (sucesso ou falha)."""
+        entry = {
+            'tag': tag_name,
+            'stage': stage,
+            'key': self.stage_key(sha, stage),
+            'success': bool(success),
+            'time': datetime.now().isoformat(timespec='seconds'),
+        }
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[(tag_name, stage)] = entry
+
+# Arquivos de resultado de cada ferramenta que uma release com as mesmas
+# entradas pode reaproveitar (diretórios entram com todos os arquivos)
+TOOL_OUTPUT_FILES = {
+    'ck': ('ck', 'ck.log'),
+    'pmd': ('pmd-report.csv', 'pmd.log'),
+    'spotbugs': ('spotbugs-report.xml', 'spotbugs.log', 'build.log'),
+}
+
+class AnalysisDedup:
+    """
+    Releases com as mesmas entradas da análise (hash das fontes e arquivos de
+    build, ver build_inputs_hash): a primeira é analisada e as demais
+    reaproveitam os resultados dela (re-tags, releases só de empacotamento,
+    RC igual à final).
+
+    Começa com os hashes gravados nos summary.json de execuções anteriores.
+    Com releases em paralelo, uma release cujo hash é o de outra ainda em
+    andamento espera ela terminar (finish()) antes de decidir.
+    """
+
+    def __init__(self, results_base_dir):
+        self.results_base_dir = results_base_dir
+        self.lock = threading.Lock()
+        self.owners = {}
+        self.running = {}
+        deduplicated = {}
+        for name in sorted(os.listdir(results_base_dir)):
+            summary = read_release_summary(os.path.join(results_base_dir, name))
+            inputs_hash = summary.get('inputs_hash') if summary else None
+            if inputs_hash:
+                # Releases analisadas de fato têm preferência como origem
+                target = deduplicated if summary.get('dedup') else self.owners
+                target.setdefault(inputs_hash, summary['tag_name'])
+        for inputs_hash, tag_name in deduplicated.items():
+            self.owners.setdefault(inputs_hash, tag_name)
+
+    def claim(self, inputs_hash, tag_name):
+        """
+        Release já analisada com o mesmo hash (esperando-a, se estiver em
+        andamento), ou None; nesse caso esta release passa a ser a origem.
+        """
+        with self.lock:
+            owner = self.owners.get(inputs_hash)
+            if owner is None or owner == tag_name:
+                self.owners[inputs_hash] = tag_name
+                self.running[tag_name] = threading.Event()
+                return None
+            event = self.running.get(owner)
+        if event:
+            event.wait()
+        return owner
+
+    def register(self, inputs_hash, tag_name):
+        """Registra uma release já concluída como origem possível do hash."""
+        with self.lock:
+            self.owners.setdefault(inputs_hash, tag_name)
+
+    def finish(self, tag_name):
+        """Libera as releases que esperam por esta (chamado ao fim de cada release)."""
+        with self.lock:
+            event = self.running.pop(tag_name, None)
+        if event:
+            event.set()
+
+def read_release_summary(release_dir):
+    """summary.json de uma release (ou None)."""
+    try:
+        with open(os.path.join(release_dir, "summary.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def link_result_file(source, target):
+    """
+    Hardlink de um arquivo de resultado (cópia, se estiverem em sistemas de
+    arquivos diferentes). Retorna True para hardlink.
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        shutil.copy2(source, target)
+        return False
+
+def unlink_shared_outputs(release_dir, tools):
+    """
+    Remove os resultados de `tools` que são hardlinks de outra release antes
+    de rodar as ferramentas de novo (elas reescrevem os arquivos no lugar, o
+    que alteraria também a release de origem).
+    """
+    for tool in tools:
+        for name in TOOL_OUTPUT_FILES[tool]:
+            path = os.path.join(release_dir, name)
+            paths = [os.path.join(path, entry) for entry in os.listdir(path)] \
+                if os.path.isdir(path) else [path]
+            for file_path in paths:
+                if os.path.isfile(file_path) and os.stat(file_path).st_nlink > 1:
+                    os.remove(file_path)
+
+def reuse_release_outputs(results_base_dir, source_tag, release_dir, tag_name, sha,
+                          inputs_hash, tools):
+    """
+    Reaproveita os resultados de `source_tag` (mesmo hash das entradas) para
+    as ferramentas em `tools` que tiveram sucesso lá com a mesma versão.
+
+    Returns:
+        Registro da deduplicação (origem, ferramentas, arquivos e bytes
+        ligados) ou None se nada pôde ser reaproveitado
+    """
+    source_dir = os.path.join(results_base_dir, source_tag)
+    summary = read_release_summary(source_dir)
+    if not summary or summary.get('inputs_hash') != inputs_hash:
+        return None
+
+    versions = summary.get('tool_versions', {})
+    dedup = {'source': source_tag, 'tools': [], 'linked_files': 0, 'copied_files': 0,
+             'bytes': 0}
+    for tool in tools:
+        if summary.get(tool) is not True or versions.get(tool) != TOOL_VERSIONS[tool] or \
+                not os.path.exists(os.path.join(source_dir, STAGE_OUTPUTS[tool])):
+            continue
+        for name in TOOL_OUTPUT_FILES[tool]:
+            source = os.path.join(source_dir, name)
+            if os.path.isdir(source):
+                os.makedirs(os.path.join(release_dir, name), exist_ok=True)
+                files = [os.path.join(name, entry) for entry in os.listdir(source)
+                         if entry != CK_SOURCE_FILE]
+            else:
+                files = [name] if os.path.exists(source) else []
+            for file_name in files:
+                linked = link_result_file(os.path.join(source_dir, file_name),
+                                          os.path.join(release_dir, file_name))
+                dedup['linked_files' if linked else 'copied_files'] += 1
+                dedup['bytes'] += os.path.getsize(os.path.join(release_dir, file_name))
+        if tool == 'ck':
+            # Os caminhos dos CSVs continuam os da origem; o commit passa a ser
+            # o desta release (base do CK incremental da próxima)
+            ck_source = read_ck_source(os.path.join(source_dir, "ck")) or {}
+            write_ck_source(os.path.join(release_dir, "ck"), tag_name,
+                            sha or ck_source.get('commit'), ck_source.get('source_dir'),
+                            ck_source.get('incremental_depth', 0))
+        dedup['tools'].append(tool)
+    return dedup if dedup['tools'] else None
+
+# Memória fora do heap de cada JVM (metaspace, threads, buffers), em MB
+JVM_OVERHEAD_MB = 512
+
+# Memória estimada de etapas sem JVM (clone, checkout, snapshot), em MB
+GIT_MEMORY_MB = 256
+
+# Memória deixada fora do orçamento das etapas (sistema, pipeline, page cache)
+MEMORY_RESERVE_MB = 1024
+
+def read_first_line(path):
+    """Primeira linha de um arquivo (None se não existir)."""
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+def meminfo_mb(field):
+    """Campo de /proc/meminfo em MB (None se indisponível)."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def available_memory_mb():
+    """
+    Memória disponível agora, em MB: MemAvailable da máquina, limitada pelo
+    que resta no cgroup do container (v2: memory.max, v1: limit_in_bytes).
+    """
+    available = meminfo_mb('MemAvailable') or 4096
+    for limit_file, usage_file in (
+            ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+            ('/sys/fs/cgroup/memory/memory.limit_in_bytes',
+             '/sys/fs/cgroup/memory/memory.usage_in_bytes')):
+        limit, usage = read_first_line(limit_file), read_first_line(usage_file)
+        if limit and limit.isdigit() and usage and usage.isdigit():
+            # Sem limite, o v1 informa um valor enorme (maior que a RAM)
+            available = min(available, (int(limit) - int(usage)) // (1024 * 1024))
+            break
+    return max(0, available)
+
+def available_cpus():
+    """CPUs utilizáveis: afinidade do processo, limitada pela cota do cgroup (cpu.max)."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    quota = (read_first_line('/sys/fs/cgroup/cpu.max') or '').split()
+    if len(quota) == 2 and quota[0].isdigit():
+        cpus = min(cpus, max(1, int(quota[0]) // int(quota[1])))
+    return max(1, cpus or 1)
+
+def jvm_heap_mb():
+    """Heap máximo das JVMs (-Xmx de JAVA_OPTS; sem ele, 1/4 da RAM, como a JVM)."""
+    match = re.search(r'-Xmx(\d+)([kKmMgG]?)', os.environ.get('JAVA_OPTS', ''))
+    if match:
+        value, unit = int(match.group(1)), match.group(2).lower()
+        return {'k': value // 1024, 'm': value, 'g': value * 1024}.get(unit, value // (1024 * 1024))
+    return (meminfo_mb('MemTotal') or 4096) // 4
+
+def stage_memory_mb(stage, jvms=1):
+    """Memória estimada de uma etapa: `jvms` JVMs (heap + overhead), ou o git."""
+    if stage == 'checkout':
+        return GIT_MEMORY_MB
+    return jvms * (jvm_heap_mb() + JVM_OVERHEAD_MB)
+
+class StageScheduler:
+    """
+    Executa as etapas de uma release como um DAG, com um limite global de
+    etapas simultâneas e de memória (somando todas as releases e, no modo
+    --batch, todos os repositórios em andamento).
+
+    Cada etapa roda em uma thread própria assim que suas dependências terminam
+    e ela consegue uma vaga; as vagas vão primeiro para a release mais antiga
+    e, dentro dela, para a etapa declarada antes. Assim, etapas de releases
+    seguintes só aproveitam a folga, sem atrasar a release atual.
+
+    Uma etapa só começa se a memória estimada dela (ver stage_memory_mb)
+    couber no que sobra do orçamento; a fila é estritamente por prioridade,
+    então uma JVM grande no início da fila não é ultrapassada por etapas
+    menores. Uma etapa maior que o orçamento inteiro roda sozinha.
+    """
+
+    def __init__(self, max_running, memory_mb=None):
+        self.max_running = max_running
+        self.memory_mb = memory_mb
+        self.running = 0
+        self.memory_used = 0
+        self.waiting = []
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+
+    def fits(self, memory_mb):
+        """Indica se uma etapa com essa memória pode começar agora."""
+        if self.running >= self.max_running:
+            return False
+        if self.running == 0 or self.memory_mb is None:
+            return True
+        return self.memory_used + memory_mb <= self.memory_mb
+
+    @contextmanager
+    def slot(self, priority, memory_mb=0):
+        """
+        Ocupa uma vaga e `memory_mb` do orçamento (menor `priority` primeiro).
+
+        Todas as prioridades têm a mesma forma, para serem comparáveis na fila:
+        ((repositório, release), etapa). Etapas do repositório fora das
+        releases usam release -1 (antes delas: clone, PMD em lote) ou
+        len(releases) (depois: RefactoringMiner), com etapa -1.
+        """
+        ticket = (priority, next(self.sequence))
+        with self.condition:
+            try:
+                heapq.heappush(self.waiting, ticket)
+                while self.waiting[0] != ticket or not self.fits(memory_mb):
+                    self.condition.wait()
+            except BaseException:
+                # Um ticket que ficou na fila travaria todos os seguintes
+                if ticket in self.waiting:
+                    self.waiting.remove(ticket)
+                    heapq.heapify(self.waiting)
+                    self.condition.notify_all()
+                raise
+            heapq.heappop(self.waiting)
+            self.running += 1
+            self.memory_used += memory_mb
+            # O próximo da fila pode caber em outra vaga livre
+            self.condition.notify_all()
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.running -= 1
+                self.memory_used -= memory_mb
+                self.condition.notify_all()
+
+    def run(self, stages, priority=0, gates=None, memory=None):
+        """
+        Executa as etapas respeitando as dependências e espera todas terminarem.
+
+        Args:
+            stages: lista de (nome, função, dependências), em ordem topológica
+            priority: prioridade da release (ex: posição na lista de releases)
+            gates: nome -> threading.Event esperado antes de ocupar uma vaga
+                   (dependências fora da release, ex: CK da release anterior)
+            memory: nome -> memória estimada da etapa, em MB
+
+        Uma etapa cuja dependência falhou com exceção não é executada; a
+        primeira exceção é propagada ao final.
+        """
+        gates = gates or {}
+        memory = memory or {}
+        done = {name: threading.Event() for name, _, _ in stages}
+        errors = []
+        parent = threading.current_thread().name
+
+        def execute(position, name, function, deps):
+            try:
+                for dep in deps:
+                    done[dep].wait()
+                if gates.get(name):
+                    gates[name].wait()
+                if errors:
+                    return
+                with self.slot((priority, position), memory.get(name, 0)):
+                    function()
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                done[name].set()
+
+        threads = [threading.Thread(target=execute, args=(position, name, function, deps),
+                                    name=f"{parent}/{name}")
+                   for position, (name, function, deps) in enumerate(stages)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+def run_stages(stages, scheduler=None, priority=0, gates=None, memory=None):
+    """
+    Executa as etapas de uma release: em sequência, na ordem da lista, ou
+    como DAG no scheduler (etapas independentes em paralelo).
+    """
+    if scheduler is None:
+        for _, function, _ in stages:
+            function()
+    else:
+        scheduler.run(stages, priority, gates, memory)
+
+def update_metrics_store(store_dir, release_dir, source_dir=None):
+    """Grava os resultados de uma release no dataset colunar do projeto."""
+    import metrics_store
+
+    try:
+        counts = metrics_store.write_release(store_dir, release_dir, source_dir)
+    except Exception as e:
+        print(f"  ⚠ Erro ao atualizar metrics-store: {e}")
+        return False
+
+    print(f"  ✓ metrics-store atualizado (" +
+          ", ".join(f"{name}: {count}" for name, count in counts.items() if name != 'releases') +
+          ")")
+    return True
+
+def update_aggregates(release_dir, tool=None, source_dir=None, missing_only=False):
+    """
+    Grava os agregados por release (contagem, soma, quantis) das tabelas de
+    uma ferramenta (todas, sem tool) em <release>/aggregates/.
+    """
+    import metric_sketches
+
+    tables = metric_sketches.TOOL_TABLES[tool] if tool else None
+    try:
+        counts = metric_sketches.write_release(release_dir, source_dir, tables, missing_only)
+    except Exception as e:
+        print(f"    ⚠ Erro ao gravar agregados: {e}")
+        return False
+
+    if counts:
+        print(f"    ✓ Agregados: " +
+              ", ".join(f"{name} ({count} linhas)" for name, count in counts.items()))
+    return True
+
+def resolve_commit(project_dir, ref):
+    """Retorna o SHA do commit apontado por uma tag/branch (ou None)."""
+    returncode, stdout, _ = run_command(f"git rev-parse {ref}^{{commit}}",
+                                        cwd=project_dir, capture_output=True)
+    if returncode != 0:
+        return None
+    return stdout.strip()
+
+def analyze_release(project_dir, release, results_base_dir, journal=None, options=None):
+    """
+    Analisa uma release completa.
+
+    Com um journal, as etapas já concluídas para o mesmo commit (e mesma
+    versão de ferramenta) são reaproveitadas e a análise recomeça na etapa
+    que falhou ou foi interrompida.
+
+    Com options['checkout'] == 'snapshot', a árvore da tag é materializada
+    em um diretório próprio (options['snapshot_root']/<tag>) em vez de
+    reaproveitar a working copy em project_dir; options['sparse'] e
+    options['partial_clone'] seguem para snapshot_release.
+
+    options['tools'] restringe as ferramentas executadas (as demais ficam
+    como None no resultado) e options['build_cache'] aponta o diretório do
+    cache de JARs, indexado pelo hash das entradas do build.
+
+    Com options['incremental_ck'], o CK roda apenas nos arquivos alterados
+    desde options['previous_tag'][tag] (ver run_ck_incremental).
+
+    options['pmd_cache'] aponta o cache de violações do PMD por conteúdo de
+    arquivo (ver run_pmd_incremental).
+
+    Com options['metrics_store'], os resultados da release são gravados
+    também na partição dela do dataset colunar (ver metrics_store.py).
+
+    Com options['scheduler'] (StageScheduler), as etapas depois do checkout
+    rodam como DAG: o PMD (só lê src/) em paralelo com o build, e o CK em
+    paralelo com o SpotBugs, ambos depois do build (o CK percorre a working
+    copy inteira, inclusive fontes gerados pelo build, como na ordem
+    sequencial).
+    """
+    options = options or {}
     tag_name = release['tag_name']
     date = release['published_date']
+    use_snapshot = options.get('checkout') == 'snapshot'
+    source_dir = None
 
     print(f"\n{'─'*60}")
     print(f"Analisando: {tag_name} ({date})")
@@ -217,46 +2337,563 @@ def analyze_release(project_dir, release, results_base_dir):
     with open(metadata_file, 'w') as f:
         json.dump(release, f, indent=2)
 
-    # Checkout da release
-    checkout_success = checkout_release(project_dir, tag_name)
-    if not checkout_success:
-        print(f"    ⚠ Pulando análise (checkout falhou)")
-        return {
-            'tag_name': tag_name,
-            'date': date,
-            'ck': False,
-            'pmd': False,
-            'spotbugs': False,
-            'error': 'Checkout failed'
-        }
-
-    # Compilar projeto
-    build_success = build_project(project_dir)
-
-    # Executar análises
+    tools = options.get('tools', ANALYSIS_TOOLS)
     results = {
         'tag_name': tag_name,
         'date': date,
-        'ck': run_ck_analysis(project_dir, release_dir),
-        'pmd': run_pmd_analysis(project_dir, release_dir),
+        'ck': False,
+        'pmd': False,
         'spotbugs': False
     }
-
-    # SpotBugs apenas se compilação teve sucesso (habilitado agora!)
-    if build_success:
-        results['spotbugs'] = run_spotbugs_analysis(project_dir, release_dir)
+    for tool in ANALYSIS_TOOLS:
+        if tool not in tools:
+            results[tool] = None
+
+    # Etapas já concluídas em uma execução anterior
+    sha = resolve_commit(project_dir, tag_name) if journal or options.get('incremental_ck') else None
+    pending = []
+    for stage in tools:
+        if journal and sha and journal.is_done(tag_name, stage, sha) and \
+                os.path.exists(os.path.join(release_dir, STAGE_OUTPUTS[stage])):
+            results[stage] = True
+        else:
+            pending.append(stage)
+
+    # Mesmas entradas (fontes e arquivos de build) de uma release já analisada:
+    # os resultados dela são ligados aqui em vez de rodar as ferramentas
+    dedup = options.get('dedup')
+    inputs_hash = build_inputs_hash(project_dir, tag_name, is_analysis_input) if dedup else None
+    reused = None
+    if inputs_hash:
+        results['inputs_hash'] = inputs_hash
+        results['tool_versions'] = {tool: TOOL_VERSIONS[tool] for tool in tools}
+        if not pending:
+            dedup.register(inputs_hash, tag_name)
+            previous_summary = read_release_summary(release_dir)
+            if previous_summary and previous_summary.get('inputs_hash') == inputs_hash and \
+                    previous_summary.get('dedup'):
+                results['dedup'] = previous_summary['dedup']
+        else:
+            source_tag = dedup.claim(inputs_hash, tag_name)
+            reused = source_tag and reuse_release_outputs(results_base_dir, source_tag,
+                                                          release_dir, tag_name, sha,
+                                                          inputs_hash, pending)
+            if reused:
+                print(f"  ✓ Mesmas entradas de {source_tag}: {', '.join(reused['tools'])} "
+                      f"reaproveitado(s) ({reused['linked_files']} hardlink(s), "
+                      f"{reused['bytes'] / 1024:.0f} KB)")
+                results['dedup'] = reused
+                for tool in reused['tools']:
+                    results[tool] = True
+                    pending.remove(tool)
+                    if journal and sha:
+                        journal.record(tag_name, tool, sha, True)
+                if not pending:
+                    print(f"  → Checkout e ferramentas pulados")
+    if pending:
+        unlink_shared_outputs(release_dir, pending)
+
+    if not pending:
+        if not reused:
+            print(f"  ✓ Release já analisada (journal), nada a refazer")
     else:
-        print(f"    ⚠ Pulando SpotBugs (compilação falhou)")
+        if journal and len(pending) < len(tools):
+            print(f"  ℹ Retomando a partir do journal (pendente: {', '.join(pending)})")
+
+        # Diretório onde as ferramentas rodam: a própria working copy ou um
+        # snapshot exclusivo desta release
+        if use_snapshot:
+            source_dir = os.path.join(options['snapshot_root'], tag_name.replace('/', '_'))
+            current_sha = snapshot_commit(source_dir)
+        else:
+            source_dir = project_dir
+            current_sha = resolve_commit(project_dir, 'HEAD') if journal else None
+
+        # O checkout só pode ser reaproveitado se a working copy ainda estiver
+        # no commit da release (ela não é limpa entre as etapas)
+        in_place = bool(journal and sha) and journal.is_done(tag_name, 'checkout', sha) and \
+            current_sha == sha
+
+        scheduler = options.get('scheduler')
+        project = options.get('project')
+        priority = (options.get('repository_order', 0),
+                    options.get('release_order', {}).get(tag_name, 0))
+
+        # Checkout da release
+        if in_place:
+            print(f"  → Checkout {tag_name} (reaproveitado do journal)")
+        else:
+            checkout_start = time.perf_counter()
+            with scheduler.slot((priority, -1), GIT_MEMORY_MB) if scheduler else nullcontext():
+                stage_record = TELEMETRY.begin(tag_name, 'checkout', project)
+                if use_snapshot:
+                    checkout_success = snapshot_release(project_dir, tag_name, source_dir,
+                                                        options.get('sparse', False),
+                                                        options.get('partial_clone', False))
+                else:
+                    checkout_success = checkout_release(project_dir, tag_name)
+                TELEMETRY.end(stage_record, checkout_success)
+            results['checkout_seconds'] = round(time.perf_counter() - checkout_start, 3)
+            print(f"    ✓ Checkout em {results['checkout_seconds']:.2f}s" if checkout_success
+                  else f"    ✗ Checkout falhou após {results['checkout_seconds']:.2f}s")
+            if journal and sha:
+                journal.record(tag_name, 'checkout', sha, checkout_success)
+            if not checkout_success:
+                print(f"    ⚠ Pulando análise (checkout falhou)")
+                results['error'] = 'Checkout failed'
+                if use_snapshot:
+                    shutil.rmtree(source_dir, ignore_errors=True)
+                return results
+
+        # Compilar projeto (necessário apenas para o SpotBugs)
+        build_success = False
+
+        def build_stage():
+            nonlocal build_success
+            stage_record = TELEMETRY.begin(tag_name, 'build', project)
+            build_cache = options.get('build_cache')
+            inputs_hash = build_inputs_hash(project_dir, tag_name) if build_cache else None
+            if in_place and journal.is_done(tag_name, 'build', sha):
+                print(f"  → Compilação reaproveitada do journal")
+                build_success = True
+            elif inputs_hash and restore_build_cache(build_cache, inputs_hash, source_dir):
+                build_success = True
+            else:
+                build_success = build_project(source_dir, os.path.join(release_dir, "build.log"))
+                if build_success and inputs_hash:
+                    store_build_cache(build_cache, inputs_hash, source_dir, tag_name)
+            TELEMETRY.end(stage_record, build_success)
+            if journal and sha:
+                journal.record(tag_name, 'build', sha, build_success)
+
+        # Executar análises
+        previous_tag = options.get('previous_tag', {}).get(tag_name)
+        previous_ready = options.get('ck_ready', {}).get(previous_tag)
+
+        def ck_stage():
+            stage_record = TELEMETRY.begin(tag_name, 'ck', project)
+            results['ck'] = None
+            if options.get('incremental_ck') and previous_tag and sha:
+                # Em paralelo, espera o CK da release anterior terminar
+                if previous_ready:
+                    previous_ready.wait()
+                results['ck'] = run_ck_incremental(
+                    project_dir, source_dir, tag_name, sha, release_dir,
+                    os.path.join(results_base_dir, previous_tag),
+                    options.get('ck_full_every', 0))
+            if results['ck'] is None:
+                results['ck'] = run_ck_analysis(source_dir, release_dir)
+                if results['ck'] and sha:
+                    write_ck_source(os.path.join(release_dir, "ck"), tag_name, sha, source_dir)
+            if results['ck']:
+                update_aggregates(release_dir, 'ck', source_dir)
+            TELEMETRY.end(stage_record, results['ck'])
+            if journal and sha:
+                journal.record(tag_name, 'ck', sha, results['ck'])
+            ck_ready = options.get('ck_ready', {}).get(tag_name)
+            if ck_ready:
+                ck_ready.set()
+
+        def pmd_stage():
+            stage_record = TELEMETRY.begin(tag_name, 'pmd', project)
+            results['pmd'] = None
+            if options.get('pmd_cache'):
+                results['pmd'] = run_pmd_incremental(project_dir, source_dir, tag_name,
+                                                     release_dir, options['pmd_cache'])
+            if results['pmd'] is None:
+                results['pmd'] = run_pmd_analysis(source_dir, release_dir)
+            if results['pmd']:
+                update_aggregates(release_dir, 'pmd', source_dir)
+            TELEMETRY.end(stage_record, results['pmd'])
+            if journal and sha:
+                journal.record(tag_name, 'pmd', sha, results['pmd'])
+
+        # SpotBugs apenas se compilação teve sucesso (habilitado agora!)
+        def spotbugs_stage():
+            if build_success:
+                stage_record = TELEMETRY.begin(tag_name, 'spotbugs', project)
+                results['spotbugs'] = run_spotbugs_analysis(source_dir, release_dir,
+                                                            options.get('spotbugs_jobs', 1))
+                TELEMETRY.end(stage_record, results['spotbugs'])
+                if journal and sha:
+                    journal.record(tag_name, 'spotbugs', sha, results['spotbugs'])
+            else:
+                print(f"    ⚠ Pulando SpotBugs (compilação falhou)")
+
+        # Etapas pendentes e suas dependências, na ordem da execução sequencial
+        stages = []
+        build_deps = ()
+        if 'spotbugs' in pending:
+            stages.append(('build', build_stage, ()))
+            build_deps = ('build',)
+        elif 'spotbugs' not in tools:
+            print(f"  → Compilação pulada (apenas ferramentas de código-fonte)")
+        if 'ck' in pending:
+            stages.append(('ck', ck_stage, build_deps))
+        if 'pmd' in pending:
+            stages.append(('pmd', pmd_stage, ()))
+        if 'spotbugs' in pending:
+            stages.append(('spotbugs', spotbugs_stage, build_deps))
+
+        gates = {'ck': previous_ready} if options.get('incremental_ck') else None
+        memory = {name: stage_memory_mb(name, options.get('spotbugs_jobs', 1)
+                                        if name == 'spotbugs' else 1)
+                  for name, _, _ in stages}
+        run_stages(stages, scheduler, priority, gates, memory)
+
+        # O snapshot só serve a esta release
+        if use_snapshot:
+            shutil.rmtree(source_dir, ignore_errors=True)
 
     # Salvar resumo dos resultados
     summary_file = os.path.join(release_dir, "summary.json")
     with open(summary_file, 'w') as f:
         json.dump(results, f, indent=2)
 
+    # Etapas reaproveitadas do journal (ou de versões anteriores) sem agregados
+    update_aggregates(release_dir, source_dir=source_dir, missing_only=True)
+
+    if options.get('metrics_store'):
+        update_metrics_store(options['metrics_store'], release_dir, source_dir)
+
     return results
 
-def run_refactoring_miner(project_dir, results_base_dir):
+def analyze_releases_parallel(project_dir, releases, results_base_dir, jobs, journal=None,
+                              options=None):
+    """
+    Analisa várias releases simultaneamente, uma por worker.
+
+    Cada worker usa sua própria worktree (checkout, build e ferramentas
+    rodam isolados), mas os resultados seguem o mesmo layout
+    results/<repo>/<tag>/ da execução sequencial. No modo snapshot cada
+    release já tem seu próprio diretório, então não há worktrees.
+
+    Returns:
+        Lista de resultados na mesma ordem de `releases`
+    """
+    options = options or {}
+    workers = min(jobs, len(releases))
+    if options.get('checkout') == 'snapshot':
+        worktrees = []
+    else:
+        worktrees_dir = os.path.join(os.path.dirname(project_dir), ".worktrees",
+                                     os.path.basename(project_dir))
+        worktrees = create_worktrees(project_dir, worktrees_dir, workers)
+
+    # Cada worker pega uma worktree livre e a devolve ao terminar a release
+    free_worktrees = queue.Queue()
+    for worktree_dir in worktrees or [project_dir] * workers:
+        free_worktrees.put(worktree_dir)
+
+    # O CK incremental de uma release depende do CK da anterior; cada release
+    # sinaliza quando o seu terminou (ou quando desistiu dele)
+    options = dict(options, ck_ready={r['tag_name']: threading.Event() for r in releases})
+
+    def worker(index, release):
+        worktree_dir = free_worktrees.get()
+        try:
+            print(f"\n[{index}/{len(releases)}] ({os.path.basename(worktree_dir)})", end=" ")
+            return analyze_release(worktree_dir, release, results_base_dir, journal, options)
+        finally:
+            free_worktrees.put(worktree_dir)
+            options['ck_ready'][release['tag_name']].set()
+            if options.get('dedup'):
+                options['dedup'].finish(release['tag_name'])
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker, i, release)
+                       for i, release in enumerate(releases, 1)]
+            all_results = [future.result() for future in futures]
+    finally:
+        remove_worktrees(project_dir, worktrees)
+
+    return all_results
+
+# Amostragem adaptativa (--sample): variação relativa mínima entre duas releases
+# medidas para que o intervalo entre elas seja subdividido
+SAMPLE_THRESHOLD = 0.05
+
+# Sinais comparados entre releases medidas: (tabela, métrica, estatística) dos
+# agregados; métrica None = número de linhas (classes, problemas do PMD)
+SAMPLE_SIGNALS = (
+    ('ck_class', None, None),
+    ('ck_class', 'loc', 'sum'),
+    ('ck_class', 'wmc', 'mean'),
+    ('ck_class', 'cbo', 'mean'),
+    ('ck_class', 'rfc', 'mean'),
+    ('ck_class', 'lcom', 'mean'),
+    ('pmd', None, None),
+    ('pmd', 'Priority', 'mean'),
+)
+
+def run_pmd_batches(project_dir, releases, results_base_dir, workers, journal, options):
+    """
+    Modo --pmd-batch: antes de analisar as releases, roda o PMD em lotes de
+    options['pmd_batch'] releases (ver run_pmd_batch), até `workers` lotes ao
+    mesmo tempo. Releases com o PMD já concluído no journal ficam de fora.
+
+    Os arquivos ausentes do cache são levantados de uma vez para todas as
+    releases pendentes, e cada blob vai para o lote da primeira release em
+    que aparece: lotes em paralelo nunca analisam o mesmo arquivo. Em um
+    clone parcial, os blobs ausentes são buscados antes, em um só fetch.
+
+    Cada lote entra na telemetria como a etapa 'pmd-batch' (tag
+    '<primeira>..<última>'); os totais vão para options['pmd_batches'], que
+    aparece no relatório resumido, e o log de cada lote fica em
+    pmd-batches/<primeira>..<última>.log.
+    """
+    tag_names = []
+    for release in releases:
+        tag_name = release['tag_name']
+        sha = resolve_commit(project_dir, tag_name) if journal else None
+        if sha and journal.is_done(tag_name, 'pmd', sha) and \
+                os.path.exists(os.path.join(results_base_dir, tag_name, STAGE_OUTPUTS['pmd'])):
+            continue
+        tag_names.append(tag_name)
+    if not tag_names:
+        return
+
+    # Arquivos de todas as releases pendentes: blob -> (release, caminho)
+    # na primeira release em que o blob aparece e ainda não está no cache
+    cache_dir = options['pmd_cache']
+    file_count = {}
+    missing = {}
+    cached = set()
+    for index, tag_name in enumerate(tag_names):
+        blobs = git_java_blobs(project_dir, tag_name) or []
+        file_count[tag_name] = len(blobs)
+        for path, blob in blobs:
+            if blob in missing or blob in cached:
+                continue
+            if os.path.exists(pmd_cache_entry(cache_dir, blob)):
+                cached.add(blob)
+            else:
+                missing[blob] = (index, path)
+    if missing and options.get('partial_clone'):
+        fetch_blobs(project_dir, missing_objects(project_dir, " ".join(tag_names)) & set(missing))
+
+    size = options['pmd_batch']
+    batches = []
+    for start in range(0, len(tag_names), size):
+        batch_missing = {blob: location for blob, location in missing.items()
+                         if start <= location[0] < start + size}
+        batches.append((tag_names[start:start + size], batch_missing))
+
+    log_dir = os.path.join(results_base_dir, "pmd-batches")
+    os.makedirs(log_dir, exist_ok=True)
+    scheduler = options.get('scheduler')
+    project = options.get('project')
+    # Antes das releases do repositório (ver StageScheduler.slot)
+    priority = ((options.get('repository_order', 0), -1), -1)
+
+    def run_batch(batch_tags, batch_missing):
+        label = f"{batch_tags[0]}..{batch_tags[-1]}" if len(batch_tags) > 1 else batch_tags[0]
+        with scheduler.slot(priority, stage_memory_mb('pmd')) if scheduler \
+                else nullcontext():
+            stage_record = TELEMETRY.begin(label, 'pmd-batch', project)
+            batch = run_pmd_batch(project_dir, batch_missing, len(batch_tags), cache_dir,
+                                  os.path.join(log_dir, f"{label.replace('/', '_')}.log"))
+            TELEMETRY.end(stage_record, batch['success'])
+        batch['releases'] = list(batch_tags)
+        batch['files'] = sum(file_count[tag_name] for tag_name in batch_tags)
+        batch['blobs'] = set(batch_missing)
+        print(f"  {'✓' if batch['success'] else '⚠'} PMD em lote {label}: "
+              f"{len(batch_tags)} release(s), {batch['analyzed']} de {batch['files']} "
+              f"arquivo(s) analisados em {batch['seconds']:.1f}s "
+              f"({batch['seconds'] / len(batch_tags):.2f}s por release)")
+        return batch
+
+    print(f"\nPMD em lote: {len(tag_names)} release(s) em {len(batches)} execução(ões) "
+          f"de até {size}, {len(missing)} arquivo(s) distinto(s) a analisar "
+          f"({len(cached)} já no cache)")
+    if workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda batch: run_batch(*batch), batches))
+    else:
+        results = [run_batch(*batch) for batch in batches]
+
+    # Blobs analisados por mais de um lote (esperado: zero)
+    analyzed = sum(batch['analyzed'] for batch in results)
+    reanalyzed = analyzed - len(set().union(*(batch.pop('blobs') for batch in results)))
+    print(f"  PMD em lote: {analyzed} arquivo(s) analisado(s), {reanalyzed} reanalisado(s) "
+          f"entre lotes")
+    totals = options.setdefault('pmd_batches', {'batches': [], 'cached': 0, 'reanalyzed': 0})
+    totals['batches'].extend(results)
+    totals['cached'] += len(cached)
+    totals['reanalyzed'] += reanalyzed
+
+def analyze_release_list(project_dir, releases, results_base_dir, workers, journal=None,
+                         options=None, label=""):
+    """
+    Analisa uma lista de releases, em paralelo com mais de um worker.
+
+    Com options['pmd_batch'], o PMD das releases roda antes, em lotes (ver
+    run_pmd_batches), e a etapa de cada release só monta o relatório a partir
+    do cache.
+    """
+    if options and options.get('pmd_batch') and options.get('pmd_cache') and \
+            'pmd' in options.get('tools', ANALYSIS_TOOLS):
+        run_pmd_batches(project_dir, releases, results_base_dir, workers, journal, options)
+    if workers > 1 and len(releases) > 1:
+        print(f"Analisando {label}releases em paralelo ({workers} workers)\n")
+        return analyze_releases_parallel(project_dir, releases, results_base_dir,
+                                         workers, journal, options)
+    all_results = []
+    for i, release in enumerate(releases, 1):
+        print(f"\n[{i}/{len(releases)}]", end=" ")
+        try:
+            all_results.append(analyze_release(project_dir, release, results_base_dir,
+                                               journal, options))
+        finally:
+            if options and options.get('dedup'):
+                options['dedup'].finish(release['tag_name'])
+    return all_results
+
+def release_signals(release_dir):
+    """
+    Valores usados pela amostragem adaptativa para comparar releases, lidos
+    dos agregados da release (ver metric_sketches). Sinais cuja tabela não
+    tem agregado ficam de fora.
+    """
+    import metric_sketches
+
+    signals = {}
+    for table, metric, stat in SAMPLE_SIGNALS:
+        loaded = metric_sketches.load_release(release_dir, table)
+        if loaded is None:
+            continue
+        summary = loaded[1]
+        if metric is None:
+            signals[f"{table}.rows"] = summary.rows
+        elif metric in summary.metrics:
+            values = summary.metrics[metric]
+            signals[f"{table}.{metric}.{stat}"] = values.total if stat == 'sum' else values.mean()
+    return signals
+
+def interval_change(signals_a, signals_b):
+    """
+    Maior variação relativa entre os sinais de duas releases (0.1 = 10%), ou
+    None se elas não têm sinais em comum.
+    """
+    changes = [abs(signals_b[key] - signals_a[key]) /
+               max(abs(signals_a[key]), abs(signals_b[key]), 1e-9)
+               for key in signals_a.keys() & signals_b.keys()
+               if signals_a[key] is not None and signals_b[key] is not None]
+    return max(changes) if changes else None
+
+def evenly_spaced(count, total):
+    """`count` posições igualmente espaçadas em range(total), com a primeira e a última."""
+    if count >= total:
+        return list(range(total))
+    if count <= 1:
+        return [total - 1]
+    return sorted({round(i * (total - 1) / (count - 1)) for i in range(count)})
+
+def analyze_sampled_releases(project_dir, releases, results_base_dir, workers, journal,
+                             options, budget, anchors, threshold):
+    """
+    Amostragem adaptativa: analisa `anchors` releases igualmente espaçadas e
+    depois, em rodadas, a release do meio dos intervalos entre releases
+    medidas cujos agregados (CK/PMD) mais mudaram, até gastar o orçamento de
+    `budget` releases ou até nenhum intervalo variar mais que `threshold`.
+    Intervalos sem agregados (ex: --tools spotbugs) são divididos pelo
+    tamanho. Cada rodada analisa até `workers` releases em paralelo.
+
+    As releases não medidas ficam registradas como interpoladas entre as
+    medidas vizinhas (sampling.json), com a estimativa linear dos sinais.
+
+    Returns:
+        (resultados das releases medidas em ordem cronológica, dados da amostragem)
+    """
+    budget = min(budget, len(releases))
+    pending = evenly_spaced(min(max(2, anchors), budget), len(releases))
+    measured = {}
+    signals = {}
+    choices = {index: {'round': 0, 'reason': 'anchor'} for index in pending}
+    round_number = 0
+
+    while pending:
+        print(f"\n{'-'*60}")
+        print(f"Amostragem: rodada {round_number} ({len(pending)} release(s), "
+              f"{len(measured) + len(pending)}/{budget} do orçamento)")
+        print(f"{'-'*60}")
+
+        # Base do CK incremental: a release medida (ou da rodada) mais próxima antes
+        batch_tags = sorted(pending)
+        known = sorted(set(measured) | set(batch_tags))
+        for index in batch_tags:
+            earlier = [i for i in known if i < index]
+            if earlier:
+                options['previous_tag'][releases[index]['tag_name']] = \
+                    releases[earlier[-1]]['tag_name']
+
+        results = analyze_release_list(project_dir, [releases[i] for i in batch_tags],
+                                       results_base_dir, workers, journal, options,
+                                       label=f"{len(batch_tags)} ")
+        for index, result in zip(batch_tags, results):
+            measured[index] = result
+            signals[index] = release_signals(os.path.join(results_base_dir,
+                                                          releases[index]['tag_name']))
+
+        remaining = budget - len(measured)
+        if remaining <= 0:
+            break
+
+        # Intervalos que ainda têm releases no meio, dos que mais mudaram
+        candidates = []
+        points = sorted(measured)
+        for a, b in zip(points, points[1:]):
+            if b - a < 2:
+                continue
+            change = interval_change(signals[a], signals[b])
+            if change is not None and change < threshold:
+                continue
+            candidates.append((-1 if change is None else change, b - a, a, b))
+        candidates.sort(reverse=True)
+
+        round_number += 1
+        pending = []
+        for change, _, a, b in candidates[:min(remaining, workers)]:
+            index = (a + b) // 2
+            pending.append(index)
+            choices[index] = {'round': round_number, 'reason': 'subdivision',
+                              'interval': [releases[a]['tag_name'], releases[b]['tag_name']],
+                              'change': None if change < 0 else round(change, 4)}
+
+    points = sorted(measured)
+    sampling = {
+        'releases': len(releases),
+        'budget': budget,
+        'anchors': sum(1 for c in choices.values() if c['reason'] == 'anchor'),
+        'threshold': threshold,
+        'rounds': 1 + max(choice['round'] for choice in choices.values()),
+        'measured': [dict(tag_name=releases[i]['tag_name'], index=i, **choices[i])
+                     for i in points],
+        'interpolated': [],
+    }
+    for a, b in zip(points, points[1:]):
+        for index in range(a + 1, b):
+            weight = (index - a) / (b - a)
+            sampling['interpolated'].append({
+                'tag_name': releases[index]['tag_name'],
+                'index': index,
+                'between': [releases[a]['tag_name'], releases[b]['tag_name']],
+                'weight': round(weight, 4),
+                'estimates': {key: signals[a][key] + (signals[b][key] - signals[a][key]) * weight
+                              for key in signals[a].keys() & signals[b].keys()},
+            })
+
+    with open(os.path.join(results_base_dir, "sampling.json"), 'w') as f:
+        json.dump(sampling, f, indent=2)
+    print(f"\n✓ Amostragem: {len(points)} release(s) medida(s), "
+          f"{len(sampling['interpolated'])} interpolada(s) em {sampling['rounds']} rodada(s)")
+    return [measured[i] for i in points], sampling
+
+def run_refactoring_miner(project_dir, results_base_dir, journal=None):
     """Executa RefactoringMiner em todo o repositório."""
+    import refactorings_stream
+
     print(f"\n{'='*60}")
     print(f"Executando RefactoringMiner em todo o repositório...")
     print(f"{'='*60}\n")
@@ -274,6 +2911,9 @@ def run_refactoring_miner(project_dir, results_base_dir):
                 if "HEAD branch:" in line:
                     default_branch = line.split(":", 1)[1].strip()
                     break
+        # Com '-n' o git pode responder "(not queried)" em vez do nome
+        if default_branch and default_branch.startswith("("):
+            default_branch = None
         # Fallback para branches comuns
         if not default_branch:
             for candidate in ["main", "master", "develop"]:
@@ -286,6 +2926,22 @@ def run_refactoring_miner(project_dir, results_base_dir):
     except Exception:
         default_branch = "master"
 
+    # Com journal, a mineração é refeita apenas se o branch avançou
+    history_sha = None
+    if journal:
+        history_sha = resolve_commit(project_dir, default_branch) or \
+            resolve_commit(project_dir, f"origin/{default_branch}")
+    if history_sha and os.path.exists(output_file) and \
+            journal.is_done(REPOSITORY_JOURNAL_TAG, 'refactoring-miner', history_sha):
+        print(f"✓ RefactoringMiner já executado para {default_branch} @ {history_sha[:8]} (journal)")
+        print(f"  Saída: {output_file}\n")
+        return True
+
+    # Clone parcial: o JGit não busca blobs ausentes, então os .java do
+    # histórico precisam estar no clone antes da mineração
+    if is_partial_clone(project_dir):
+        fetch_java_history(project_dir, ["--all"])
+
     # Preparar candidatos de branch e estratégia de fallback
     candidates = []
     # 1) Branch padrão detectado
@@ -303,16 +2959,15 @@ def run_refactoring_miner(project_dir, results_base_dir):
         except OSError:
             pass
 
-    stdout_all = []
-    stderr_all = []
+    # Saída de cada tentativa vai direto para o log (ver run_logged)
+    open(log_file, 'w').close()
     success = False
-    commits_found = 0
     returncode = 1
 
     for mode, value in candidates:
         if mode == "branch":
             cmd_args = [
-                "/tools/refactoring-miner/refactoring-miner.sh",
+                REFACTORING_MINER_BIN,
                 "-a",
                 project_dir,
                 value,
@@ -321,36 +2976,28 @@ def run_refactoring_miner(project_dir, results_base_dir):
             ]
         else:  # "all": não especifica branch
             cmd_args = [
-                "/tools/refactoring-miner/refactoring-miner.sh",
+                REFACTORING_MINER_BIN,
                 "-a",
                 project_dir,
                 "-json",
                 output_file,
             ]
 
-        try:
-            result = subprocess.run(cmd_args, capture_output=True, text=True)
-            returncode = result.returncode
-            stdout = result.stdout or ""
-            stderr = result.stderr or ""
-        except Exception as e:
-            returncode = 1
-            stdout = ""
-            stderr = f"Erro ao executar RefactoringMiner ({mode}): {e}"
-
-        stdout_all.append(stdout)
-        stderr_all.append(stderr)
+        returncode, _ = run_logged(cmd_args, log_file, append=True,
+                                   timeout=TOOL_TIMEOUTS['refactoring-miner'])
+        if returncode == TIMEOUT_RETURNCODE:
+            # As demais estratégias mineram o mesmo histórico (ou mais)
+            break
 
-        # Verificar se JSON foi criado e contém commits
+        # Verificar se JSON foi criado e contém commits (basta ler o primeiro;
+        # o arquivo chega a vários GB)
         if os.path.exists(output_file) and os.path.getsize(output_file) > 2:
             try:
-                with open(output_file, "r") as jf:
-                    data = json.load(jf)
-                    commits_found = len(data.get("commits", []))
-            except Exception:
-                commits_found = 0
+                has_commits = next(refactorings_stream.iter_commits(output_file), None) is not None
+            except (OSError, ValueError):
+                has_commits = False
 
-            if commits_found > 0:
+            if has_commits:
                 success = True
                 break
             else:
@@ -360,31 +3007,240 @@ def run_refactoring_miner(project_dir, results_base_dir):
                 except OSError:
                     pass
 
-    # Unificar stdout/stderr para log
-    stdout = "\n\n".join([s for s in stdout_all if s])
-    stderr = "\n\n".join([s for s in stderr_all if s])
-
-    # Salvar log sempre
-    try:
-        with open(log_file, 'w') as lf:
-            if stdout:
-                lf.write(stdout)
-            if stderr:
-                lf.write("\n" + stderr)
-    except Exception as e:
-        print(f"⚠ Não foi possível salvar log do RefactoringMiner: {e}")
+    if history_sha:
+        journal.record(REPOSITORY_JOURNAL_TAG, 'refactoring-miner', history_sha, success)
 
     if success:
         print(f"✓ RefactoringMiner completado: {output_file}")
-        print(f"  Commits analisados: {commits_found}")
+        print(f"  Tamanho: {os.path.getsize(output_file) / 1024 / 1024:.1f} MB")
     else:
         print(f"⚠ RefactoringMiner falhou ou não gerou saída")
 
     print(f"  Log: {log_file}\n")
     return success
 
-def generate_summary_report(results_base_dir, all_results):
-    """Gera relatório resumido de todas as análises."""
+def release_ranges(project_dir, releases):
+    """
+    Intervalos de commits entre releases consecutivas, para o RefactoringMiner.
+
+    O primeiro intervalo vai do commit raiz até a primeira tag; os demais,
+    de cada tag até a seguinte (na ordem das releases analisadas).
+
+    Returns:
+        Lista de (rótulo inicial, tag final, SHA inicial, SHA final)
+    """
+    shas = [(release['tag_name'], resolve_commit(project_dir, release['tag_name']))
+            for release in releases]
+    shas = [(tag, sha) for tag, sha in shas if sha]
+    if not shas:
+        return []
+
+    ranges = []
+    # O commit raiz não tem pai e o RefactoringMiner não o compara com nada,
+    # então usá-lo como início exclusivo não perde refatorações
+    returncode, stdout, _ = run_command(f"git rev-list --max-parents=0 {shas[0][1]}",
+                                        cwd=project_dir, capture_output=True)
+    roots = stdout.split() if returncode == 0 else []
+    if roots and roots[-1] != shas[0][1]:
+        ranges.append(('root', shas[0][0], roots[-1], shas[0][1]))
+
+    for (start_tag, start_sha), (end_tag, end_sha) in zip(shas, shas[1:]):
+        if start_sha != end_sha:
+            ranges.append((start_tag, end_tag, start_sha, end_sha))
+    return ranges
+
+def run_refactoring_miner_ranges(project_dir, releases, results_base_dir, jobs=1,
+                                 journal=None, scheduler=None, priority=(0, 0)):
+    """
+    Executa o RefactoringMiner apenas entre as tags das releases analisadas.
+
+    Cada intervalo (ver release_ranges) é minerado com `-bc` em uma JVM
+    própria, até `jobs` ao mesmo tempo; o RefactoringMiner lê os objetos do
+    git sem checkout, então os workers compartilham o clone. O JSON de cada
+    intervalo é publicado em refactorings/ assim que termina (e registrado no
+    journal), de modo que uma falha ou interrupção perde apenas os intervalos
+    em andamento. Ao final, os intervalos são juntados em
+    refactorings-all.json, no mesmo formato da mineração completa (-a).
+
+    Com um scheduler, cada JVM também ocupa uma vaga dele (com a prioridade
+    `priority` = (repositório, release), ver StageScheduler.slot), respeitando
+    o limite global de etapas e de memória.
+    """
+    import refactorings_stream
+
+    print(f"\n{'='*60}")
+    print(f"Executando RefactoringMiner entre as tags das releases...")
+    print(f"{'='*60}\n")
+
+    output_file = os.path.join(results_base_dir, "refactorings-all.json")
+    log_file = os.path.join(results_base_dir, "refactoring-miner.log")
+    ranges_dir = os.path.join(results_base_dir, "refactorings")
+    os.makedirs(ranges_dir, exist_ok=True)
+
+    ranges = release_ranges(project_dir, releases)
+    if not ranges:
+        print(f"⚠ Nenhum intervalo entre tags para minerar")
+        return False
+
+    # Clone parcial: só os .java alterados dentro dos intervalos minerados
+    if is_partial_clone(project_dir):
+        fetch_java_history(project_dir, [f"{start_sha}..{end_sha}"
+                                         for _, _, start_sha, end_sha in ranges])
+
+    def range_file(start_tag, end_tag):
+        return os.path.join(ranges_dir, f"{start_tag}..{end_tag}.json".replace('/', '_'))
+
+    def mine_range(mining_range):
+        start_tag, end_tag, start_sha, end_sha = mining_range
+        label = f"{start_tag}..{end_tag}"
+        output = range_file(start_tag, end_tag)
+        journal_key = f"{start_sha}..{end_sha}"
+        if journal and os.path.exists(output) and \
+                journal.is_done(label, 'refactoring-miner', journal_key):
+            return label, True, (f"=== {label} (journal) ===", None)
+
+        partial = f"{output}.partial"
+        cmd_args = [REFACTORING_MINER_BIN, "-bc", project_dir,
+                    start_sha, end_sha, "-json", partial]
+        with scheduler.slot((priority, -1), stage_memory_mb('refactoring-miner')) if scheduler \
+                else nullcontext():
+            stage_record = TELEMETRY.begin(label, 'refactoring-miner',
+                                           os.path.basename(results_base_dir))
+            returncode, _ = run_logged(cmd_args, f"{output}.log",
+                                       timeout=TOOL_TIMEOUTS['refactoring-miner'])
+
+        # JSON completo, lido um commit por vez (um intervalo vazio é válido)
+        success = False
+        try:
+            for _ in refactorings_stream.iter_commits(partial, strict=True):
+                pass
+            success = True
+        except (OSError, ValueError):
+            pass
+        if success:
+            os.replace(partial, output)
+        elif os.path.exists(partial):
+            os.remove(partial)
+
+        TELEMETRY.end(stage_record, success)
+        if journal:
+            journal.record(label, 'refactoring-miner', journal_key, success)
+        print(f"  {'✓' if success else '✗'} {label}")
+        return label, success, (f"=== {label} (exit {returncode}) ===", f"{output}.log")
+
+    workers = max(1, min(jobs, len(ranges)))
+    print(f"{len(ranges)} intervalo(s), {workers} em paralelo\n")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(mine_range, ranges))
+
+    # Log único, na ordem dos intervalos (os logs parciais são removidos)
+    try:
+        with open(log_file, 'wb') as lf:
+            for _, _, (header, range_log) in outcomes:
+                lf.write(f"{header}\n".encode())
+                if range_log and os.path.exists(range_log):
+                    with open(range_log, 'rb') as rf:
+                        shutil.copyfileobj(rf, lf)
+                    os.remove(range_log)
+                lf.write(b"\n")
+    except Exception as e:
+        print(f"⚠ Não foi possível salvar log do RefactoringMiner: {e}")
+
+    # Junta os intervalos em ordem, um commit por vez (um commit alcançável
+    # por duas tags, em branches diferentes, entra uma vez só)
+    seen = set()
+    commits_found = 0
+    tmp_output = f"{output_file}.tmp"
+    with open(tmp_output, 'w') as out:
+        out.write('{"commits": [')
+        for (start_tag, end_tag, _, _), (_, success, _) in zip(ranges, outcomes):
+            if not success:
+                continue
+            for commit in refactorings_stream.iter_commits(range_file(start_tag, end_tag)):
+                if commit.get('sha1') in seen:
+                    continue
+                seen.add(commit.get('sha1'))
+                out.write(",\n" if commits_found else "\n")
+                out.write(json.dumps(commit))
+                commits_found += 1
+        out.write("\n]}\n")
+    os.replace(tmp_output, output_file)
+
+    failed = [label for label, success, _ in outcomes if not success]
+    if failed:
+        print(f"⚠ RefactoringMiner falhou em {len(failed)} intervalo(s): {', '.join(failed)}")
+        print(f"  (serão refeitos na próxima execução)")
+    print(f"✓ RefactoringMiner: {output_file}")
+    print(f"  Commits analisados: {commits_found}")
+    print(f"  Log: {log_file}\n")
+    return not failed
+
+def export_refactorings_table(results_base_dir):
+    """
+    Exporta refactorings-all.json para tabelas Parquet (commits, refatorações
+    e localizações), lidas pelo notebook sem carregar o JSON inteiro.
+    """
+    json_file = os.path.join(results_base_dir, "refactorings-all.json")
+    if not os.path.exists(json_file):
+        return False
+
+    try:
+        import refactorings_stream
+    except ImportError:
+        print(f"ℹ refactorings_stream não encontrado; tabelas Parquet não geradas\n")
+        return False
+
+    output_dir = os.path.join(results_base_dir, refactorings_stream.PARQUET_DIR)
+    try:
+        counts = refactorings_stream.export_parquet(json_file, output_dir)
+    except ImportError:
+        print(f"ℹ pyarrow não instalado; tabelas Parquet não geradas\n")
+        return False
+    except ValueError as e:
+        print(f"⚠ Não foi possível ler {json_file}: {e}\n")
+        return False
+
+    print(f"✓ Refatorações exportadas para {output_dir} "
+          f"({counts['refactorings']} refatorações, {counts['locations']} localizações)\n")
+    return True
+
+def update_class_index(results_base_dir):
+    """
+    Atualiza o índice de classes entre releases (class-index.sqlite): histórico
+    de métricas por classe, seguindo renomeações, e diferenças entre releases.
+    """
+    import class_index
+
+    try:
+        built = class_index.build_index(results_base_dir)
+    except Exception as e:
+        print(f"⚠ Erro ao atualizar o índice de classes: {e}\n")
+        return False
+
+    if built:
+        print(f"✓ Índice de classes atualizado: {built['classes']} classes em "
+              f"{built['releases']} releases ({built['renames']} renomeações)\n")
+    return True
+
+def status_mark(result):
+    """Marca de status para o relatório ('-' para ferramenta não executada)."""
+    if result is None:
+        return '-'
+    return '✓' if result else '✗'
+
+# Quantidade de etapas/releases listadas no ranking de tempo do relatório
+SLOWEST_COUNT = 10
+
+def generate_summary_report(results_base_dir, all_results, stage_records=None, sampling=None,
+                            pmd_batches=None):
+    """
+    Gera relatório resumido de todas as análises.
+
+    Com stage_records (ver Telemetry), inclui o tempo por etapa e as etapas
+    e releases mais lentas; com sampling (amostragem adaptativa), as releases
+    medidas e as interpoladas; com pmd_batches (--pmd-batch), o tempo de cada
+    execução do PMD em lote.
+    """
     report_file = os.path.join(results_base_dir, "analysis-summary.txt")
 
     with open(report_file, 'w') as f:
@@ -397,9 +3253,14 @@ def generate_summary_report(results_base_dir, all_results):
         f.write("-"*70 + "\n")
         for result in all_results:
             f.write(f"\n{result['tag_name']} ({result['date']}):\n")
-            f.write(f"  CK Metrics:  {'✓' if result['ck'] else '✗'}\n")
-            f.write(f"  PMD:         {'✓' if result['pmd'] else '✗'}\n")
-            f.write(f"  SpotBugs:    {'✓' if result['spotbugs'] else '✗'}\n")
+            f.write(f"  CK Metrics:  {status_mark(result['ck'])}\n")
+            f.write(f"  PMD:         {status_mark(result['pmd'])}\n")
+            f.write(f"  SpotBugs:    {status_mark(result['spotbugs'])}\n")
+            if result.get('dedup'):
+                f.write(f"  Reaproveitado de {result['dedup']['source']} (mesmas entradas): "
+                        f"{', '.join(result['dedup']['tools'])}\n")
+            if 'checkout_seconds' in result:
+                f.write(f"  Checkout:    {result['checkout_seconds']:.2f}s\n")
 
         # Estatísticas
         ck_success = sum(1 for r in all_results if r['ck'])
@@ -413,32 +3274,117 @@ def generate_summary_report(results_base_dir, all_results):
         f.write(f"PMD bem-sucedidos:         {pmd_success}/{len(all_results)}\n")
         f.write(f"SpotBugs bem-sucedidos:    {spotbugs_success}/{len(all_results)}\n")
 
-    print(f"\n✓ Relatório resumido salvo em: {report_file}\n")
+        deduplicated = [r['dedup'] for r in all_results if r.get('dedup')]
+        if deduplicated:
+            f.write(f"Releases deduplicadas:     {len(deduplicated)} "
+                    f"({sum(len(d['tools']) for d in deduplicated)} execuções de ferramentas "
+                    f"evitadas, {sum(d['bytes'] for d in deduplicated) / 1024 / 1024:.1f} MB "
+                    f"em hardlinks)\n")
+
+        checkout_times = [r['checkout_seconds'] for r in all_results if 'checkout_seconds' in r]
+        if checkout_times:
+            f.write(f"Tempo total de checkout:   {sum(checkout_times):.1f}s "
+                    f"(média {sum(checkout_times) / len(checkout_times):.2f}s por release)\n")
+
+        if stage_records:
+            totals = {}
+            for record in stage_records:
+                total = totals.setdefault(record['stage'], [0, 0.0, 0.0, 0])
+                total[0] += 1
+                total[1] += record['wall_seconds']
+                total[2] += record['cpu_user_seconds'] + record['cpu_sys_seconds']
+                total[3] = max(total[3], record['max_rss_kb'])
+
+            f.write("\n" + "="*70 + "\n")
+            f.write("TEMPO POR ETAPA (telemetry.json / trace.json):\n")
+            f.write("-"*70 + "\n")
+            f.write(f"{'Etapa':20s} {'Execuções':>9s} {'Parede':>10s} {'CPU':>10s} {'Pico RSS':>10s}\n")
+            for stage, (count, wall, cpu, rss) in sorted(totals.items(), key=lambda t: -t[1][1]):
+                f.write(f"{stage:20s} {count:9d} {wall:9.1f}s {cpu:9.1f}s {rss / 1024:7.0f} MB\n")
+
+            f.write(f"\nEtapas mais lentas:\n")
+            slowest = sorted(stage_records, key=lambda r: -r['wall_seconds'])[:SLOWEST_COUNT]
+            for record in slowest:
+                tag = 'repositório' if record['tag'] == REPOSITORY_JOURNAL_TAG else record['tag']
+                f.write(f"  {record['wall_seconds']:9.1f}s  {record['stage']:18s} {tag} "
+                        f"{status_mark(record['success'])}\n")
+
+            release_times = {}
+            release_tags = {result['tag_name'] for result in all_results}
+            for record in stage_records:
+                if record['tag'] in release_tags:
+                    release_times[record['tag']] = release_times.get(record['tag'], 0.0) + \
+                        record['wall_seconds']
+            if release_times:
+                f.write(f"\nReleases mais lentas (soma das etapas):\n")
+                for tag, wall in sorted(release_times.items(), key=lambda t: -t[1])[:SLOWEST_COUNT]:
+                    f.write(f"  {wall:9.1f}s  {tag}\n")
+
+        if sampling:
+            f.write("\n" + "="*70 + "\n")
+            f.write("AMOSTRAGEM ADAPTATIVA (sampling.json):\n")
+            f.write("-"*70 + "\n")
+            f.write(f"Releases: {sampling['releases']}  medidas: {len(sampling['measured'])}  "
+                    f"interpoladas: {len(sampling['interpolated'])}\n")
+            f.write(f"Âncoras: {sampling['anchors']}  rodadas: {sampling['rounds']}  "
+                    f"limiar de variação: {sampling['threshold']:.0%}\n")
+            f.write(f"\nMedidas:\n")
+            for choice in sampling['measured']:
+                if choice['reason'] == 'anchor':
+                    detail = "âncora"
+                else:
+                    change = choice['change']
+                    detail = (f"rodada {choice['round']}, entre {choice['interval'][0]} e "
+                              f"{choice['interval'][1]}" +
+                              (f" (variação {change:.1%})" if change is not None else ""))
+                f.write(f"  {choice['tag_name']:30s} {detail}\n")
+            if sampling['interpolated']:
+                f.write(f"\nInterpoladas:\n")
+                for estimate in sampling['interpolated']:
+                    f.write(f"  {estimate['tag_name']:30s} entre {estimate['between'][0]} e "
+                            f"{estimate['between'][1]}\n")
+
+        if pmd_batches:
+            batches = pmd_batches['batches']
+            total_seconds = sum(batch['seconds'] for batch in batches)
+            total_releases = sum(len(batch['releases']) for batch in batches)
+            f.write("\n" + "="*70 + "\n")
+            f.write("PMD EM LOTE (--pmd-batch):\n")
+            f.write("-"*70 + "\n")
+            f.write(f"Execuções: {len(batches)}  releases: {total_releases}  "
+                    f"tempo: {total_seconds:.1f}s "
+                    f"({total_seconds / max(total_releases, 1):.2f}s por release)\n")
+            f.write(f"Arquivos analisados: {sum(batch['analyzed'] for batch in batches)}  "
+                    f"já no cache: {pmd_batches['cached']}  "
+                    f"reanalisados entre lotes: {pmd_batches['reanalyzed']}\n\n")
+            for batch in batches:
+                label = f"{batch['releases'][0]}..{batch['releases'][-1]}"
+                f.write(f"  {batch['seconds']:9.1f}s  {label:40s} {len(batch['releases']):3d} "
+                        f"release(s), {batch['analyzed']}/{batch['files']} arquivo(s) "
+                        f"{status_mark(batch['success'])}\n")
 
-def main():
-    if len(sys.argv) < 2:
-        print("Uso: analyze_all_releases.py <owner/repo> [--limit N]")
-        print("\nExemplo:")
-        print("  analyze_all_releases.py jhy/jsoup")
-        print("  analyze_all_releases.py jhy/jsoup --limit 5")
-        sys.exit(1)
-
-    repo_path = sys.argv[1]
-    limit = None
+    print(f"\n✓ Relatório resumido salvo em: {report_file}\n")
 
-    if '--limit' in sys.argv:
-        limit_idx = sys.argv.index('--limit')
-        if limit_idx + 1 < len(sys.argv):
-            limit = int(sys.argv[limit_idx + 1])
+def analyze_repository(repo_path, settings, scheduler=None, priority=0, repo_url=None):
+    """
+    Analisa todas as releases de um repositório (owner/repo): busca as
+    releases, clona/atualiza o repositório, roda as ferramentas em cada
+    release e o RefactoringMiner, e grava telemetria e relatório resumido em
+    results/<repo>/.
 
-    if '/' not in repo_path:
-        print("Erro: Formato deve ser 'owner/repo'")
-        sys.exit(1)
+    settings são as opções da linha de comando (ver main). Com um scheduler
+    compartilhado (modo --batch), as etapas disputam as mesmas vagas que as
+    dos outros repositórios; `priority` ordena os repositórios entre si.
 
+    Returns:
+        Lista de resultados das releases
+    """
     owner, repo = repo_path.split('/', 1)
+    jobs = settings['jobs']
+    checkout_mode = settings['checkout']
 
     # Configurar diretórios organizados (estrutura: /workspace/projects, /workspace/results)
-    workspace = "/workspace"
+    workspace = WORKSPACE_DIR
     project_name = repo
     project_dir = os.path.join(workspace, "projects", project_name)
     results_base_dir = os.path.join(workspace, "results", project_name)
@@ -447,29 +3393,146 @@ def main():
     os.makedirs(os.path.join(workspace, "projects"), exist_ok=True)
     os.makedirs(results_base_dir, exist_ok=True)
 
-    # Buscar releases
-    releases = fetch_releases(owner, repo)
+    options = {'checkout': checkout_mode, 'tools': settings['tools'], 'project': project_name,
+               'repository_order': priority}
+    if scheduler:
+        options['scheduler'] = scheduler
+    # CK incremental: apenas arquivos alterados desde a release anterior, com
+    # uma execução completa a cada N releases para não acumular desvios
+    if settings['incremental_ck']:
+        options['incremental_ck'] = True
+        options['ck_full_every'] = settings['ck_full_every']
+
+    # Cache de JARs por hash das entradas do build (fontes + arquivos de build)
+    if settings['build_cache']:
+        options['build_cache'] = os.path.join(workspace, "cache", "builds", project_name)
+        os.makedirs(options['build_cache'], exist_ok=True)
+
+    # Releases com as mesmas entradas (hash das fontes e arquivos de build)
+    # reaproveitam os resultados da primeira analisada
+    if settings['dedup']:
+        options['dedup'] = AnalysisDedup(results_base_dir)
+
+    # JVMs do SpotBugs por release (uma por JAR de módulo)
+    options['spotbugs_jobs'] = settings['spotbugs_jobs']
+
+    # Cache de violações do PMD por conteúdo de arquivo (versão + ruleset na chave)
+    if settings['pmd_cache']:
+        options['pmd_cache'] = os.path.join(workspace, "cache", "pmd", project_name,
+                                            pmd_cache_key())
+        os.makedirs(options['pmd_cache'], exist_ok=True)
+        # PMD de N releases por execução (uma partida de JVM por lote)
+        options['pmd_batch'] = settings['pmd_batch']
+    elif settings['pmd_batch']:
+        print("ℹ --pmd-batch requer o cache do PMD; ignorado com --no-pmd-cache\n")
+    # Dataset colunar com as métricas de todas as releases (requer pyarrow)
+    if settings['metrics_store']:
+        try:
+            import metrics_store
+            import pyarrow  # noqa: F401
+            options['metrics_store'] = os.path.join(results_base_dir, metrics_store.STORE_DIR)
+        except ImportError:
+            print("ℹ pyarrow não instalado; metrics-store desabilitado\n")
+
+    if checkout_mode == 'snapshot':
+        options['snapshot_root'] = os.path.join(
+            settings['snapshot_root'] or os.path.join(workspace, "projects", ".snapshots"),
+            project_name)
+        os.makedirs(options['snapshot_root'], exist_ok=True)
+
+    # Journal de etapas concluídas (permite retomar execuções interrompidas)
+    journal_file = os.path.join(results_base_dir, "run-journal.jsonl")
+    if settings['fresh'] and os.path.exists(journal_file):
+        print("Descartando journal anterior (--fresh)\n")
+        os.remove(journal_file)
+    journal = RunJournal(journal_file)
+
+    # Modo offline: releases das tags do clone existente, sem API nem fetch
+    offline = settings['offline']
+    if offline and not os.path.isdir(os.path.join(project_dir, ".git")):
+        print(f"Erro: --offline requer o clone em {project_dir}")
+        sys.exit(1)
 
-    if limit:
-        print(f"Limitando análise às primeiras {limit} releases\n")
-        releases = releases[:limit]
+    # Buscar releases
+    releases = fetch_releases(owner, repo, os.path.join(workspace, "cache", "github"),
+                              project_dir if offline else None)
+
+    if settings['limit']:
+        print(f"Limitando análise às primeiras {settings['limit']} releases\n")
+        releases = releases[:settings['limit']]
+    sampling = None
+    if settings['sample'] and settings['sample'] < len(releases):
+        print(f"Amostragem adaptativa: até {settings['sample']} de {len(releases)} releases\n")
+
+    # Posição de cada release: as mais antigas têm prioridade no scheduler
+    options['release_order'] = {r['tag_name']: i for i, r in enumerate(releases)}
+
+    # Release anterior (na ordem analisada) de cada tag, base do modo incremental
+    options['previous_tag'] = {
+        current['tag_name']: previous['tag_name']
+        for previous, current in zip(releases, releases[1:])
+    }
 
     # Clonar/atualizar repositório
-    repo_url = f"https://github.com/{owner}/{repo}.git"
-    clone_or_update_repo(repo_url, project_dir)
-
-    # Analisar cada release
-    all_results = []
-    for i, release in enumerate(releases, 1):
-        print(f"\n[{i}/{len(releases)}]", end=" ")
-        result = analyze_release(project_dir, release, results_base_dir)
-        all_results.append(result)
-
-    # RefactoringMiner em todo o repositório
-    run_refactoring_miner(project_dir, results_base_dir)
-
-    # Gerar relatório resumido
-    generate_summary_report(results_base_dir, all_results)
+    repo_url = repo_url or f"https://github.com/{owner}/{repo}.git"
+    if offline:
+        run_command(f"git config --global --add safe.directory {project_dir}")
+    else:
+        with scheduler.slot(((priority, -1), -1), GIT_MEMORY_MB) if scheduler else nullcontext():
+            clone_or_update_repo(repo_url, project_dir, settings['clone'], settings['sparse'])
+    options['sparse'] = settings['sparse']
+    options['partial_clone'] = is_partial_clone(project_dir)
+
+    # Analisar cada release. Com o scheduler e snapshots (um diretório por
+    # release), uma release a mais fica em andamento: o checkout da próxima
+    # aproveita as vagas livres enquanto as ferramentas da atual rodam
+    release_workers = jobs
+    if scheduler and checkout_mode == 'snapshot':
+        release_workers = jobs + 1
+    if settings['sample'] and settings['sample'] < len(releases):
+        all_results, sampling = analyze_sampled_releases(
+            project_dir, releases, results_base_dir, release_workers, journal, options,
+            settings['sample'], settings['sample_anchors'] or math.ceil(settings['sample'] / 4),
+            settings['sample_threshold'])
+        measured_tags = {result['tag_name'] for result in all_results}
+        analyzed_releases = [r for r in releases if r['tag_name'] in measured_tags]
+    else:
+        all_results = analyze_release_list(project_dir, releases, results_base_dir,
+                                           release_workers, journal, options)
+        analyzed_releases = releases
+
+    # RefactoringMiner em todo o repositório (ou só entre as tags analisadas)
+    if settings['refminer_ranges']:
+        run_refactoring_miner_ranges(project_dir, analyzed_releases, results_base_dir,
+                                     settings['refminer_jobs'], journal, scheduler,
+                                     (priority, len(releases)))
+    else:
+        refminer_memory = stage_memory_mb('refactoring-miner')
+        with scheduler.slot(((priority, len(releases)), -1), refminer_memory) if scheduler \
+                else nullcontext():
+            stage_record = TELEMETRY.begin(REPOSITORY_JOURNAL_TAG, 'refactoring-miner',
+                                           project_name)
+            refminer_success = run_refactoring_miner(project_dir, results_base_dir, journal)
+            TELEMETRY.end(stage_record, refminer_success)
+    export_refactorings_table(results_base_dir)
+    update_class_index(results_base_dir)
+
+    # Telemetria (telemetry.json + trace.json) e relatório resumido
+    telemetry_file, trace_file = TELEMETRY.save(results_base_dir, project_name)
+    print(f"✓ Telemetria salva em {telemetry_file} (linha do tempo: {trace_file})")
+    generate_summary_report(results_base_dir, all_results,
+                            TELEMETRY.project_records(project_name), sampling,
+                            options.get('pmd_batches'))
+
+    # Figuras e tabelas do notebook, sem Jupyter (só as saídas cujos dados mudaram)
+    if settings['report']:
+        try:
+            import generate_report
+        except ImportError:
+            print("ℹ matplotlib/seaborn não instalados; relatório não gerado\n")
+        else:
+            print(f"Gerando relatório em {results_base_dir}...")
+            generate_report.generate(results_base_dir)
 
     print(f"\n{'='*70}")
     print(f"ANÁLISE COMPLETA!")
@@ -477,6 +3540,289 @@ def main():
     print(f"Resultados salvos em: {results_base_dir}")
     print(f"Total de releases analisadas: {len(all_results)}")
     print(f"{'='*70}\n")
+    return all_results
+
+def read_batch_file(batch_file):
+    """
+    Lê a lista de repositórios do modo --batch: um `owner/repo` por linha,
+    opcionalmente seguido da URL de clone; linhas vazias e `#` são ignoradas.
+
+    Returns:
+        Lista de (owner/repo, URL ou None)
+    """
+    repositories = []
+    with open(batch_file) as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if '/' not in fields[0]:
+                print(f"Erro: {batch_file}:{number}: formato deve ser 'owner/repo [url]'")
+                sys.exit(1)
+            repositories.append((fields[0], fields[1] if len(fields) > 1 else None))
+    return repositories
+
+def analyze_batch(repositories, settings, scheduler, repo_workers):
+    """
+    Analisa vários repositórios com um único scheduler: até `repo_workers`
+    repositórios em andamento, com as etapas de todos disputando as mesmas
+    vagas (CPU e memória). Cada repositório grava seus resultados em
+    results/<repo>/, como na execução individual; a falha de um não
+    interrompe os demais.
+
+    Returns:
+        Lista de dicionários (repositório, releases, sucesso, erro, tempo)
+    """
+    def run(index, repo_path, repo_url):
+        start = time.perf_counter()
+        outcome = {'repository': repo_path, 'releases': 0, 'success': False, 'error': None}
+        try:
+            all_results = analyze_repository(repo_path, settings, scheduler, index, repo_url)
+            outcome['releases'] = len(all_results)
+            outcome['success'] = True
+        except SystemExit as e:
+            outcome['error'] = f"exit {e.code}"
+        except Exception as e:
+            outcome['error'] = f"{type(e).__name__}: {e}"
+        outcome['wall_seconds'] = round(time.perf_counter() - start, 3)
+        print(f"\n{'✓' if outcome['success'] else '✗'} {repo_path}: "
+              f"{outcome['releases']} release(s) em {outcome['wall_seconds']:.0f}s"
+              + (f" ({outcome['error']})" if outcome['error'] else ""))
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=max(1, min(repo_workers, len(repositories))),
+                            thread_name_prefix='repo') as executor:
+        futures = [executor.submit(run, index, repo_path, repo_url)
+                   for index, (repo_path, repo_url) in enumerate(repositories)]
+        outcomes = [future.result() for future in futures]
+
+    summary_file = os.path.join(WORKSPACE_DIR, "results", "batch-summary.json")
+    with open(summary_file, 'w') as f:
+        json.dump({'finished_at': datetime.now().isoformat(timespec='seconds'),
+                   'repositories': outcomes}, f, indent=2)
+
+    print(f"\n{'='*70}")
+    print(f"LOTE COMPLETO: {sum(o['success'] for o in outcomes)}/{len(outcomes)} repositório(s)")
+    print(f"{'='*70}")
+    for outcome in outcomes:
+        print(f"  {'✓' if outcome['success'] else '✗'} {outcome['repository']:40s} "
+              f"{outcome['releases']:4d} release(s) {outcome['wall_seconds']:8.0f}s")
+    print(f"Resumo salvo em: {summary_file}")
+    print(f"{'='*70}\n")
+    return outcomes
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: analyze_all_releases.py <owner/repo> [--limit N] [--jobs N] [--fresh]")
+        print("     analyze_all_releases.py --batch repos.txt [--batch-repos N] [--memory MB]")
+        print("                               [--sample N] [--sample-anchors N] [--sample-threshold X]")
+        print("                               [--stage-jobs N]")
+        print("                               [--checkout inplace|snapshot] [--snapshot-dir DIR]")
+        print("                               [--clone full|blobless] [--sparse]")
+        print("                               [--tools ck,pmd,spotbugs] [--no-build-cache] [--no-dedup]")
+        print("                               [--incremental-ck] [--ck-full-every N]")
+        print("                               [--no-pmd-cache] [--pmd-batch N] [--spotbugs-jobs N]")
+        print("                               [--refminer-ranges] [--refminer-jobs N]")
+        print("                               [--no-metrics-store] [--offline] [--report]")
+        print("                               [--timeouts ferramenta=segundos,...] [--repo-url URL]")
+        print("\nExemplo:")
+        print("  analyze_all_releases.py jhy/jsoup")
+        print("  analyze_all_releases.py jhy/jsoup --limit 5")
+        print("  analyze_all_releases.py apache/commons-lang --sample 40   (amostragem adaptativa)")
+        print("  analyze_all_releases.py jhy/jsoup --jobs 4")
+        print("  analyze_all_releases.py jhy/jsoup --stage-jobs 3   (etapas da release em paralelo)")
+        print("  analyze_all_releases.py jhy/jsoup --checkout snapshot --snapshot-dir /dev/shm/snapshots")
+        print("  analyze_all_releases.py jhy/jsoup --clone blobless --sparse   (blobs sob demanda)")
+        print("  analyze_all_releases.py jhy/jsoup --tools ck,pmd   (sem build)")
+        print("  analyze_all_releases.py jhy/jsoup --incremental-ck")
+        print("  analyze_all_releases.py jhy/jsoup --pmd-batch 10   (uma JVM do PMD a cada 10 releases)")
+        print("  analyze_all_releases.py jhy/jsoup --offline   (tags do clone, sem rede)")
+        print("  analyze_all_releases.py --batch repos.txt   (vários repositórios, um owner/repo por linha)")
+        print("\nExecuções interrompidas são retomadas a partir do journal")
+        print("(run-journal.jsonl); use --fresh para refazer tudo.")
+        sys.exit(1)
+
+    repo_path = sys.argv[1]
+    limit = None
+    jobs = 1
+
+    if '--limit' in sys.argv:
+        limit_idx = sys.argv.index('--limit')
+        if limit_idx + 1 < len(sys.argv):
+            limit = int(sys.argv[limit_idx + 1])
+
+    # Número de releases analisadas em paralelo (cada uma em sua worktree)
+    if '--jobs' in sys.argv:
+        jobs_idx = sys.argv.index('--jobs')
+        if jobs_idx + 1 < len(sys.argv):
+            jobs = max(1, int(sys.argv[jobs_idx + 1]))
+
+    # Lote de repositórios: um owner/repo por linha do arquivo
+    batch_file = None
+    if '--batch' in sys.argv:
+        batch_idx = sys.argv.index('--batch')
+        if batch_idx + 1 < len(sys.argv):
+            batch_file = sys.argv[batch_idx + 1]
+        if not batch_file or not os.path.isfile(batch_file):
+            print("Erro: --batch requer um arquivo com um owner/repo por linha")
+            sys.exit(1)
+
+    # Etapas (checkout, build, ck, pmd, spotbugs) simultâneas, somando todas as
+    # releases; acima de 1 as etapas independentes de cada release se sobrepõem.
+    # No modo --batch o padrão é o número de CPUs disponíveis
+    stage_jobs = available_cpus() if batch_file else 1
+    if '--stage-jobs' in sys.argv:
+        stage_jobs_idx = sys.argv.index('--stage-jobs')
+        if stage_jobs_idx + 1 < len(sys.argv):
+            stage_jobs = max(1, int(sys.argv[stage_jobs_idx + 1]))
+
+    # Memória (MB) que as etapas em andamento podem ocupar juntas; o padrão é a
+    # memória disponível agora, descontada uma reserva para o sistema
+    memory_budget = max(JVM_OVERHEAD_MB, available_memory_mb() - MEMORY_RESERVE_MB)
+    if '--memory' in sys.argv:
+        memory_idx = sys.argv.index('--memory')
+        if memory_idx + 1 < len(sys.argv):
+            memory_budget = max(1, int(sys.argv[memory_idx + 1]))
+
+    # Modo de checkout: 'inplace' (working copy do clone) ou 'snapshot'
+    # (árvore da tag materializada em um diretório novo, opcionalmente em tmpfs)
+    checkout_mode = 'inplace'
+    snapshot_root = None
+    if '--checkout' in sys.argv:
+        checkout_idx = sys.argv.index('--checkout')
+        if checkout_idx + 1 < len(sys.argv):
+            checkout_mode = sys.argv[checkout_idx + 1]
+    if '--snapshot-dir' in sys.argv:
+        snapshot_idx = sys.argv.index('--snapshot-dir')
+        if snapshot_idx + 1 < len(sys.argv):
+            snapshot_root = sys.argv[snapshot_idx + 1]
+            checkout_mode = 'snapshot'
+
+    if checkout_mode not in ('inplace', 'snapshot'):
+        print("Erro: --checkout deve ser 'inplace' ou 'snapshot'")
+        sys.exit(1)
+
+    # Modo de clone: 'full' ou 'blobless' (histórico sem o conteúdo dos
+    # arquivos; blobs buscados sob demanda). Vale apenas para clones novos
+    clone_mode = 'full'
+    if '--clone' in sys.argv:
+        clone_idx = sys.argv.index('--clone')
+        if clone_idx + 1 < len(sys.argv):
+            clone_mode = sys.argv[clone_idx + 1]
+    if clone_mode not in ('full', 'blobless'):
+        print("Erro: --clone deve ser 'full' ou 'blobless'")
+        sys.exit(1)
+
+    # Ferramentas a executar; sem SpotBugs o build é pulado por completo
+    tools = ANALYSIS_TOOLS
+    if '--tools' in sys.argv:
+        tools_idx = sys.argv.index('--tools')
+        if tools_idx + 1 < len(sys.argv):
+            tools = tuple(t.strip() for t in sys.argv[tools_idx + 1].split(',') if t.strip())
+    unknown_tools = [t for t in tools if t not in ANALYSIS_TOOLS]
+    if unknown_tools or not tools:
+        print(f"Erro: --tools aceita apenas {', '.join(ANALYSIS_TOOLS)}")
+        sys.exit(1)
+
+    # Tempo máximo por ferramenta (ex: --timeouts spotbugs=7200,build=1800)
+    if '--timeouts' in sys.argv:
+        timeouts_idx = sys.argv.index('--timeouts')
+        if timeouts_idx + 1 < len(sys.argv):
+            for item in sys.argv[timeouts_idx + 1].split(','):
+                tool, _, seconds = item.partition('=')
+                if tool.strip() not in TOOL_TIMEOUTS or not seconds.strip().isdigit():
+                    print(f"Erro: --timeouts aceita {', '.join(TOOL_TIMEOUTS)} (ex: spotbugs=7200)")
+                    sys.exit(1)
+                TOOL_TIMEOUTS[tool.strip()] = int(seconds)
+
+    if not batch_file and '/' not in repo_path:
+        print("Erro: Formato deve ser 'owner/repo'")
+        sys.exit(1)
+
+    settings = {
+        'limit': limit,
+        'jobs': jobs,
+        'checkout': checkout_mode,
+        'snapshot_root': snapshot_root,
+        'clone': clone_mode,
+        'sparse': '--sparse' in sys.argv,
+        'tools': tools,
+        'incremental_ck': '--incremental-ck' in sys.argv,
+        'ck_full_every': 10,
+        'build_cache': '--no-build-cache' not in sys.argv,
+        'dedup': '--no-dedup' not in sys.argv,
+        'spotbugs_jobs': min(4, os.cpu_count() or 1),
+        'refminer_ranges': '--refminer-ranges' in sys.argv,
+        'refminer_jobs': min(4, os.cpu_count() or 1),
+        'pmd_cache': '--no-pmd-cache' not in sys.argv,
+        'pmd_batch': None,
+        'metrics_store': '--no-metrics-store' not in sys.argv,
+        'fresh': '--fresh' in sys.argv,
+        'offline': '--offline' in sys.argv,
+        'report': '--report' in sys.argv,
+        'sample': None,
+        'sample_anchors': None,
+        'sample_threshold': SAMPLE_THRESHOLD,
+    }
+    # Amostragem adaptativa: no máximo N releases, escolhidas pela variação
+    # dos agregados entre as já medidas (âncoras: padrão N/4)
+    if '--sample' in sys.argv:
+        sample_idx = sys.argv.index('--sample')
+        if sample_idx + 1 < len(sys.argv):
+            settings['sample'] = max(2, int(sys.argv[sample_idx + 1]))
+    if '--sample-anchors' in sys.argv:
+        anchors_idx = sys.argv.index('--sample-anchors')
+        if anchors_idx + 1 < len(sys.argv):
+            settings['sample_anchors'] = max(2, int(sys.argv[anchors_idx + 1]))
+    if '--sample-threshold' in sys.argv:
+        threshold_idx = sys.argv.index('--sample-threshold')
+        if threshold_idx + 1 < len(sys.argv):
+            settings['sample_threshold'] = float(sys.argv[threshold_idx + 1])
+    if '--ck-full-every' in sys.argv:
+        full_idx = sys.argv.index('--ck-full-every')
+        if full_idx + 1 < len(sys.argv):
+            settings['ck_full_every'] = int(sys.argv[full_idx + 1])
+    if '--spotbugs-jobs' in sys.argv:
+        spotbugs_jobs_idx = sys.argv.index('--spotbugs-jobs')
+        if spotbugs_jobs_idx + 1 < len(sys.argv):
+            settings['spotbugs_jobs'] = max(1, int(sys.argv[spotbugs_jobs_idx + 1]))
+    # PMD de N releases por execução (ver run_pmd_batches)
+    if '--pmd-batch' in sys.argv:
+        pmd_batch_idx = sys.argv.index('--pmd-batch')
+        if pmd_batch_idx + 1 < len(sys.argv):
+            settings['pmd_batch'] = max(1, int(sys.argv[pmd_batch_idx + 1]))
+    # RefactoringMiner por intervalo entre tags, com N JVMs em paralelo
+    if '--refminer-jobs' in sys.argv:
+        refminer_jobs_idx = sys.argv.index('--refminer-jobs')
+        if refminer_jobs_idx + 1 < len(sys.argv):
+            settings['refminer_jobs'] = max(1, int(sys.argv[refminer_jobs_idx + 1]))
+
+    scheduler = None
+    if stage_jobs > 1:
+        scheduler = StageScheduler(stage_jobs, memory_budget)
+        print(f"Etapas em paralelo: até {stage_jobs} simultâneas, "
+              f"{memory_budget} MB de memória (JVM: {stage_memory_mb('ck')} MB cada)\n")
+
+    if batch_file:
+        repositories = read_batch_file(batch_file)
+        # Repositórios em andamento ao mesmo tempo (padrão: um por vaga)
+        repo_workers = stage_jobs
+        if '--batch-repos' in sys.argv:
+            batch_repos_idx = sys.argv.index('--batch-repos')
+            if batch_repos_idx + 1 < len(sys.argv):
+                repo_workers = max(1, int(sys.argv[batch_repos_idx + 1]))
+        print(f"Lote: {len(repositories)} repositório(s), até {repo_workers} em andamento\n")
+        outcomes = analyze_batch(repositories, settings, scheduler, repo_workers)
+        if not all(outcome['success'] for outcome in outcomes):
+            sys.exit(1)
+        return
+
+    repo_url = None
+    if '--repo-url' in sys.argv:
+        repo_url_idx = sys.argv.index('--repo-url')
+        if repo_url_idx + 1 < len(sys.argv):
+            repo_url = sys.argv[repo_url_idx + 1]
+    analyze_repository(repo_path, settings, scheduler, repo_url=repo_url)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,712 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta do analyze_all_releases.py, sem rede, Maven ou JVM.
+Uso: benchmark_pipeline.py [--tags N] [--classes N] [--churn F] [--commits N]
+                           [--runs N] [--warm] [--tool-startup MS] [--tool-cost MS]
+                           [--workdir DIR] [--keep] [--output arquivo.json]
+                           [-- opções do analyze_all_releases.py]
+
+Gera um repositório git sintético (projeto Maven com N classes Java e uma tag
+por release, alterando uma fração das classes entre as releases), instala
+stand-ins de ck, PMD, SpotBugs, Maven e RefactoringMiner e roda o pipeline
+completo com --offline em um workspace temporário.
+
+Os stand-ins são este mesmo script (--stand-in <ferramenta>): leem as fontes
+de verdade e geram saídas no formato das ferramentas reais, com tamanho
+proporcional ao código (uma linha do CK por classe/método, violações do PMD e
+bugs do SpotBugs por método, uma refatoração por arquivo alterado em cada
+commit). --tool-startup e --tool-cost simulam o custo de uma JVM (ms por
+execução e ms por arquivo analisado).
+
+Ao final mostra a vazão (releases/hora) e a latência de cada etapa
+(p50/p95/máx, do telemetry.json do pipeline).
+"""
+
+import sys
+import os
+import re
+import csv
+import json
+import time
+import random
+import shutil
+import zipfile
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+DEFAULT_TAGS = 10
+DEFAULT_CLASSES = 200
+DEFAULT_CHURN = 0.1
+DEFAULT_COMMITS = 3
+
+# Classes por pacote no repositório sintético
+CLASSES_PER_PACKAGE = 20
+
+# Nome do projeto (owner/repo) passado ao pipeline
+BENCH_REPO = "bench/synthetic"
+
+# Data da primeira release e intervalo entre releases
+FIRST_RELEASE = datetime(2020, 1, 1, 12, 0, 0)
+RELEASE_INTERVAL = timedelta(days=30)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Regras (conjunto quickstart) usadas nas violações do stand-in do PMD
+PMD_RULES = [
+    ('Best Practices', 'UnusedLocalVariable', "Avoid unused local variables such as 'tmp'."),
+    ('Code Style', 'ControlStatementBraces', 'This statement should have braces'),
+    ('Design', 'SimplifyBooleanReturns', 'This if statement can be replaced by a return'),
+    ('Error Prone', 'AssignmentInOperand', 'Avoid assignments in operands'),
+    ('Code Style', 'UselessParentheses', 'Useless parentheses.'),
+]
+
+# Padrões (categoria, tipo, abreviação) usados pelo stand-in do SpotBugs
+SPOTBUGS_PATTERNS = [
+    ('I18N', 'DM_DEFAULT_ENCODING', 'Dm', 'Found reliance on default encoding'),
+    ('BAD_PRACTICE', 'SE_BAD_FIELD', 'Se', 'Non-transient non-serializable instance field'),
+    ('PERFORMANCE', 'SBSC_USE_STRINGBUFFER_CONCATENATION', 'SBSC',
+     'Method concatenates strings using + in a loop'),
+    ('SECURITY', 'PREDICTABLE_RANDOM', 'SECPR', 'The use of java.util.Random is predictable'),
+    ('STYLE', 'UC_USELESS_CONDITION', 'UC', 'Useless condition'),
+]
+
+CK_CLASS_HEADER = [
+    'file', 'class', 'type', 'cbo', 'cboModified', 'fanin', 'fanout', 'wmc', 'dit', 'noc',
+    'rfc', 'lcom', 'lcom*', 'tcc', 'lcc', 'totalMethodsQty', 'staticMethodsQty',
+    'publicMethodsQty', 'privateMethodsQty', 'protectedMethodsQty', 'defaultMethodsQty',
+    'visibleMethodsQty', 'abstractMethodsQty', 'finalMethodsQty', 'synchronizedMethodsQty',
+    'totalFieldsQty', 'staticFieldsQty', 'publicFieldsQty', 'privateFieldsQty',
+    'protectedFieldsQty', 'defaultFieldsQty', 'finalFieldsQty', 'synchronizedFieldsQty',
+    'nosi', 'loc', 'returnQty', 'loopQty', 'comparisonsQty', 'tryCatchQty',
+    'parenthesizedExpsQty', 'stringLiteralsQty', 'numbersQty', 'assignmentsQty',
+    'mathOperationsQty', 'variablesQty', 'maxNestedBlocksQty', 'anonymousClassesQty',
+    'innerClassesQty', 'lambdasQty', 'uniqueWordsQty', 'modifiers', 'logStatementsQty',
+]
+CK_METHOD_HEADER = [
+    'file', 'class', 'method', 'constructor', 'line', 'cbo', 'cboModified', 'fanin', 'fanout',
+    'wmc', 'rfc', 'loc', 'returnsQty', 'variablesQty', 'parametersQty', 'methodsInvokedQty',
+    'methodsInvokedLocalQty', 'methodsInvokedIndirectLocalQty', 'loopQty', 'comparisonsQty',
+    'tryCatchQty', 'parenthesizedExpsQty', 'stringLiteralsQty', 'numbersQty', 'assignmentsQty',
+    'mathOperationsQty', 'maxNestedBlocksQty', 'anonymousClassesQty', 'innerClassesQty',
+    'lambdasQty', 'uniqueWordsQty', 'modifiers', 'logStatementsQty', 'hasJavaDoc',
+]
+CK_VARIABLE_HEADER = ['file', 'class', 'method', 'variable', 'usage']
+
+POM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>com.bench</groupId>
+  <artifactId>synthetic</artifactId>
+  <version>1.0</version>
+  <packaging>jar</packaging>
+</project>
+"""
+
+# ---------------------------------------------------------------------------
+# Repositório sintético
+# ---------------------------------------------------------------------------
+
+def git(cwd, *args, env=None):
+    """Executa um comando git (erro interrompe o benchmark)."""
+    result = subprocess.run(['git', *args], cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)}: {result.stderr.strip()}")
+    return result.stdout
+
+def java_source(cls):
+    """Código de uma classe sintética (campos, métodos com laços e condições)."""
+    lines = [f"package {cls['package']};", ""]
+    for imported in cls['imports']:
+        lines.append(f"import {imported};")
+    lines += ["import java.util.ArrayList;", "import java.util.List;", ""]
+    lines.append("/**")
+    lines.append(f" * Classe sintética {cls['name']} (revisão {cls['revision']}).")
+    lines.append(" */")
+    extends = f" extends {cls['parent'].rsplit('.', 1)[1]}" if cls['parent'] else ""
+    lines.append(f"public class {cls['name']}{extends} {{")
+    for i in range(cls['fields']):
+        lines.append(f"    private int field{i} = {i};")
+    lines.append(f"    private final List<String> names = new ArrayList<>();")
+    for i in range(cls['methods']):
+        lines += [
+            "",
+            f"    public int method{i}(int value, String label) {{",
+            f"        int total = field{i % cls['fields']};",
+            f"        for (int j = 0; j < value; j++) {{",
+            f"            if (j % {i + 2} == 0) {{",
+            f"                total += j * {cls['revision'] + 1};",
+            f"            }} else {{",
+            f"                names.add(label + j);",
+            f"            }}",
+            f"        }}",
+            f"        return total;",
+            f"    }}",
+        ]
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def class_path(repo_dir, cls):
+    """Caminho do arquivo .java de uma classe."""
+    return os.path.join(repo_dir, "src", "main", "java", *cls['package'].split('.'),
+                        f"{cls['name']}.java")
+
+def new_class(index, classes, rng):
+    """Classe nova; parte delas estende outra classe já existente."""
+    package = f"com.bench.p{index // CLASSES_PER_PACKAGE}"
+    parent = None
+    imports = []
+    if classes and rng.random() < 0.3:
+        base = rng.choice(classes)
+        parent = f"{base['package']}.{base['name']}"
+        if base['package'] != package:
+            imports.append(parent)
+    return {
+        'package': package,
+        'name': f"Class{index}",
+        'parent': parent,
+        'imports': imports,
+        'fields': rng.randint(2, 6),
+        'methods': rng.randint(2, 8),
+        'revision': 0,
+    }
+
+def generate_repository(repo_dir, tags=DEFAULT_TAGS, classes=DEFAULT_CLASSES, churn=DEFAULT_CHURN,
+                        commits=DEFAULT_COMMITS, seed=42):
+    """
+    Cria o repositório sintético: uma tag anotada por release, com `commits`
+    commits entre tags alterando `churn` das classes (e ~2% de classes novas).
+
+    Returns:
+        Lista com os nomes das tags, em ordem
+    """
+    rng = random.Random(seed)
+    os.makedirs(repo_dir)
+    git(repo_dir, 'init', '-q')
+    git(repo_dir, 'config', 'user.name', 'Benchmark')
+    git(repo_dir, 'config', 'user.email', 'benchmark@example.com')
+    with open(os.path.join(repo_dir, "pom.xml"), 'w') as f:
+        f.write(POM_XML)
+
+    state = []
+    for index in range(classes):
+        state.append(new_class(index, state, rng))
+
+    def write_classes(changed):
+        for cls in changed:
+            path = class_path(repo_dir, cls)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(java_source(cls))
+
+    def commit(message, when):
+        stamp = when.strftime('%Y-%m-%dT%H:%M:%S')
+        env = dict(os.environ, GIT_AUTHOR_DATE=stamp, GIT_COMMITTER_DATE=stamp)
+        git(repo_dir, 'add', '-A', env=env)
+        git(repo_dir, 'commit', '-q', '-m', message, env=env)
+        return env
+
+    tag_names = []
+    write_classes(state)
+    for release in range(tags):
+        release_date = FIRST_RELEASE + release * RELEASE_INTERVAL
+        if release == 0:
+            env = commit("Versão inicial", release_date)
+        else:
+            per_commit = max(1, round(len(state) * churn / commits))
+            for number in range(commits):
+                changed = rng.sample(state, min(per_commit, len(state)))
+                for cls in changed:
+                    cls['revision'] += 1
+                    if rng.random() < 0.5:
+                        cls['methods'] += 1
+                if number == commits - 1:
+                    for _ in range(max(1, len(state) // 50)):
+                        state.append(new_class(len(state), state, rng))
+                        changed.append(state[-1])
+                write_classes(changed)
+                when = release_date - timedelta(hours=commits - number)
+                env = commit(f"Release {release}: alteração {number + 1}", when)
+        tag_name = f"v1.{release}.0"
+        git(repo_dir, 'tag', '-a', tag_name, '-m', f"Release {tag_name}", env=env)
+        tag_names.append(tag_name)
+
+    return tag_names
+
+# ---------------------------------------------------------------------------
+# Stand-ins das ferramentas
+# ---------------------------------------------------------------------------
+
+def simulate_cost(units):
+    """Custo simulado de JVM: BENCH_TOOL_STARTUP_MS + BENCH_TOOL_COST_MS por unidade."""
+    startup = float(os.environ.get('BENCH_TOOL_STARTUP_MS', 0))
+    cost = float(os.environ.get('BENCH_TOOL_COST_MS', 0))
+    delay = (startup + cost * units) / 1000
+    if delay > 0:
+        time.sleep(delay)
+
+def option(args, name, default=None):
+    """Valor de uma opção `name valor` na linha de comando de um stand-in."""
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return default
+
+def java_files(root):
+    """Arquivos .java sob root, em ordem."""
+    files = []
+    for current, dirs, names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in ('.git', 'target'))
+        files += [os.path.join(current, name) for name in sorted(names) if name.endswith('.java')]
+    return files
+
+def parse_java(text):
+    """Pacote, classe, superclasse, imports, campos e métodos de um arquivo sintético."""
+    package = re.search(r'^package ([\w.]+);', text, re.M)
+    declaration = re.search(r'class (\w+)(?: extends (\w+))?', text)
+    methods = [(m.group(1), text.count('\n', 0, m.start()) + 1)
+               for m in re.finditer(r'^\s+public \w+ (\w+)\(', text, re.M)]
+    return {
+        'package': package.group(1) if package else '',
+        'name': declaration.group(1) if declaration else '',
+        'parent': declaration.group(2) if declaration else None,
+        'imports': re.findall(r'^import ([\w.]+);', text, re.M),
+        'fields': re.findall(r'^\s+private (?:final )?[\w<>]+ (\w+) =', text, re.M),
+        'methods': methods,
+        'loc': text.count('\n'),
+    }
+
+def stand_in_ck(args):
+    """ck <fontes> <usa jars> <max arquivos> <variáveis e campos> [saída]: CSVs do CK."""
+    source_dir = args[0]
+    prefix = args[4] if len(args) > 4 else ''
+    files = java_files(source_dir)
+    simulate_cost(len(files))
+
+    parsed = {}
+    for path in files:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            info = parse_java(f.read())
+        parsed[f"{info['package']}.{info['name']}"] = (os.path.abspath(path), info)
+
+    by_simple_name = {}
+    for qualified in parsed:
+        by_simple_name.setdefault(qualified.rsplit('.', 1)[1], qualified)
+    parents = {}
+    for qualified, (_, info) in parsed.items():
+        if info['parent']:
+            parents[qualified] = next((i for i in info['imports']
+                                       if i.endswith('.' + info['parent'])),
+                                      by_simple_name.get(info['parent']))
+    children = {}
+    for child, parent in parents.items():
+        children[parent] = children.get(parent, 0) + 1
+
+    def dit(qualified):
+        depth = 1
+        while qualified in parents and depth < 50:
+            qualified = parents[qualified]
+            depth += 1
+        return depth
+
+    with open(f"{prefix}class.csv", 'w', newline='') as fc, \
+            open(f"{prefix}method.csv", 'w', newline='') as fm, \
+            open(f"{prefix}field.csv", 'w', newline='') as ff, \
+            open(f"{prefix}variable.csv", 'w', newline='') as fv:
+        class_writer, method_writer = csv.writer(fc), csv.writer(fm)
+        field_writer, variable_writer = csv.writer(ff), csv.writer(fv)
+        class_writer.writerow(CK_CLASS_HEADER)
+        method_writer.writerow(CK_METHOD_HEADER)
+        field_writer.writerow(CK_VARIABLE_HEADER)
+        variable_writer.writerow(CK_VARIABLE_HEADER)
+
+        for qualified, (path, info) in parsed.items():
+            methods = len(info['methods'])
+            fields = len(info['fields'])
+            cbo = len(info['imports']) + 2
+            values = {
+                'file': path, 'class': qualified, 'type': 'class', 'cbo': cbo,
+                'cboModified': cbo, 'fanin': children.get(qualified, 0), 'fanout': cbo,
+                'wmc': methods * 3, 'dit': dit(qualified), 'noc': children.get(qualified, 0),
+                'rfc': methods + 3, 'lcom': methods * (methods - 1) // 2,
+                'lcom*': round(1 - 1 / max(1, methods), 4), 'tcc': round(1 / max(1, methods), 4),
+                'lcc': round(2 / max(2, methods), 4), 'totalMethodsQty': methods,
+                'publicMethodsQty': methods, 'visibleMethodsQty': methods,
+                'totalFieldsQty': fields, 'privateFieldsQty': fields, 'finalFieldsQty': 1,
+                'loc': info['loc'], 'returnQty': methods, 'loopQty': methods,
+                'comparisonsQty': methods * 2, 'numbersQty': methods * 3,
+                'assignmentsQty': methods * 3 + fields, 'mathOperationsQty': methods * 3,
+                'variablesQty': methods * 2, 'maxNestedBlocksQty': 3,
+                'uniqueWordsQty': 20 + methods * 4, 'modifiers': 1,
+            }
+            class_writer.writerow([values.get(name, 0) for name in CK_CLASS_HEADER])
+            for field in info['fields']:
+                field_writer.writerow([path, qualified, '', field, methods])
+            for name, line in info['methods']:
+                signature = f"{name}/2[int,java.lang.String]"
+                method_values = {
+                    'file': path, 'class': qualified, 'method': signature,
+                    'constructor': 'false', 'line': line, 'cbo': 2, 'cboModified': 2,
+                    'fanout': 2, 'wmc': 3, 'rfc': 1, 'loc': 10, 'returnsQty': 1,
+                    'variablesQty': 2, 'parametersQty': 2, 'methodsInvokedQty': 1,
+                    'loopQty': 1, 'comparisonsQty': 2, 'numbersQty': 3, 'assignmentsQty': 3,
+                    'mathOperationsQty': 3, 'maxNestedBlocksQty': 3, 'uniqueWordsQty': 12,
+                    'modifiers': 1, 'hasJavaDoc': 'false',
+                }
+                method_writer.writerow([method_values.get(column, 0) for column in CK_METHOD_HEADER])
+                for variable in ('total', 'j'):
+                    variable_writer.writerow([path, qualified, signature, variable, 3])
+    return 0
+
+def stand_in_pmd(args):
+    """pmd check (-d DIR | --file-list ARQ) -R ruleset -f csv -r saída: CSV do PMD."""
+    files = java_files(option(args, '-d')) if option(args, '-d') else []
+    if option(args, '--file-list'):
+        with open(option(args, '--file-list')) as f:
+            files += [line.strip() for line in f if line.strip()]
+    simulate_cost(len(files))
+
+    problem = 0
+    with open(option(args, '-r'), 'w', newline='') as out:
+        writer = csv.writer(out, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        writer.writerow(['Problem', 'Package', 'File', 'Priority', 'Line', 'Description',
+                         'Rule set', 'Rule'])
+        for path in files:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                info = parse_java(f.read())
+            for number, (_, line) in enumerate(info['methods']):
+                rule_set, rule, description = PMD_RULES[(number + len(info['name'])) % len(PMD_RULES)]
+                problem += 1
+                writer.writerow([problem, info['package'], path, number % 4 + 1, line + 2,
+                                 description, rule_set, rule])
+    print(f"Processed {len(files)} files, {problem} violations")
+    # Como o PMD real: código 4 quando há violações
+    return 4 if problem else 0
+
+def stand_in_mvn(args):
+    """mvn clean package: target/<artifact>-<versão>.jar com uma entrada por classe."""
+    files = java_files(os.path.join("src", "main", "java"))
+    simulate_cost(len(files))
+    if 'clean' in args:
+        shutil.rmtree("target", ignore_errors=True)
+    os.makedirs("target", exist_ok=True)
+    source_root = os.path.join("src", "main", "java")
+    with zipfile.ZipFile(os.path.join("target", "synthetic-1.0.jar"), 'w',
+                         zipfile.ZIP_DEFLATED) as jar:
+        jar.writestr("META-INF/MANIFEST.MF", "Manifest-Version: 1.0\n")
+        for path in files:
+            entry = os.path.relpath(path, source_root)[:-len('.java')] + '.class'
+            # O "bytecode" é o próprio fonte: tamanho proporcional à classe
+            with open(path, 'rb') as f:
+                jar.writestr(entry, f.read())
+    with zipfile.ZipFile(os.path.join("target", "synthetic-1.0-sources.jar"), 'w') as jar:
+        for path in files:
+            jar.write(path, os.path.relpath(path, source_root))
+    return 0
+
+def stand_in_spotbugs(args):
+    """spotbugs -textui ... -output saída.xml <jar>: relatório XML do SpotBugs."""
+    output = option(args, '-output')
+    jar_file = args[-1]
+    with zipfile.ZipFile(jar_file) as jar:
+        classes = [(name, jar.read(name).decode('utf-8', errors='replace'))
+                   for name in jar.namelist() if name.endswith('.class')]
+    simulate_cost(len(classes))
+
+    bugs = []
+    for name, text in classes:
+        info = parse_java(text)
+        qualified = name[:-len('.class')].replace('/', '.')
+        source_path = name[:-len('.class')] + '.java'
+        for number, (method, line) in enumerate(info['methods']):
+            if (number + len(qualified)) % 3:
+                continue
+            category, bug_type, abbrev, message = \
+                SPOTBUGS_PATTERNS[(number + len(qualified)) % len(SPOTBUGS_PATTERNS)]
+            bugs.append(
+                f'  <BugInstance type="{bug_type}" priority="{number % 3 + 1}" '
+                f'rank="{number % 20 + 1}" abbrev="{abbrev}" category="{category}">\n'
+                f'    <ShortMessage>{message}</ShortMessage>\n'
+                f'    <LongMessage>{message} in {qualified}.{method}(int, String)</LongMessage>\n'
+                f'    <Class classname="{qualified}" primary="true">\n'
+                f'      <SourceLine classname="{qualified}" start="1" end="{info["loc"]}" '
+                f'sourcefile="{os.path.basename(source_path)}" sourcepath="{source_path}"/>\n'
+                f'    </Class>\n'
+                f'    <Method classname="{qualified}" name="{method}" '
+                f'signature="(ILjava/lang/String;)I" isStatic="false" primary="true"/>\n'
+                f'    <SourceLine classname="{qualified}" start="{line + 4}" end="{line + 4}" '
+                f'sourcefile="{os.path.basename(source_path)}" sourcepath="{source_path}"/>\n'
+                f'  </BugInstance>\n')
+
+    with open(output, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<BugCollection version="4.8.6" sequence="0" timestamp="0" analysisTimestamp="0" '
+                'release="">\n')
+        f.write(f'  <Project projectName=""><Jar>{jar_file}</Jar></Project>\n')
+        f.writelines(bugs)
+        f.write(f'  <FindBugsSummary total_classes="{len(classes)}" total_bugs="{len(bugs)}" '
+                f'total_size="{sum(text.count(chr(10)) for _, text in classes)}" '
+                f'num_packages="1"/>\n')
+        f.write('</BugCollection>\n')
+    return 0
+
+def stand_in_refactoring_miner(args):
+    """refactoring-miner.sh (-a repo [branch] | -bc repo início fim) -json saída."""
+    output = option(args, '-json')
+    repo_dir = args[1]
+    if args[0] == '-bc':
+        revisions = [f"{args[2]}..{args[3]}"]
+    elif args[0] == '-a' and len(args) > 4:
+        revisions = [args[2]]
+    else:
+        revisions = ['--all']
+
+    log = git(repo_dir, 'log', '--reverse', '--format=@%H', '--name-only', *revisions)
+    commits = []
+    for block in log.split('@')[1:]:
+        lines = [line for line in block.splitlines() if line.strip()]
+        sha1, files = lines[0], [line for line in lines[1:] if line.endswith('.java')]
+        refactorings = []
+        for path in files:
+            class_name = os.path.basename(path)[:-len('.java')]
+            location = {
+                'filePath': path, 'startLine': 12, 'endLine': 22, 'startColumn': 5,
+                'endColumn': 6, 'codeElementType': 'METHOD_DECLARATION',
+                'description': 'source method declaration before extraction',
+                'codeElement': f"public method0(value int, label String) : int",
+            }
+            refactorings.append({
+                'type': 'Extract Method',
+                'description': f"Extract Method private helper() : int extracted from "
+                               f"public method0(value int, label String) : int in class {class_name}",
+                'leftSideLocations': [location],
+                'rightSideLocations': [dict(location, description='extracted method declaration',
+                                            codeElement='private helper() : int')],
+            })
+        commits.append({'repository': repo_dir, 'sha1': sha1, 'url': '',
+                        'refactorings': refactorings})
+    simulate_cost(len(commits))
+
+    with open(output, 'w') as f:
+        json.dump({'commits': commits}, f, indent=2)
+    print(f"{len(commits)} commits analisados")
+    return 0
+
+STAND_INS = {
+    'ck': stand_in_ck,
+    'pmd': lambda args: stand_in_pmd(args[1:] if args and args[0] == 'check' else args),
+    'mvn': stand_in_mvn,
+    'spotbugs': stand_in_spotbugs,
+    'refactoring-miner.sh': stand_in_refactoring_miner,
+}
+
+def install_stand_ins(bin_dir):
+    """Cria em bin_dir um executável por ferramenta, apontando para --stand-in."""
+    os.makedirs(bin_dir, exist_ok=True)
+    for name in STAND_INS:
+        path = os.path.join(bin_dir, name)
+        with open(path, 'w') as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" '
+                    f'--stand-in {name} "$@"\n')
+        os.chmod(path, 0o755)
+    return bin_dir
+
+# ---------------------------------------------------------------------------
+# Execução e relatório
+# ---------------------------------------------------------------------------
+
+def sibling_command(*names):
+    """Comando de um script do pipeline: arquivo ao lado deste ou no PATH."""
+    for name in names:
+        path = os.path.join(SCRIPT_DIR, name)
+        if os.path.exists(path):
+            return [sys.executable, path]
+    for name in names:
+        if shutil.which(name):
+            return [shutil.which(name)]
+    raise FileNotFoundError(f"script não encontrado: {' / '.join(names)}")
+
+def percentile(values, fraction):
+    """Percentil por posição (nearest-rank) de uma lista não vazia."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+def run_pipeline(work_dir, origin_dir, pipeline_args, run_number, fresh=True):
+    """
+    Roda o analyze_all_releases.py em work_dir/workspace contra o repositório
+    sintético, com os stand-ins no lugar das ferramentas.
+
+    Returns:
+        Dicionário com código de saída, tempo de parede e telemetria da execução
+    """
+    workspace = os.path.join(work_dir, "workspace")
+    project = BENCH_REPO.split('/', 1)[1]
+    project_dir = os.path.join(workspace, "projects", project)
+    if fresh:
+        shutil.rmtree(workspace, ignore_errors=True)
+    if not os.path.exists(project_dir):
+        os.makedirs(os.path.dirname(project_dir), exist_ok=True)
+        git(work_dir, 'clone', '-q', origin_dir, project_dir)
+
+    bin_dir = os.path.join(work_dir, "bin")
+    home_dir = os.path.join(work_dir, "home")
+    os.makedirs(home_dir, exist_ok=True)
+    env = dict(
+        os.environ,
+        PATH=f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        # `git config --global` do pipeline não toca a configuração do usuário
+        HOME=home_dir,
+        WORKSPACE_DIR=workspace,
+        CK_BIN=os.path.join(bin_dir, "ck"),
+        PMD_BIN=os.path.join(bin_dir, "pmd"),
+        SPOTBUGS_BIN=os.path.join(bin_dir, "spotbugs"),
+        FINDSECBUGS_PLUGIN=os.path.join(bin_dir, "findsecbugs-plugin.jar"),
+        REFACTORING_MINER_BIN=os.path.join(bin_dir, "refactoring-miner.sh"),
+        FETCH_RELEASES_BIN=" ".join(sibling_command('fetch_github_releases.py',
+                                                    'fetch-github-releases')),
+    )
+    cmd = sibling_command('analyze_all_releases.py', 'analyze-all-releases') + \
+        [BENCH_REPO, '--offline'] + pipeline_args
+
+    log_file = os.path.join(work_dir, f"run-{run_number}.log")
+    start = time.perf_counter()
+    with open(log_file, 'w') as log:
+        returncode = subprocess.run(cmd, env=env, stdout=log, stderr=subprocess.STDOUT).returncode
+    wall = time.perf_counter() - start
+
+    telemetry_file = os.path.join(workspace, "results", project, "telemetry.json")
+    stages = []
+    if os.path.exists(telemetry_file):
+        with open(telemetry_file) as f:
+            stages = json.load(f)['stages']
+    return {'returncode': returncode, 'wall_seconds': round(wall, 3), 'log': log_file,
+            'stages': stages}
+
+def summarize(runs, releases):
+    """Vazão e latência por etapa (sobre todas as execuções)."""
+    walls = [run['wall_seconds'] for run in runs]
+    stage_times = {}
+    for run in runs:
+        for record in run['stages']:
+            stage_times.setdefault(record['stage'], []).append(record)
+
+    stages = {}
+    for stage, records in stage_times.items():
+        wall = [r['wall_seconds'] for r in records]
+        stages[stage] = {
+            'count': len(records),
+            'p50_seconds': round(percentile(wall, 0.5), 3),
+            'p95_seconds': round(percentile(wall, 0.95), 3),
+            'max_seconds': round(max(wall), 3),
+            'total_seconds': round(sum(wall), 3),
+            'cpu_seconds': round(sum(r['cpu_user_seconds'] + r['cpu_sys_seconds']
+                                     for r in records), 3),
+            'failures': sum(1 for r in records if r['success'] is False),
+        }
+    median_wall = percentile(walls, 0.5)
+    return {
+        'releases': releases,
+        'runs': len(runs),
+        'wall_seconds': walls,
+        'median_wall_seconds': median_wall,
+        'releases_per_hour': round(releases * 3600 / median_wall, 1) if median_wall else None,
+        'stages': stages,
+    }
+
+def print_summary(summary, config):
+    """Tabela do resultado no terminal."""
+    print(f"\n{'='*70}")
+    print("BENCHMARK DO PIPELINE")
+    print(f"{'='*70}")
+    print(f"Repositório: {config['tags']} releases, {config['classes']} classes, "
+          f"churn {config['churn']:.0%}, {config['commits']} commit(s) por release")
+    print(f"Execuções:   {summary['runs']} "
+          f"({', '.join(f'{w:.1f}s' for w in summary['wall_seconds'])})")
+    print(f"Vazão:       {summary['releases_per_hour']} releases/hora "
+          f"(mediana {summary['median_wall_seconds']:.1f}s por execução)")
+    print(f"\n{'Etapa':20s} {'N':>4s} {'p50':>8s} {'p95':>8s} {'máx':>8s} {'total':>9s} {'CPU':>9s}")
+    print("-"*70)
+    for stage, values in sorted(summary['stages'].items(), key=lambda s: -s[1]['total_seconds']):
+        failures = f"  ({values['failures']} falha(s))" if values['failures'] else ""
+        print(f"{stage:20s} {values['count']:4d} {values['p50_seconds']:7.2f}s "
+              f"{values['p95_seconds']:7.2f}s {values['max_seconds']:7.2f}s "
+              f"{values['total_seconds']:8.1f}s {values['cpu_seconds']:8.1f}s{failures}")
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--stand-in':
+        tool = STAND_INS.get(sys.argv[2])
+        if tool is None:
+            print(f"Erro: stand-in desconhecido: {sys.argv[2]}", file=sys.stderr)
+            sys.exit(2)
+        sys.exit(tool(sys.argv[3:]))
+
+    if '-h' in sys.argv or '--help' in sys.argv:
+        print("Uso: benchmark_pipeline.py [--tags N] [--classes N] [--churn F] [--commits N]")
+        print("                           [--runs N] [--warm] [--tool-startup MS] [--tool-cost MS]")
+        print("                           [--workdir DIR] [--keep] [--output arquivo.json]")
+        print("                           [-- opções do analyze_all_releases.py]")
+        print("\nExemplo:")
+        print("  benchmark_pipeline.py --tags 20 --classes 500 --runs 3")
+        print("  benchmark_pipeline.py --tool-startup 800 --tool-cost 2 -- --jobs 4 --incremental-ck")
+        sys.exit(0)
+
+    # Opções depois de '--' vão para o pipeline
+    args = sys.argv[1:]
+    pipeline_args = []
+    if '--' in args:
+        pipeline_args = args[args.index('--') + 1:]
+        args = args[:args.index('--')]
+
+    config = {'tags': DEFAULT_TAGS, 'classes': DEFAULT_CLASSES, 'churn': DEFAULT_CHURN,
+              'commits': DEFAULT_COMMITS, 'runs': 1, 'tool_startup_ms': 0, 'tool_cost_ms': 0}
+    for name, key, kind in (('--tags', 'tags', int), ('--classes', 'classes', int),
+                            ('--churn', 'churn', float), ('--commits', 'commits', int),
+                            ('--runs', 'runs', int), ('--tool-startup', 'tool_startup_ms', float),
+                            ('--tool-cost', 'tool_cost_ms', float)):
+        if option(args, name) is not None:
+            config[key] = kind(option(args, name))
+    config['pipeline_args'] = pipeline_args
+    warm = '--warm' in args
+    output_file = option(args, '--output')
+    work_dir = option(args, '--workdir')
+    keep = '--keep' in args or work_dir is not None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="benchmark-pipeline-")
+    os.makedirs(work_dir, exist_ok=True)
+
+    os.environ['BENCH_TOOL_STARTUP_MS'] = str(config['tool_startup_ms'])
+    os.environ['BENCH_TOOL_COST_MS'] = str(config['tool_cost_ms'])
+
+    try:
+        origin_dir = os.path.join(work_dir, "origin")
+        if not os.path.exists(origin_dir):
+            print(f"Gerando repositório sintético em {origin_dir}...")
+            generate_repository(origin_dir, config['tags'], config['classes'], config['churn'],
+                                config['commits'])
+        install_stand_ins(os.path.join(work_dir, "bin"))
+
+        runs = []
+        for number in range(1, config['runs'] + 1):
+            print(f"Execução {number}/{config['runs']}...", end=" ", flush=True)
+            run = run_pipeline(work_dir, origin_dir, pipeline_args, number,
+                               fresh=not warm or number == 1)
+            print(f"{run['wall_seconds']:.1f}s" + ("" if run['returncode'] == 0
+                                                  else f" (erro {run['returncode']}, ver {run['log']})"))
+            runs.append(run)
+
+        summary = summarize(runs, config['tags'])
+        print_summary(summary, config)
+        if output_file:
+            with open(output_file, 'w') as f:
+                json.dump({'config': config, 'summary': summary,
+                           'runs': [{k: v for k, v in run.items() if k != 'stages'}
+                                    for run in runs]}, f, indent=2)
+            print(f"\n✓ Resultado salvo em {output_file}")
+        if any(run['returncode'] != 0 for run in runs):
+            sys.exit(1)
+    finally:
+        if keep:
+            print(f"\nArquivos do benchmark em {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Índice de identidade das classes entre releases (SQLite), com histórico de
+métricas e diferenças entre releases.
+Uso: class_index.py <results/projeto> [--history CLASSE] [--regressions TAG_A TAG_B]
+                    [--top TAG] [--changes TAG] [--metric MÉTRICA] [--limit N]
+                    [--rebuild]
+
+Cada classe do ck/class.csv recebe um identificador que se mantém entre as
+releases (ordenadas pela data de publicação): pelo nome qualificado e, quando
+o nome muda, pelas refatorações Rename/Move Class do RefactoringMiner
+(refactorings-all.json). O índice fica em results/<projeto>/class-index.sqlite:
+
+    releases       posição, tag, data, classes e quantas foram adicionadas,
+                   removidas, alteradas e renomeadas em relação à anterior
+    classes        identificador, primeiro e último nome, primeira e última release
+    class_names    todos os nomes (aliases) de cada classe
+    class_metrics  métricas de cada classe em cada release
+    class_deltas   por release: classes adicionadas, removidas, alteradas e
+                   renomeadas, com a diferença de cada métrica para a anterior
+
+Histórico de uma classe, maiores regressões entre duas tags quaisquer e top N
+de uma release são consultas indexadas (milissegundos mesmo com milhões de
+linhas). O índice é refeito ao fim de cada análise, só quando algum class.csv
+ou o refactorings-all.json mudou.
+"""
+
+import sys
+import os
+import csv
+import json
+import re
+import sqlite3
+
+from metrics_store import relative_path
+
+# Arquivo do índice (dentro de results/<projeto>/)
+CLASS_INDEX_FILE = "class-index.sqlite"
+
+# Muda quando o esquema muda, forçando a reconstrução
+CLASS_INDEX_VERSION = 1
+
+# Métricas do CK guardadas por classe (as ausentes no CSV ficam NULL)
+INDEX_METRICS = ('wmc', 'cbo', 'dit', 'noc', 'rfc', 'lcom', 'loc',
+                 'fanin', 'fanout', 'totalMethodsQty', 'totalFieldsQty')
+
+# Renomeações/movimentações de classe descritas pelo RefactoringMiner
+RENAME_PATTERN = re.compile(
+    r'^(?:Rename|Move|Move And Rename) Class (\S+) (?:renamed|moved|moved and renamed) to (\S+)')
+
+# Limite de passos ao seguir uma cadeia de renomeações (A -> B -> C ...)
+MAX_RENAME_CHAIN = 50
+
+SCHEMA = f"""
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE releases (
+    position INTEGER PRIMARY KEY, release TEXT UNIQUE, release_date TEXT,
+    classes INTEGER, added INTEGER, removed INTEGER, changed INTEGER, renamed INTEGER);
+CREATE TABLE classes (
+    class_id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT,
+    first_position INTEGER, last_position INTEGER);
+CREATE TABLE class_names (
+    name TEXT, class_id INTEGER, first_position INTEGER, last_position INTEGER,
+    PRIMARY KEY (name, class_id));
+CREATE TABLE class_metrics (
+    class_id INTEGER, position INTEGER, release TEXT, name TEXT, file TEXT, type TEXT,
+    {', '.join(f'"{metric}" REAL' for metric in INDEX_METRICS)});
+CREATE TABLE class_deltas (
+    position INTEGER, release TEXT, previous_release TEXT, class_id INTEGER,
+    change TEXT, name TEXT, previous_name TEXT,
+    {', '.join(f'"d_{metric}" REAL' for metric in INDEX_METRICS)});
+"""
+
+INDEXES = """
+CREATE INDEX class_metrics_by_class ON class_metrics (class_id, position);
+CREATE INDEX class_metrics_by_release ON class_metrics (release, class_id);
+CREATE INDEX class_names_by_name ON class_names (name);
+CREATE INDEX class_deltas_by_release ON class_deltas (release, change);
+"""
+
+def to_number(value):
+    """Valor numérico de uma célula do CSV (None se vazio ou inválido)."""
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+def source_stamp(path):
+    """Identifica a versão de um arquivo (tamanho + data de modificação)."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def ordered_releases(results_dir):
+    """
+    Releases com ck/class.csv, pela data de publicação (empate: nome da tag).
+
+    Returns:
+        Lista de (tag, data, diretório da release)
+    """
+    releases = []
+    for name in os.listdir(results_dir):
+        release_dir = os.path.join(results_dir, name)
+        metadata_file = os.path.join(release_dir, "metadata.json")
+        if not os.path.exists(metadata_file) or \
+                not os.path.exists(os.path.join(release_dir, "ck", "class.csv")):
+            continue
+        with open(metadata_file) as f:
+            metadata = json.load(f)
+        releases.append((metadata['tag_name'], metadata.get('published_date', ''), release_dir))
+    return sorted(releases, key=lambda release: (release[1], release[0]))
+
+def read_renames(refactorings_file):
+    """
+    Renomeações de classe do refactorings-all.json, lidas commit a commit.
+
+    Returns:
+        Dicionário nome antigo -> nome novo
+    """
+    renames = {}
+    if not os.path.exists(refactorings_file):
+        return renames
+    from refactorings_stream import iter_refactorings
+
+    for _, _, refactoring in iter_refactorings(refactorings_file):
+        match = RENAME_PATTERN.match(refactoring.get('description', ''))
+        if match and match.group(1) != match.group(2):
+            renames[match.group(1)] = match.group(2)
+    return renames
+
+def read_release_classes(release_dir):
+    """
+    Classes do ck/class.csv de uma release (a primeira linha de cada nome).
+
+    Returns:
+        Dicionário nome -> (arquivo relativo, tipo, tupla de métricas)
+    """
+    prefixes = []
+    ck_source_file = os.path.join(release_dir, "ck", ".ck-source.json")
+    if os.path.exists(ck_source_file):
+        with open(ck_source_file) as f:
+            prefixes.append(json.load(f).get('source_dir'))
+
+    classes = {}
+    with open(os.path.join(release_dir, "ck", "class.csv"), newline='',
+              encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = {name: i for i, name in enumerate(header)}
+        if 'class' not in columns:
+            return classes
+        name_col = columns['class']
+        file_col = columns.get('file')
+        type_col = columns.get('type')
+        # Colunas das métricas (None para as que não existem neste CSV)
+        metric_cols = [columns.get(metric) for metric in INDEX_METRICS]
+        for row in reader:
+            if len(row) < len(header):
+                continue
+            name = row[name_col]
+            if not name or name in classes:
+                continue
+            classes[name] = (
+                relative_path(row[file_col], prefixes) if file_col is not None else '',
+                row[type_col] if type_col is not None else None,
+                tuple(None if col is None else to_number(row[col]) for col in metric_cols))
+    return classes
+
+def follow_renames(name, renames, candidates):
+    """Primeiro nome da cadeia de renomeações de `name` que está em `candidates`."""
+    seen = {name}
+    for _ in range(MAX_RENAME_CHAIN):
+        name = renames.get(name)
+        if name is None or name in seen:
+            return None
+        if name in candidates:
+            return name
+        seen.add(name)
+    return None
+
+def metric_deltas(current, previous):
+    """Diferença de cada métrica (None quando falta um dos lados)."""
+    return tuple(None if a is None or b is None else a - b for a, b in zip(current, previous))
+
+def index_sources(results_dir):
+    """Versões dos arquivos lidos pelo índice (para saber se ele está atualizado)."""
+    sources = {tag_name: source_stamp(os.path.join(release_dir, "ck", "class.csv"))
+               for tag_name, _, release_dir in ordered_releases(results_dir)}
+    refactorings_file = os.path.join(results_dir, "refactorings-all.json")
+    if os.path.exists(refactorings_file):
+        sources['refactorings-all.json'] = source_stamp(refactorings_file)
+    return sources
+
+def is_current(index_file, sources):
+    """Se o índice existe, tem a versão atual e foi feito a partir dos mesmos arquivos."""
+    if not os.path.exists(index_file):
+        return False
+    try:
+        conn = sqlite3.connect(index_file)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return meta.get('version') == str(CLASS_INDEX_VERSION) and \
+        json.loads(meta.get('sources', 'null')) == sources
+
+def build_index(results_dir, index_file=None, force=False):
+    """
+    (Re)constrói o índice de classes de um projeto.
+
+    O índice é montado em um arquivo temporário e só então substitui o
+    anterior, então consultas concorrentes nunca veem um índice pela metade.
+
+    Returns:
+        Dicionário com releases, classes e linhas indexadas
+        (None se o índice já estava atualizado)
+    """
+    index_file = index_file or os.path.join(results_dir, CLASS_INDEX_FILE)
+    sources = index_sources(results_dir)
+    if not force and is_current(index_file, sources):
+        return None
+
+    renames = read_renames(os.path.join(results_dir, "refactorings-all.json"))
+    tmp_file = f"{index_file}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    conn = sqlite3.connect(tmp_file)
+    # Arquivo temporário: sem journal nem fsync durante a carga
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(SCHEMA)
+
+    known_ids = {}        # nome -> identificador (último dono do nome)
+    previous = {}         # identificador -> (nome, métricas) na release anterior
+    previous_tag = None
+    class_count = 0
+    row_count = 0
+    names_seen = {}       # (nome, identificador) -> [primeira, última posição]
+    class_spans = {}      # identificador -> [primeiro nome, último nome, primeira, última]
+
+    for position, (tag_name, release_date, release_dir) in enumerate(ordered_releases(results_dir)):
+        classes = read_release_classes(release_dir)
+        previous_names = {name: class_id for class_id, (name, _) in previous.items()}
+        assigned = {}
+        renamed_from = {}
+
+        # 1. Mesmo nome da release anterior
+        for name in classes:
+            if name in previous_names:
+                assigned[name] = previous_names[name]
+        # 2. Classes que sumiram e reaparecem com outro nome (Rename/Move Class)
+        unassigned = set(classes) - set(assigned)
+        for old_name, class_id in previous_names.items():
+            if old_name in classes or not unassigned:
+                continue
+            new_name = follow_renames(old_name, renames, unassigned)
+            if new_name:
+                assigned[new_name] = class_id
+                renamed_from[new_name] = old_name
+                unassigned.discard(new_name)
+        # 3. Nome já visto em uma release mais antiga; 4. classe nova
+        used = set(assigned.values())
+        for name in sorted(unassigned):
+            class_id = known_ids.get(name)
+            if class_id is None or class_id in used:
+                class_count += 1
+                class_id = class_count
+            assigned[name] = class_id
+            used.add(class_id)
+
+        current = {}
+        metric_rows = []
+        for name, (file_path, class_type, values) in classes.items():
+            class_id = assigned[name]
+            known_ids[name] = class_id
+            current[class_id] = (name, values)
+            metric_rows.append((class_id, position, tag_name, name, file_path, class_type) + values)
+            span = names_seen.setdefault((name, class_id), [position, position])
+            span[1] = position
+            spans = class_spans.setdefault(class_id, [name, name, position, position])
+            spans[1], spans[3] = name, position
+        conn.executemany(f"INSERT INTO class_metrics VALUES ({', '.join('?' * (6 + len(INDEX_METRICS)))})",
+                         metric_rows)
+        row_count += len(metric_rows)
+
+        # Diferenças para a release anterior (classes sem mudança não são gravadas)
+        counts = {'added': 0, 'removed': 0, 'changed': 0, 'renamed': 0}
+        delta_rows = []
+        empty = (None,) * len(INDEX_METRICS)
+        if previous_tag is not None:
+            for class_id, (name, values) in current.items():
+                if class_id not in previous:
+                    change, previous_name, deltas = 'added', None, empty
+                else:
+                    previous_name, previous_values = previous[class_id]
+                    if name != previous_name:
+                        change = 'renamed'
+                    elif values != previous_values:
+                        change = 'changed'
+                    else:
+                        continue
+                    deltas = metric_deltas(values, previous_values)
+                counts[change] += 1
+                delta_rows.append((position, tag_name, previous_tag, class_id, change,
+                                   name, previous_name) + deltas)
+            for class_id, (name, _) in previous.items():
+                if class_id not in current:
+                    counts['removed'] += 1
+                    delta_rows.append((position, tag_name, previous_tag, class_id, 'removed',
+                                       None, name) + empty)
+        conn.executemany(f"INSERT INTO class_deltas VALUES ({', '.join('?' * (7 + len(INDEX_METRICS)))})",
+                         delta_rows)
+        conn.execute("INSERT INTO releases VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (position, tag_name, release_date, len(classes), counts['added'],
+                      counts['removed'], counts['changed'], counts['renamed']))
+
+        previous = current
+        previous_tag = tag_name
+
+    conn.executemany("INSERT INTO class_names VALUES (?, ?, ?, ?)",
+                     [(name, class_id, first, last)
+                      for (name, class_id), (first, last) in names_seen.items()])
+    conn.executemany("INSERT INTO classes VALUES (?, ?, ?, ?, ?)",
+                     [(class_id,) + tuple(span) for class_id, span in class_spans.items()])
+    conn.executescript(INDEXES)
+    conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                     [('version', str(CLASS_INDEX_VERSION)), ('sources', json.dumps(sources))])
+    conn.commit()
+    conn.close()
+    os.replace(tmp_file, index_file)
+
+    return {'releases': 0 if previous_tag is None else position + 1,
+            'classes': class_count, 'rows': row_count, 'renames': len(renames)}
+
+def connect(index_file):
+    """Abre o índice só para leitura, com linhas acessíveis por nome de coluna."""
+    conn = sqlite3.connect(f"file:{index_file}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def check_metric(metric):
+    if metric not in INDEX_METRICS:
+        raise ValueError(f"métrica desconhecida: {metric} (use {', '.join(INDEX_METRICS)})")
+    return metric
+
+def query(index_file, sql, params=(), to_pandas=False):
+    """Executa uma consulta no índice (lista de dicionários ou DataFrame)."""
+    conn = connect(index_file)
+    try:
+        rows = [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+    if not to_pandas:
+        return rows
+    import pandas as pd
+    return pd.DataFrame(rows)
+
+def class_history(index_file, name, to_pandas=False):
+    """
+    Métricas de uma classe em todas as releases, seguindo renomeações.
+
+    Args:
+        name: qualquer nome que a classe já teve (o mais recente vence em
+              caso de reuso do nome por outra classe)
+    """
+    return query(index_file, """
+        SELECT m.* FROM class_metrics m
+        WHERE m.class_id = (SELECT class_id FROM class_names WHERE name = ?
+                            ORDER BY last_position DESC LIMIT 1)
+        ORDER BY m.position""", (name,), to_pandas)
+
+def regressions(index_file, from_release, to_release, metric='wmc', limit=10, to_pandas=False):
+    """Classes presentes nas duas releases com o maior aumento de uma métrica."""
+    metric = check_metric(metric)
+    return query(index_file, f"""
+        SELECT b.class_id, a.name AS from_name, b.name AS to_name,
+               a."{metric}" AS from_value, b."{metric}" AS to_value,
+               b."{metric}" - a."{metric}" AS delta
+        FROM class_metrics a JOIN class_metrics b ON b.class_id = a.class_id
+        WHERE a.release = ? AND b.release = ? AND b."{metric}" > a."{metric}"
+        ORDER BY delta DESC LIMIT ?""", (from_release, to_release, limit), to_pandas)
+
+def top_classes(index_file, release, metric='wmc', limit=10, to_pandas=False):
+    """As `limit` classes com o maior valor de uma métrica em uma release."""
+    metric = check_metric(metric)
+    return query(index_file, f"""
+        SELECT * FROM class_metrics WHERE release = ?
+        ORDER BY "{metric}" DESC LIMIT ?""", (release, limit), to_pandas)
+
+def release_changes(index_file, release, change=None, to_pandas=False):
+    """Diferenças de uma release para a anterior (added/removed/changed/renamed)."""
+    sql = "SELECT * FROM class_deltas WHERE release = ?"
+    params = (release,)
+    if change:
+        sql += " AND change = ?"
+        params += (change,)
+    return query(index_file, sql + " ORDER BY change, class_id", params, to_pandas)
+
+def release_summary(index_file, to_pandas=False):
+    """Uma linha por release: classes, adicionadas, removidas, alteradas e renomeadas."""
+    return query(index_file, "SELECT * FROM releases ORDER BY position", (), to_pandas)
+
+def format_value(value):
+    if value is None:
+        return '-'
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: class_index.py <results/projeto> [--history CLASSE] "
+              "[--regressions TAG_A TAG_B]")
+        print("                    [--top TAG] [--changes TAG] [--metric MÉTRICA] "
+              "[--limit N] [--rebuild]")
+        print("\nExemplo:")
+        print("  class_index.py /workspace/results/jsoup --history org.jsoup.nodes.Element")
+        print("  class_index.py /workspace/results/jsoup --regressions jsoup-1.14.1 "
+              "jsoup-1.15.1 --metric cbo")
+        print(f"\nAtualiza {CLASS_INDEX_FILE} e responde à consulta pedida.")
+        sys.exit(1)
+
+    results_dir = sys.argv[1]
+    metric = 'wmc'
+    limit = 10
+    if '--metric' in sys.argv:
+        metric = sys.argv[sys.argv.index('--metric') + 1]
+    if '--limit' in sys.argv:
+        limit = int(sys.argv[sys.argv.index('--limit') + 1])
+
+    if not os.path.isdir(results_dir):
+        print(f"Erro: diretório não encontrado: {results_dir}")
+        sys.exit(1)
+    if metric not in INDEX_METRICS:
+        print(f"Erro: --metric aceita {', '.join(INDEX_METRICS)}")
+        sys.exit(1)
+
+    index_file = os.path.join(results_dir, CLASS_INDEX_FILE)
+    built = build_index(results_dir, index_file, force='--rebuild' in sys.argv)
+    if built:
+        print(f"✓ Índice atualizado: {built['classes']} classes, {built['rows']} linhas "
+              f"em {built['releases']} releases ({built['renames']} renomeações)")
+
+    if '--history' in sys.argv:
+        name = sys.argv[sys.argv.index('--history') + 1]
+        rows = class_history(index_file, name)
+        if not rows:
+            print(f"Classe não encontrada: {name}")
+            sys.exit(1)
+        print(f"\nHistórico de {name}:")
+        print(f"{'Release':30s} {'Nome':50s} " + " ".join(f"{m:>7s}" for m in INDEX_METRICS[:7]))
+        for row in rows:
+            print(f"{row['release']:30s} {row['name']:50s} " +
+                  " ".join(f"{format_value(row[m]):>7s}" for m in INDEX_METRICS[:7]))
+    elif '--regressions' in sys.argv:
+        idx = sys.argv.index('--regressions')
+        from_release, to_release = sys.argv[idx + 1], sys.argv[idx + 2]
+        print(f"\nMaiores aumentos de {metric}: {from_release} → {to_release}")
+        for row in regressions(index_file, from_release, to_release, metric, limit):
+            print(f"  {row['delta']:+8g}  {row['to_name']} "
+                  f"({format_value(row['from_value'])} → {format_value(row['to_value'])})")
+    elif '--top' in sys.argv:
+        release = sys.argv[sys.argv.index('--top') + 1]
+        print(f"\nTop {limit} por {metric} em {release}:")
+        for row in top_classes(index_file, release, metric, limit):
+            print(f"  {format_value(row[metric]):>8s}  {row['name']}")
+    elif '--changes' in sys.argv:
+        release = sys.argv[sys.argv.index('--changes') + 1]
+        for row in release_changes(index_file, release):
+            detail = row['name'] or row['previous_name']
+            if row['change'] == 'renamed':
+                detail = f"{row['previous_name']} → {row['name']}"
+            print(f"  {row['change']:8s} {detail}")
+    else:
+        print(f"\n{'Release':30s} {'classes':>8s} {'+':>6s} {'-':>6s} {'alt.':>6s} {'ren.':>6s}")
+        for row in release_summary(index_file):
+            print(f"{row['release']:30s} {row['classes']:8d} {row['added']:6d} "
+                  f"{row['removed']:6d} {row['changed']:6d} {row['renamed']:6d}")
+
+if __name__ == '__main__':
+    main()
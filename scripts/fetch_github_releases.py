@@ -2,14 +2,160 @@
 """
 Script para buscar releases do GitHub de qualquer repositório.
 Uso: fetch_github_releases.py <owner/repo> [--min-releases N] [--output formato]
+                              [--cache-dir DIR] [--max-age SEGUNDOS] [--no-cache]
+                              [--api-url URL] [--offline --repo-dir DIR]
+
+Todas as páginas da API são buscadas (a primeira indica o total no header Link;
+as demais vão em paralelo, em uma sessão HTTP com pool de conexões). Cada página
+fica em cache no disco com o ETag da resposta: dentro de --max-age o cache é
+usado sem acessar a rede e, depois disso, a página é revalidada com
+If-None-Match (respostas 304 não contam no rate limit da API).
+
+Com --offline nada é buscado na rede: as releases são as tags do clone local
+(--repo-dir), com a data de cada tag.
 """
 
 import sys
+import os
+import re
 import json
+import time
+import hashlib
+import subprocess
 import requests
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# URL da API (GITHUB_API_URL permite apontar para GitHub Enterprise ou um servidor local)
+API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+
+# Releases por página (máximo aceito pela API)
+PER_PAGE = 100
+
+# Requisições simultâneas para as páginas 2..N
+FETCH_WORKERS = 4
+
+# Cache das respostas da API e validade (segundos) antes de revalidar
+CACHE_DIR = os.environ.get(
+    'GITHUB_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'fetch-github-releases'))
+CACHE_MAX_AGE = 600
+
+LINK_RE = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+PAGE_RE = re.compile(r'[?&]page=(\d+)')
+
+def last_page(link_header):
+    """Número da última página indicado no header Link (1 se não houver)."""
+    for url, rel in LINK_RE.findall(link_header or ''):
+        if rel == 'last':
+            match = PAGE_RE.search(url)
+            if match:
+                return int(match.group(1))
+    return 1
+
+def cache_file(cache_dir, url):
+    """Arquivo de cache de uma URL (hash da URL, com a query)."""
+    return os.path.join(cache_dir, hashlib.sha256(url.encode()).hexdigest()[:32] + '.json')
+
+def read_cache(cache_dir, url):
+    """Entrada de cache de uma URL (None se ausente ou corrompida)."""
+    if not cache_dir:
+        return None
+    try:
+        with open(cache_file(cache_dir, url)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cache(cache_dir, url, entry):
+    """Grava a entrada de cache com rename atômico (vários processos podem ler)."""
+    if not cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    target = cache_file(cache_dir, url)
+    tmp_file = f"{target}.tmp-{os.getpid()}"
+    with open(tmp_file, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_file, target)
 
-def fetch_releases(owner, repo, min_releases=20):
+def fetch_page(session, url, cache_dir=None, max_age=CACHE_MAX_AGE):
+    """
+    Busca uma página da API, usando o cache quando possível.
+
+    Returns:
+        (lista de releases da página, número da última página)
+    """
+    cached = read_cache(cache_dir, url)
+    if cached and time.time() - cached.get('fetched_at', 0) < max_age:
+        return cached['body'], cached.get('last_page', 1)
+
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+
+    try:
+        response = session.get(url, headers=headers, timeout=30)
+        if response.status_code == 304 and cached:
+            cached['fetched_at'] = time.time()
+            write_cache(cache_dir, url, cached)
+            return cached['body'], cached.get('last_page', 1)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        # Sem rede ou rate limit esgotado: resposta anterior é melhor que nada
+        if cached:
+            print(f"Aviso: usando cache de {url} ({e})", file=sys.stderr)
+            return cached['body'], cached.get('last_page', 1)
+        raise
+
+    entry = {
+        'etag': response.headers.get('ETag'),
+        'last_page': last_page(response.headers.get('Link')),
+        'fetched_at': time.time(),
+        'body': response.json(),
+    }
+    write_cache(cache_dir, url, entry)
+    return entry['body'], entry['last_page']
+
+def create_session(workers=FETCH_WORKERS):
+    """Sessão HTTP com pool de conexões do tamanho do paralelismo."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Accept'] = 'application/vnd.github+json'
+    # Token opcional: 5000 requisições/hora em vez de 60
+    token = os.environ.get('GITHUB_TOKEN')
+    if token:
+        session.headers['Authorization'] = f"Bearer {token}"
+    return session
+
+def format_releases(releases):
+    """Filtra drafts/pre-releases e ordena por data (mais antiga primeiro)."""
+    # Filtrar releases válidas (não drafts, não pre-releases)
+    valid_releases = [
+        r for r in releases
+        if not r.get('draft', False) and not r.get('prerelease', False)
+    ]
+
+    # Ordenar por data de publicação (mais antiga primeiro)
+    valid_releases.sort(key=lambda r: r['published_at'])
+
+    result = []
+    for release in valid_releases:
+        result.append({
+            'tag_name': release['tag_name'],
+            'name': release.get('name', release['tag_name']),
+            'published_at': release['published_at'],
+            'published_date': datetime.strptime(
+                release['published_at'],
+                '%Y-%m-%dT%H:%M:%SZ'
+            ).strftime('%Y-%m-%d'),
+            'url': release['html_url']
+        })
+
+    return result
+
+def fetch_releases(owner, repo, min_releases=20, api_url=API_URL, cache_dir=CACHE_DIR,
+                   max_age=CACHE_MAX_AGE):
     """
     Busca releases de um repositório GitHub via API.
 
@@ -17,46 +163,66 @@ def fetch_releases(owner, repo, min_releases=20):
         owner: Dono do repositório (ex: 'jhy')
         repo: Nome do repositório (ex: 'jsoup')
         min_releases: Número mínimo de releases esperadas
+        api_url: URL base da API
+        cache_dir: Diretório do cache de respostas (None desliga o cache)
+        max_age: Segundos em que o cache é usado sem revalidar
 
     Returns:
         Lista de dicionários com informações das releases
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/releases"
-    params = {"per_page": 100}
+    base_url = f"{api_url.rstrip('/')}/repos/{owner}/{repo}/releases"
+    if cache_dir:
+        cache_dir = os.path.join(cache_dir, owner, repo)
+
+    def page_url(page):
+        return f"{base_url}?per_page={PER_PAGE}&page={page}"
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        releases = response.json()
-
-        # Filtrar releases válidas (não drafts, não pre-releases)
-        valid_releases = [
-            r for r in releases
-            if not r.get('draft', False) and not r.get('prerelease', False)
-        ]
-
-        # Ordenar por data de publicação (mais antiga primeiro)
-        valid_releases.sort(key=lambda r: r['published_at'])
-
-        result = []
-        for release in valid_releases:
-            result.append({
-                'tag_name': release['tag_name'],
-                'name': release.get('name', release['tag_name']),
-                'published_at': release['published_at'],
-                'published_date': datetime.strptime(
-                    release['published_at'],
-                    '%Y-%m-%dT%H:%M:%SZ'
-                ).strftime('%Y-%m-%d'),
-                'url': release['html_url']
-            })
-
-        return result
+        with create_session() as session:
+            releases, pages = fetch_page(session, page_url(1), cache_dir, max_age)
+            if pages > 1:
+                with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+                    results = executor.map(
+                        lambda page: fetch_page(session, page_url(page), cache_dir, max_age)[0],
+                        range(2, pages + 1))
+                    for page_releases in results:
+                        releases.extend(page_releases)
+
+        return format_releases(releases)
 
     except requests.exceptions.RequestException as e:
         print(f"Erro ao buscar releases: {e}", file=sys.stderr)
         sys.exit(1)
 
+def local_releases(repo_dir):
+    """
+    Releases derivadas das tags do clone local (modo offline).
+
+    A data de cada release é a da tag anotada ou, em tags leves, a do commit.
+    """
+    cmd = ['git', 'for-each-ref', '--sort=creatordate',
+           '--format=%(refname:short)%09%(creatordate:unix)', 'refs/tags']
+    result = subprocess.run(cmd, cwd=repo_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Erro ao ler tags de {repo_dir}: {result.stderr.strip()}", file=sys.stderr)
+        sys.exit(1)
+
+    releases = []
+    for line in result.stdout.splitlines():
+        tag_name, _, timestamp = line.partition('\t')
+        if not timestamp:
+            continue
+        published = datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+        releases.append({
+            'tag_name': tag_name,
+            'name': tag_name,
+            'published_at': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'published_date': published.strftime('%Y-%m-%d'),
+            'url': ''
+        })
+
+    return releases
+
 def print_releases(releases, format='text', min_releases=None):
     """Imprime releases no formato especificado."""
 
@@ -85,21 +251,39 @@ def print_releases(releases, format='text', min_releases=None):
 def main():
     if len(sys.argv) < 2:
         print("Uso: fetch_github_releases.py <owner/repo> [--min-releases N] [--output formato]")
+        print("                              [--cache-dir DIR] [--max-age SEGUNDOS] [--no-cache]")
+        print("                              [--api-url URL] [--offline --repo-dir DIR]")
         print("\nFormatos disponíveis: text, json, csv, tags")
         print("\nExemplo:")
         print("  fetch_github_releases.py jhy/jsoup --min-releases 20 --output json")
+        print("  fetch_github_releases.py jhy/jsoup --offline --repo-dir /workspace/projects/jsoup")
         sys.exit(1)
 
     # Parse argumentos
     repo_path = sys.argv[1]
     min_releases = 20
     output_format = 'text'
+    api_url = API_URL
+    cache_dir = CACHE_DIR
+    max_age = CACHE_MAX_AGE
+    repo_dir = None
 
     for i in range(2, len(sys.argv)):
         if sys.argv[i] == '--min-releases' and i + 1 < len(sys.argv):
             min_releases = int(sys.argv[i + 1])
         elif sys.argv[i] == '--output' and i + 1 < len(sys.argv):
             output_format = sys.argv[i + 1]
+        elif sys.argv[i] == '--api-url' and i + 1 < len(sys.argv):
+            api_url = sys.argv[i + 1]
+        elif sys.argv[i] == '--cache-dir' and i + 1 < len(sys.argv):
+            cache_dir = sys.argv[i + 1]
+        elif sys.argv[i] == '--max-age' and i + 1 < len(sys.argv):
+            max_age = int(sys.argv[i + 1])
+        elif sys.argv[i] == '--repo-dir' and i + 1 < len(sys.argv):
+            repo_dir = sys.argv[i + 1]
+
+    if '--no-cache' in sys.argv:
+        cache_dir = None
 
     # Validar formato do repositório
     if '/' not in repo_path:
@@ -109,7 +293,13 @@ def main():
     owner, repo = repo_path.split('/', 1)
 
     # Buscar releases
-    releases = fetch_releases(owner, repo, min_releases)
+    if '--offline' in sys.argv:
+        if not repo_dir or not os.path.isdir(repo_dir):
+            print("Erro: --offline requer --repo-dir com o clone do repositório", file=sys.stderr)
+            sys.exit(1)
+        releases = local_releases(repo_dir)
+    else:
+        releases = fetch_releases(owner, repo, min_releases, api_url, cache_dir, max_age)
 
     # Imprimir resultado
     print_releases(releases, output_format, min_releases)
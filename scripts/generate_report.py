@@ -0,0 +1,882 @@
+#!/usr/bin/env python3
+"""
+Relatório de um projeto analisado (figuras, CSVs e resumos JSON), sem Jupyter.
+Uso: generate_report.py <projeto | owner/repo | results/projeto> [--jobs N] [--force]
+
+Gera em results/<projeto>/ os mesmos arquivos das seções do
+analyze_metrics.ipynb:
+
+    CK             metrics_summary.csv, growth_rates.csv, metrics_evolution.png,
+                   metrics_distribution.png, correlation_matrix.png
+    PMD            pmd_all_releases.csv, pmd_<release>.csv, pmd_critical_all.csv,
+                   pmd_summary.json, pmd_analysis.png
+    SpotBugs       bugs_all_releases.csv, bugs_<release>.csv, security_bugs_all.csv,
+                   critical_bugs_all.csv, bugs_summary.json, bugs_evolution.png,
+                   security_bugs.png
+    Refatorações   top_refactored_files.csv, top_refactored_classes.csv,
+                   class_refactoring_heatmap.csv, refactorings_categories.csv,
+                   problematic_classes_refactorings.csv, refactorings_summary.json
+                   e as figuras refactorings_*.png
+
+Os dados são carregados uma vez (metrics-store, agregados e tabelas Parquet
+quando existem, senão os CSVs/XML/JSON de cada release), e os dados de cada
+figura são preparados no processo principal. As figuras independentes são
+desenhadas em paralelo (backend Agg, uma por processo, até --jobs).
+
+Cada figura e cada CSV guarda em report-cache.json o hash dos seus dados de
+entrada: enquanto eles não mudam e o arquivo existe, a saída é pulada (o
+savefig com dpi=300 é a parte cara). --force refaz tudo.
+"""
+
+import sys
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from metrics_store import load as load_store_table, STORE_DIR
+from metric_sketches import load_trend
+from refactorings_stream import iter_commits, PARQUET_DIR
+from spotbugs_stream import load_bugs
+
+WORKSPACE_DIR = os.environ.get('WORKSPACE_DIR', '/workspace')
+
+# Hashes das saídas já geradas (dentro de results/<projeto>/)
+REPORT_CACHE_FILE = "report-cache.json"
+
+# Muda quando o desenho de alguma figura muda, invalidando o cache
+REPORT_VERSION = 1
+
+# Resolução das figuras, como no notebook
+FIGURE_DPI = 300
+
+CK_METRICS = ['wmc', 'dit', 'noc', 'cbo', 'lcom', 'rfc', 'loc']
+
+# Estatísticas por release (metrics_summary.csv)
+RELEASE_STATS = {
+    'wmc': ['mean', 'median', 'std', 'max'],
+    'dit': ['mean', 'median', 'std', 'max'],
+    'noc': ['mean', 'median', 'std', 'max'],
+    'cbo': ['mean', 'median', 'std', 'max'],
+    'lcom': ['mean', 'median', 'std', 'max'],
+    'rfc': ['mean', 'median', 'std', 'max'],
+    'loc': ['sum', 'mean', 'median', 'std']
+}
+
+SPOTBUGS_FIELDS = ['type', 'priority', 'rank', 'category', 'abbrev', 'class', 'method', 'description']
+
+def setup_style():
+    """Estilo das figuras do notebook (também em cada processo do pool)."""
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+
+def data_hash(*values):
+    """
+    Hash dos dados de entrada de uma saída: DataFrames/Series pelo conteúdo
+    (pd.util.hash_pandas_object), rótulos e demais valores pelo repr.
+    """
+    digest = hashlib.sha256(f"{REPORT_VERSION}\n".encode('utf-8'))
+
+    def update(value):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            labels = list(value.columns) if isinstance(value, pd.DataFrame) else value.name
+            digest.update(repr((type(value).__name__, labels,
+                                list(value.index.names))).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                digest.update(repr(key).encode('utf-8'))
+                update(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                update(item)
+        else:
+            digest.update(repr(value).encode('utf-8'))
+        digest.update(b"\0")
+
+    for value in values:
+        update(value)
+    return digest.hexdigest()
+
+def render_figure(function_name, args, output_file):
+    """
+    Desenha uma figura (executa no pool). Grava em um arquivo temporário e
+    renomeia, para que uma execução interrompida não deixe um PNG truncado
+    com o hash de um completo.
+    """
+    fig = globals()[function_name](*args)
+    partial = f"{output_file}.partial"
+    try:
+        fig.savefig(partial, format='png', dpi=FIGURE_DPI, bbox_inches='tight')
+        os.replace(partial, output_file)
+    finally:
+        plt.close(fig)
+        if os.path.exists(partial):
+            os.remove(partial)
+    return output_file
+
+class Report:
+    """Saídas de um relatório, puladas quando o hash dos dados não mudou."""
+
+    def __init__(self, results_dir, force=False):
+        self.results_dir = results_dir
+        self.force = force
+        self.cache_file = os.path.join(results_dir, REPORT_CACHE_FILE)
+        self.cache = {}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file) as f:
+                    cache = json.load(f)
+                if cache.get('version') == REPORT_VERSION:
+                    self.cache = cache.get('outputs', {})
+            except (OSError, ValueError):
+                pass
+        self.figures = []
+        self.written = []
+        self.skipped = []
+        self.failed = []
+
+    def path(self, name):
+        return os.path.join(self.results_dir, name)
+
+    def is_current(self, name, digest):
+        return not self.force and self.cache.get(name) == digest and \
+            os.path.exists(self.path(name))
+
+    def csv(self, name, frame, **kwargs):
+        """Exporta um DataFrame/Series (to_csv), se os dados mudaram."""
+        digest = data_hash(frame, kwargs)
+        if self.is_current(name, digest):
+            self.skipped.append(name)
+            return
+        partial = f"{self.path(name)}.partial"
+        frame.to_csv(partial, **kwargs)
+        os.replace(partial, self.path(name))
+        self.cache[name] = digest
+        self.written.append(name)
+
+    def json(self, name, data):
+        """Grava um resumo JSON (pequeno; sempre regravado)."""
+        with open(self.path(name), 'w') as f:
+            json.dump(data, f, indent=2)
+        self.written.append(name)
+
+    def figure(self, name, function, *args):
+        """Agenda uma figura: function(*args) -> Figure, se os dados mudaram."""
+        digest = data_hash(function.__name__, *args)
+        if self.is_current(name, digest):
+            self.skipped.append(name)
+            return
+        self.figures.append((name, function.__name__, args, digest))
+
+    def render(self, jobs=1):
+        """Desenha as figuras agendadas, até `jobs` processos ao mesmo tempo."""
+        if not self.figures:
+            return
+        print(f"Desenhando {len(self.figures)} figura(s) com até {jobs} processo(s)...")
+        if jobs <= 1 or len(self.figures) == 1:
+            setup_style()
+            outcomes = []
+            for name, function_name, args, _ in self.figures:
+                try:
+                    render_figure(function_name, args, self.path(name))
+                    outcomes.append(None)
+                except Exception as e:
+                    outcomes.append(e)
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(self.figures)),
+                                     initializer=setup_style) as executor:
+                futures = [executor.submit(render_figure, function_name, args, self.path(name))
+                           for name, function_name, args, _ in self.figures]
+                outcomes = [future.exception() for future in futures]
+
+        for (name, _, _, digest), error in zip(self.figures, outcomes):
+            if error is None:
+                self.cache[name] = digest
+                self.written.append(name)
+                print(f"  ✓ {name}")
+            else:
+                self.failed.append(name)
+                print(f"  ✗ {name}: {error}")
+        self.figures = []
+
+    def save(self):
+        partial = f"{self.cache_file}.partial"
+        with open(partial, 'w') as f:
+            json.dump({'version': REPORT_VERSION, 'outputs': self.cache}, f, indent=2)
+        os.replace(partial, self.cache_file)
+
+# Carregamento dos dados (mesmas fontes e fallbacks do notebook)
+
+def release_dirs(results_dir):
+    """Diretórios das releases analisadas (com metadata.json), por nome."""
+    return sorted(os.path.join(results_dir, name) for name in os.listdir(results_dir)
+                  if os.path.exists(os.path.join(results_dir, name, 'metadata.json')))
+
+def release_date(release_dir):
+    with open(os.path.join(release_dir, 'metadata.json')) as f:
+        return json.load(f).get('published_date', '')
+
+def load_metrics_table(results_dir, table, **kwargs):
+    """Carrega uma tabela do metrics-store (ou None se indisponível)."""
+    if not os.path.isdir(os.path.join(results_dir, STORE_DIR, table)):
+        return None
+    try:
+        df = load_store_table(os.path.join(results_dir, STORE_DIR), table, **kwargs)
+    except ImportError:
+        return None
+    # Colunas dictionary viram texto comum, como nos CSVs
+    for column in df.select_dtypes('category').columns:
+        df[column] = df[column].astype(str)
+    return df
+
+def load_release_csvs(results_dir, relative_file):
+    """Concatena um CSV de cada release, com as colunas release e release_date."""
+    frames = []
+    for release_dir in release_dirs(results_dir):
+        csv_file = os.path.join(release_dir, relative_file)
+        if not os.path.exists(csv_file):
+            continue
+        try:
+            df = pd.read_csv(csv_file)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            print(f"✗ {os.path.basename(release_dir)}: erro ao ler {relative_file} - {e}")
+            continue
+        df['release'] = os.path.basename(release_dir)
+        df['release_date'] = release_date(release_dir)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def load_ck(results_dir):
+    df = load_metrics_table(results_dir, 'ck_class')
+    return df if df is not None else load_release_csvs(results_dir, os.path.join('ck', 'class.csv'))
+
+def load_pmd(results_dir):
+    df = load_metrics_table(results_dir, 'pmd')
+    return df if df is not None else load_release_csvs(results_dir, 'pmd-report.csv')
+
+def load_spotbugs(results_dir):
+    df = load_metrics_table(results_dir, 'spotbugs', columns=SPOTBUGS_FIELDS + ['release', 'release_date'])
+    if df is None:
+        bugs = []
+        for release_dir in release_dirs(results_dir):
+            xml_file = os.path.join(release_dir, 'spotbugs-report.xml')
+            if not os.path.exists(xml_file):
+                continue
+            date = release_date(release_dir)
+            for bug in load_bugs(xml_file, os.path.basename(release_dir)):
+                record = {field: bug[field] for field in SPOTBUGS_FIELDS}
+                record['release'] = bug['release']
+                record['release_date'] = date
+                bugs.append(record)
+        df = pd.DataFrame(bugs)
+    if not df.empty:
+        df['priority_label'] = df['priority'].map({1: 'HIGH', 2: 'MEDIUM', 3: 'LOW'})
+    return df
+
+def load_refactorings(results_dir):
+    """
+    Refatorações por commit e localizações em arquivos/classes.
+
+    Returns:
+        (df_refs, df_file_refs, df_class_refs, total_commits, commits_with_refs)
+    """
+    parquet_dir = os.path.join(results_dir, PARQUET_DIR)
+    refactoring_file = os.path.join(results_dir, 'refactorings-all.json')
+
+    if os.path.exists(os.path.join(parquet_dir, 'refactorings.parquet')):
+        commits = pd.read_parquet(os.path.join(parquet_dir, 'commits.parquet'))
+        df_refs = pd.read_parquet(os.path.join(parquet_dir, 'refactorings.parquet'),
+                                  columns=['commit', 'type', 'description'])
+        locations = pd.read_parquet(os.path.join(parquet_dir, 'locations.parquet'),
+                                    columns=['commit', 'type', 'file_path',
+                                             'code_element_type', 'code_element'])
+        df_file_refs = locations[locations['file_path'].fillna('') != ''] \
+            .rename(columns={'file_path': 'file'})[['file', 'type', 'commit']] \
+            .reset_index(drop=True)
+        df_class_refs = locations[(locations['code_element_type'] == 'TYPE_DECLARATION') &
+                                  (locations['code_element'].fillna('') != '')] \
+            .rename(columns={'code_element': 'class'})[['class', 'type', 'commit']] \
+            .reset_index(drop=True)
+        return (df_refs, df_file_refs, df_class_refs, len(commits),
+                int((commits['refactorings'] > 0).sum()))
+
+    if not os.path.exists(refactoring_file):
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), 0, 0
+
+    # Sem as tabelas: lê o JSON um commit por vez, numa única passada
+    refs, file_refs, class_refs = [], [], []
+    total_commits = commits_with_refs = 0
+    for commit in iter_commits(refactoring_file):
+        total_commits += 1
+        sha = commit.get('sha1')
+        ref_list = commit.get('refactorings', [])
+        if ref_list:
+            commits_with_refs += 1
+        for ref in ref_list:
+            ref_type = ref.get('type', '')
+            refs.append({'commit': sha, 'type': ref.get('type'),
+                         'description': ref.get('description')})
+            locations = ref.get('leftSideLocations', []) + ref.get('rightSideLocations', [])
+            for loc in locations:
+                if loc.get('filePath', ''):
+                    file_refs.append({'file': loc['filePath'], 'type': ref_type, 'commit': sha})
+            for loc in locations:
+                code_elem = loc.get('codeElement', '')
+                if code_elem and loc.get('codeElementType') == 'TYPE_DECLARATION':
+                    class_refs.append({'class': code_elem, 'type': ref_type, 'commit': sha})
+    return (pd.DataFrame(refs), pd.DataFrame(file_refs), pd.DataFrame(class_refs),
+            total_commits, commits_with_refs)
+
+def refactoring_category(ref_type):
+    """Categoria de uma refatoração (baseada no catálogo de Fowler)."""
+    ref_type_lower = ref_type.lower()
+    if any(x in ref_type_lower for x in ['extract method', 'inline method', 'move method',
+                                         'rename method', 'change method', 'add parameter',
+                                         'remove parameter', 'parameterize']):
+        return 'Métodos'
+    elif any(x in ref_type_lower for x in ['extract class', 'inline class', 'move class',
+                                           'rename class', 'change class', 'split class']):
+        return 'Classes'
+    elif any(x in ref_type_lower for x in ['extract variable', 'inline variable', 'rename variable',
+                                           'rename attribute', 'rename parameter',
+                                           'encapsulate', 'field', 'attribute']):
+        return 'Variáveis/Atributos'
+    elif any(x in ref_type_lower for x in ['pull up', 'push down', 'extract interface',
+                                           'extract superclass', 'collapse hierarchy']):
+        return 'Hierarquia'
+    elif any(x in ref_type_lower for x in ['move', 'rename package']):
+        return 'Pacotes'
+    else:
+        return 'Outros'
+
+# Figuras: recebem só os dados já preparados e retornam a Figure
+
+def plot_series(ax, series, title, ylabel, **kwargs):
+    series.plot(ax=ax, linewidth=2, **kwargs)
+    ax.set_title(title)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+
+def plot_with_mean(ax, series, title, ylabel, color):
+    plot_series(ax, series, title, ylabel, marker='o', color=color)
+    ax.axhline(y=series.mean(), color='orange', linestyle='--', label=f'Média: {series.mean():.1f}')
+    ax.legend()
+
+def figure_metrics_evolution(metrics_by_release):
+    fig = plt.figure(figsize=(18, 12))
+    fig.suptitle('Evolução das 7 Métricas CK', fontsize=16, fontweight='bold')
+    panels = [
+        (('wmc', 'mean'), 'o', 'blue', 'WMC - Complexidade', 'WMC Médio'),
+        (('dit', 'mean'), 's', 'orange', 'DIT - Herança', 'DIT Médio'),
+        (('noc', 'mean'), '^', 'brown', 'NOC - Filhos', 'NOC Médio'),
+        (('cbo', 'mean'), 'D', 'green', 'CBO - Acoplamento', 'CBO Médio'),
+        (('lcom', 'mean'), 'v', 'red', 'LCOM - Coesão', 'LCOM Médio'),
+        (('rfc', 'mean'), '*', 'cyan', 'RFC - Response', 'RFC Médio'),
+        (('loc', 'sum'), 'p', 'purple', 'LOC - Linhas (Total)', 'LOC Total'),
+    ]
+    for i, (column, marker, color, title, ylabel) in enumerate(panels, 1):
+        ax = plt.subplot(3, 3, i)
+        plot_series(ax, metrics_by_release[column], title, ylabel, marker=marker, color=color)
+    plt.tight_layout()
+    return fig
+
+def figure_metrics_distribution(df_metrics):
+    fig = plt.figure(figsize=(20, 12))
+    titles = ['WMC (Complexidade)', 'DIT (Herança)', 'NOC (Filhos)',
+              'CBO (Acoplamento)', 'LCOM (Coesão)', 'RFC (Response)', 'LOC (Linhas)']
+    for i, (metric, title) in enumerate(zip(CK_METRICS, titles), 1):
+        ax = plt.subplot(3, 3, i)
+        df_metrics.boxplot(column=metric, by='release', ax=ax, rot=45)
+        ax.set_title(title)
+        ax.set_xlabel('')
+        ax.get_figure().suptitle('')  # Remove título automático
+    plt.suptitle('Distribuição das 7 Métricas CK por Release - Boxplots',
+                 fontsize=16, fontweight='bold', y=0.995)
+    plt.tight_layout()
+    return fig
+
+def figure_correlation_matrix(corr_matrix):
+    fig = plt.figure(figsize=(10, 8))
+    sns.heatmap(corr_matrix, annot=True, fmt='.2f', cmap='coolwarm', center=0,
+                square=True, linewidths=1, cbar_kws={"shrink": 0.8})
+    plt.title('Matriz de Correlação entre Métricas CK', fontsize=14, fontweight='bold', pad=20)
+    plt.tight_layout()
+    return fig
+
+def figure_pmd_analysis(total_problems, priority_dist, priority_evolution, top_rules, latest):
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('Análise PMD - Evolução e Distribuição', fontsize=16, fontweight='bold')
+
+    plot_with_mean(axes[0, 0], total_problems, 'Total de Problemas por Release', 'Quantidade',
+                   'purple')
+
+    colors = ['#ff4444', '#ff8844', '#ffcc44', '#88cc44']
+    priority_dist.plot(kind='pie', ax=axes[0, 1], autopct='%1.1f%%',
+                       colors=colors[:len(priority_dist)],
+                       labels=[f'Priority {p}' for p in priority_dist.index], startangle=90)
+    axes[0, 1].set_title('Distribuição por Prioridade (Geral)')
+    axes[0, 1].set_ylabel('')
+
+    plot_series(axes[1, 0], priority_evolution, 'Evolução por Prioridade', 'Quantidade', marker='o')
+    axes[1, 0].legend(title='Priority', labels=[f'Priority {p}' for p in priority_evolution.columns])
+
+    top_rules.plot(kind='barh', ax=axes[1, 1], color='darkviolet')
+    axes[1, 1].set_title(f'Top 10 Regras Violadas ({latest})')
+    axes[1, 1].set_xlabel('Quantidade')
+    axes[1, 1].invert_yaxis()
+
+    plt.tight_layout()
+    return fig
+
+def figure_bugs_evolution(total_bugs, category_evolution, priority_evolution, top_types, latest):
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('Evolução dos Bugs ao Longo das Releases', fontsize=16, fontweight='bold')
+
+    plot_with_mean(axes[0, 0], total_bugs, 'Total de Bugs por Release', 'Quantidade de Bugs', 'red')
+
+    plot_series(axes[0, 1], category_evolution, 'Evolução das Top 5 Categorias',
+                'Quantidade de Bugs', marker='o')
+    axes[0, 1].legend(title='Categoria', bbox_to_anchor=(1.05, 1), loc='upper left')
+
+    plot_series(axes[1, 0], priority_evolution, 'Evolução por Prioridade', 'Quantidade de Bugs',
+                marker='o', color=['#ff4444', '#ffaa44'])
+    axes[1, 0].legend(title='Prioridade')
+
+    top_types.plot(kind='barh', ax=axes[1, 1], color='steelblue')
+    axes[1, 1].set_title(f'Top 10 Tipos de Bugs ({latest})')
+    axes[1, 1].set_xlabel('Quantidade')
+
+    plt.tight_layout()
+    return fig
+
+def figure_security_bugs(security_by_release, top_types, latest):
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    fig.suptitle('Análise de Bugs de Segurança', fontsize=16, fontweight='bold')
+
+    plot_with_mean(axes[0], security_by_release, 'Evolução de Bugs de Segurança', 'Quantidade',
+                   'darkred')
+
+    top_types.plot(kind='barh', ax=axes[1], color='crimson')
+    axes[1].set_title(f'Top 10 Vulnerabilidades ({latest})')
+    axes[1].set_xlabel('Quantidade')
+
+    plt.tight_layout()
+    return fig
+
+def figure_refactorings_by_file(top_files, top5_types):
+    fig = plt.figure(figsize=(18, 14))
+    fig.suptitle('Análise de Arquivos Refatorados', fontsize=16, fontweight='bold', y=0.995)
+
+    # Coluna esquerda: top 10 arquivos (nomes longos truncados)
+    ax1 = plt.subplot(1, 2, 1)
+    top_files_display = top_files.copy()
+    top_files_display.index = [f.split('/')[-1] if len(f) > 40 else f for f in top_files_display.index]
+    top_files_display.plot(kind='barh', ax=ax1, color='steelblue')
+    ax1.set_title('Top 10 Arquivos Mais Refatorados', fontsize=12, fontweight='bold')
+    ax1.set_xlabel('Quantidade de Refatorações')
+    ax1.invert_yaxis()
+    ax1.grid(True, alpha=0.3, axis='x')
+
+    # Coluna direita: tipos de refatoração dos top 5 arquivos
+    for i, (file_path, (file_total, type_counts)) in enumerate(top5_types.items(), 1):
+        ax = plt.subplot(5, 2, i * 2)
+        type_counts.plot(kind='barh', ax=ax, color='coral')
+        ax.set_title(f"{i}. {file_path.split('/')[-1]} ({file_total} refs)",
+                     fontsize=10, fontweight='bold')
+        ax.set_xlabel('Quantidade', fontsize=8)
+        ax.tick_params(axis='y', labelsize=7)
+        ax.tick_params(axis='x', labelsize=8)
+        ax.invert_yaxis()
+        ax.grid(True, alpha=0.3, axis='x')
+        labels = [label.get_text()[:35] + '...' if len(label.get_text()) > 35 else label.get_text()
+                  for label in ax.get_yticklabels()]
+        ax.set_yticklabels(labels)
+
+    plt.tight_layout()
+    return fig
+
+def figure_refactorings_by_class(top_classes, heatmap_data):
+    fig, axes = plt.subplots(2, 1, figsize=(18, 14))
+    fig.suptitle('Análise de Classes Refatoradas', fontsize=16, fontweight='bold')
+
+    top_classes_display = top_classes.copy()
+    top_classes_display.index = [c.split('.')[-1] if '.' in c else c for c in top_classes_display.index]
+    top_classes_display.plot(kind='barh', ax=axes[0], color='darkgreen')
+    axes[0].set_title('Top 10 Classes Mais Refatoradas')
+    axes[0].set_xlabel('Quantidade de Refatorações')
+    axes[0].invert_yaxis()
+
+    sns.heatmap(heatmap_data, annot=True, fmt='d', cmap='YlOrRd', ax=axes[1],
+                cbar_kws={'label': 'Quantidade'})
+    axes[1].set_title('Heatmap: Top 10 Classes x Top 15 Tipos de Refatoração')
+    axes[1].set_xlabel('Tipo de Refatoração')
+    axes[1].set_ylabel('Classe')
+    axes[1].tick_params(axis='x', rotation=45, labelsize=8)
+    axes[1].tick_params(axis='y', labelsize=9)
+
+    plt.tight_layout()
+    return fig
+
+def figure_refactorings_by_category(category_stats, pivot):
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    fig.suptitle('Categorização das Refatorações', fontsize=16, fontweight='bold')
+
+    category_stats.plot(kind='pie', ax=axes[0], autopct='%1.1f%%', startangle=90)
+    axes[0].set_title('Distribuição por Categoria')
+    axes[0].set_ylabel('')
+
+    pivot.plot(kind='barh', stacked=True, ax=axes[1])
+    axes[1].set_title('Top 5 Tipos por Categoria')
+    axes[1].set_xlabel('Quantidade')
+    axes[1].legend(title='Tipo', bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=7)
+
+    plt.tight_layout()
+    return fig
+
+def figure_refactorings_vs_metrics(refactored_status, problematic_classes):
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('Cruzamento: Refatorações vs Métricas CK', fontsize=16, fontweight='bold')
+
+    refactored_status.plot(kind='pie', ax=axes[0, 0], autopct='%1.1f%%',
+                           colors=['lightgreen', 'lightcoral'], startangle=90)
+    axes[0, 0].set_title('Classes Problemáticas: Status de Refatoração')
+    axes[0, 0].set_ylabel('')
+
+    scatters = [
+        (axes[0, 1], 'wmc', 'blue', 'WMC vs Quantidade de Refatorações', 'WMC (Complexidade)'),
+        (axes[1, 0], 'cbo', 'green', 'CBO vs Quantidade de Refatorações', 'CBO (Acoplamento)'),
+        (axes[1, 1], 'lcom', 'red', 'LCOM vs Quantidade de Refatorações', 'LCOM (Coesão)'),
+    ]
+    for ax, metric, color, title, xlabel in scatters:
+        ax.scatter(problematic_classes[metric], problematic_classes['refactoring_count'],
+                   alpha=0.6, color=color)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Refatorações')
+        ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    return fig
+
+def figure_refactorings_statistics(refs_per_commit):
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    fig.suptitle('Estatísticas de Refatorações por Commit', fontsize=16, fontweight='bold')
+
+    refs_per_commit.hist(bins=30, ax=axes[0], color='steelblue', edgecolor='black')
+    axes[0].set_title('Distribuição de Refatorações por Commit')
+    axes[0].set_xlabel('Quantidade de Refatorações')
+    axes[0].set_ylabel('Frequência (commits)')
+    axes[0].axvline(refs_per_commit.mean(), color='red', linestyle='--',
+                    label=f'Média: {refs_per_commit.mean():.2f}')
+    axes[0].axvline(refs_per_commit.median(), color='orange', linestyle='--',
+                    label=f'Mediana: {refs_per_commit.median():.1f}')
+    axes[0].legend()
+    axes[0].grid(True, alpha=0.3)
+
+    refs_per_commit.plot(kind='box', ax=axes[1], vert=True)
+    axes[1].set_title('Boxplot: Refatorações por Commit')
+    axes[1].set_ylabel('Quantidade de Refatorações')
+    axes[1].grid(True, alpha=0.3, axis='y')
+
+    plt.tight_layout()
+    return fig
+
+# Seções do relatório
+
+def ck_section(report, results_dir, df_all):
+    """Estatísticas por release, crescimento e figuras das métricas CK."""
+    trend = load_trend(results_dir, 'ck_class', list(RELEASE_STATS))
+    if not trend.empty and set(df_all['release'].unique()) <= set(trend.index):
+        # Dos agregados do pipeline; a mediana do sketch é aproximada (erro
+        # relativo de 1%), então vem exata das linhas já carregadas
+        trend = trend.loc[trend.index.isin(df_all['release'].unique())].sort_index()
+        medians = df_all.groupby('release')[list(RELEASE_STATS)].median()
+        metrics_by_release = pd.DataFrame({
+            (metric, stat): medians[metric] if stat == 'median' else trend[(metric, stat)]
+            for metric, stats in RELEASE_STATS.items() for stat in stats
+        }).round(2)
+    else:
+        metrics_by_release = df_all.groupby('release').agg(RELEASE_STATS).round(2)
+
+    first_release = metrics_by_release.iloc[0]
+    last_release = metrics_by_release.iloc[-1]
+    columns = [(metric, 'sum' if metric == 'loc' else 'mean') for metric in CK_METRICS]
+    growth_rates = pd.DataFrame({
+        'Métrica': ['WMC', 'DIT', 'NOC', 'CBO', 'LCOM', 'RFC', 'LOC (total)'],
+        'Primeira Release': [first_release[column] for column in columns],
+        'Última Release': [last_release[column] for column in columns],
+    })
+    growth_rates['Variação (%)'] = ((growth_rates['Última Release'] - growth_rates['Primeira Release']) /
+                                    growth_rates['Primeira Release'] * 100).round(2)
+
+    report.csv('metrics_summary.csv', metrics_by_release)
+    report.csv('growth_rates.csv', growth_rates, index=False)
+    report.figure('metrics_evolution.png', figure_metrics_evolution, metrics_by_release)
+    report.figure('metrics_distribution.png', figure_metrics_distribution,
+                  df_all[CK_METRICS + ['release']])
+    report.figure('correlation_matrix.png', figure_correlation_matrix, df_all[CK_METRICS].corr())
+
+def pmd_section(report, results_dir, df_pmd):
+    """Problemas do PMD por release, prioridades e regras mais violadas."""
+    trend = load_trend(results_dir, 'pmd', ['Priority'])
+    releases = df_pmd['release'].unique()
+    if not trend.empty and set(releases) <= set(trend.index):
+        trend = trend.loc[trend.index.isin(releases)].sort_index()
+        pmd_by_release = pd.DataFrame({
+            'Total_Problems': trend[('rows', '')],
+            'Priority_Mean': trend[('Priority', 'mean')],
+            'Priority_Min': trend[('Priority', 'min')],
+            'Priority_Max': trend[('Priority', 'max')]
+        }).round(2)
+    else:
+        pmd_by_release = df_pmd.groupby('release').agg({
+            'Problem': 'count',
+            'Priority': ['mean', 'min', 'max']
+        }).round(2)
+        pmd_by_release.columns = ['Total_Problems', 'Priority_Mean', 'Priority_Min', 'Priority_Max']
+
+    latest = releases[-1]
+    latest_pmd = df_pmd[df_pmd['release'] == latest]
+    report.figure('pmd_analysis.png', figure_pmd_analysis,
+                  pmd_by_release['Total_Problems'],
+                  df_pmd['Priority'].value_counts().sort_index(),
+                  df_pmd.groupby(['release', 'Priority']).size().unstack(fill_value=0),
+                  latest_pmd['Rule'].value_counts().head(10), latest)
+
+    report.csv('pmd_all_releases.csv', df_pmd, index=False)
+    report.csv(f'pmd_{latest}.csv', latest_pmd, index=False)
+    critical = df_pmd[df_pmd['Priority'] == 1]
+    if not critical.empty:
+        report.csv('pmd_critical_all.csv', critical, index=False)
+
+    report.json('pmd_summary.json', {
+        'latest_release': latest,
+        'latest_release_problems': len(latest_pmd),
+        'latest_release_critical': len(latest_pmd[latest_pmd['Priority'] == 1]),
+        'average_problems_per_release': float(pmd_by_release['Total_Problems'].mean()),
+        'median_problems_per_release': float(pmd_by_release['Total_Problems'].median()),
+        'total_releases_analyzed': df_pmd['release'].nunique(),
+        'most_common_rule': latest_pmd['Rule'].value_counts().index[0] if len(latest_pmd) > 0 else 'N/A',
+        'most_common_category': latest_pmd['Rule set'].value_counts().index[0] if len(latest_pmd) > 0 else 'N/A'
+    })
+
+def spotbugs_section(report, df_bugs):
+    """Bugs por release, bugs de segurança (find-sec-bugs) e críticos."""
+    bugs_by_release = df_bugs.groupby('release').agg({
+        'type': 'count',
+        'priority': ['mean', 'min', 'max']
+    }).round(2)
+    bugs_by_release.columns = ['Total_Bugs', 'Priority_Mean', 'Priority_Min', 'Priority_Max']
+
+    latest = df_bugs['release'].unique()[-1]
+    latest_bugs = df_bugs[df_bugs['release'] == latest]
+    category_evolution = df_bugs.groupby(['release', 'category']).size().unstack(fill_value=0)
+    top_categories = df_bugs['category'].value_counts().head(5).index
+    report.figure('bugs_evolution.png', figure_bugs_evolution,
+                  bugs_by_release['Total_Bugs'], category_evolution[top_categories],
+                  df_bugs.groupby(['release', 'priority_label']).size().unstack(fill_value=0),
+                  latest_bugs['type'].value_counts().head(10), latest)
+
+    security_bugs = df_bugs[df_bugs['category'] == 'SECURITY']
+    latest_security = security_bugs[security_bugs['release'] == latest]
+    if not security_bugs.empty:
+        report.figure('security_bugs.png', figure_security_bugs,
+                      security_bugs.groupby('release').size(),
+                      latest_security['type'].value_counts().head(10), latest)
+    critical_bugs = df_bugs[df_bugs['priority'] == 1]
+    latest_critical = critical_bugs[critical_bugs['release'] == latest]
+
+    report.csv('bugs_all_releases.csv', df_bugs, index=False)
+    report.csv(f'bugs_{latest}.csv', latest_bugs, index=False)
+    if not security_bugs.empty:
+        report.csv('security_bugs_all.csv', security_bugs, index=False)
+    if not critical_bugs.empty:
+        report.csv('critical_bugs_all.csv', critical_bugs, index=False)
+
+    report.json('bugs_summary.json', {
+        'latest_release': latest,
+        'latest_release_bugs': len(latest_bugs),
+        'latest_release_security_bugs': len(latest_security),
+        'latest_release_critical_bugs': len(latest_critical),
+        'average_bugs_per_release': float(bugs_by_release['Total_Bugs'].mean()),
+        'median_bugs_per_release': float(bugs_by_release['Total_Bugs'].median()),
+        'total_releases_analyzed': df_bugs['release'].nunique(),
+        'most_common_bug_type_latest': latest_bugs['type'].value_counts().index[0] if len(latest_bugs) > 0 else 'N/A',
+        'most_common_category_latest': latest_bugs['category'].value_counts().index[0] if len(latest_bugs) > 0 else 'N/A'
+    })
+
+def refactorings_section(report, df_all, refactorings):
+    """Arquivos e classes mais refatorados, categorias, cruzamento com o CK e estatísticas."""
+    df_refs, df_file_refs, df_class_refs, total_commits, commits_with_refs = refactorings
+
+    if not df_file_refs.empty:
+        top_files = df_file_refs['file'].value_counts().head(10)
+        top5_types = {}
+        for file_path in top_files.head(5).index:
+            file_refs = df_file_refs[df_file_refs['file'] == file_path]
+            top5_types[file_path] = (len(file_refs), file_refs['type'].value_counts().head(10))
+        report.figure('refactorings_by_file.png', figure_refactorings_by_file, top_files, top5_types)
+        report.csv('top_refactored_files.csv', top_files, header=['refactoring_count'])
+
+    if not df_class_refs.empty:
+        top_classes = df_class_refs['class'].value_counts().head(10)
+        df_top10 = df_class_refs[df_class_refs['class'].isin(top_classes.index)]
+        heatmap_data = df_top10.groupby(['class', 'type']).size().unstack(fill_value=0)
+        # Só os tipos mais comuns, para não poluir o heatmap
+        heatmap_data = heatmap_data[df_top10['type'].value_counts().head(15).index]
+        heatmap_data.index = [c.split('.')[-1] if '.' in c else c for c in heatmap_data.index]
+        report.figure('refactorings_by_class.png', figure_refactorings_by_class,
+                      top_classes, heatmap_data)
+        report.csv('top_refactored_classes.csv', top_classes, header=['refactoring_count'])
+        report.csv('class_refactoring_heatmap.csv', heatmap_data)
+
+    if not df_refs.empty:
+        df_refs = df_refs.assign(category=df_refs['type'].apply(refactoring_category))
+        category_stats = df_refs['category'].value_counts()
+        category_type_data = []
+        for cat in category_stats.index:
+            top5 = df_refs[df_refs['category'] == cat]['type'].value_counts().head(5)
+            for ref_type, count in top5.items():
+                category_type_data.append({
+                    'category': cat,
+                    'type': ref_type[:40] + '...' if len(ref_type) > 40 else ref_type,
+                    'count': count
+                })
+        pivot = pd.DataFrame(category_type_data) \
+            .pivot(index='category', columns='type', values='count').fillna(0)
+        report.figure('refactorings_by_category.png', figure_refactorings_by_category,
+                      category_stats, pivot)
+        report.csv('refactorings_categories.csv', category_stats, header=['count'])
+
+    if not df_all.empty and not df_class_refs.empty:
+        # Classes problemáticas (top 20% em WMC, CBO ou LCOM) da última release
+        latest_release = df_all[df_all['release'] == df_all['release'].unique()[-1]]
+        wmc_threshold = latest_release['wmc'].quantile(0.80)
+        cbo_threshold = latest_release['cbo'].quantile(0.80)
+        lcom_threshold = latest_release['lcom'].quantile(0.80)
+        problematic_classes = latest_release[
+            (latest_release['wmc'] >= wmc_threshold) |
+            (latest_release['cbo'] >= cbo_threshold) |
+            (latest_release['lcom'] >= lcom_threshold)
+        ].copy()
+        refactored_classes_count = df_class_refs['class'].value_counts().to_dict()
+        problematic_classes['refactoring_count'] = problematic_classes['class'].apply(
+            lambda x: refactored_classes_count.get(x, 0))
+        problematic_classes['problem_score'] = (
+            problematic_classes['wmc'] / wmc_threshold +
+            problematic_classes['cbo'] / cbo_threshold +
+            problematic_classes['lcom'] / lcom_threshold
+        )
+        refactored_status = pd.Series({
+            'Refatoradas': int((problematic_classes['refactoring_count'] > 0).sum()),
+            'Não Refatoradas': int((problematic_classes['refactoring_count'] == 0).sum())
+        })
+        report.figure('refactorings_vs_metrics.png', figure_refactorings_vs_metrics,
+                      refactored_status,
+                      problematic_classes[['wmc', 'cbo', 'lcom', 'refactoring_count']])
+        report.csv('problematic_classes_refactorings.csv',
+                   problematic_classes[['class', 'wmc', 'cbo', 'lcom', 'refactoring_count',
+                                        'problem_score']], index=False)
+
+    if not df_refs.empty:
+        refs_per_commit = df_refs.groupby('commit').size()
+        report.figure('refactorings_statistics.png', figure_refactorings_statistics, refs_per_commit)
+        report.json('refactorings_summary.json', {
+            'total_commits': total_commits,
+            'commits_with_refactorings': commits_with_refs,
+            'commits_without_refactorings': total_commits - commits_with_refs,
+            'percentage_commits_with_refs': round(commits_with_refs / total_commits * 100, 2),
+            'total_refactorings': len(df_refs),
+            'unique_refactoring_types': df_refs['type'].nunique(),
+            'refactorings_per_commit': {
+                'mean': round(refs_per_commit.mean(), 2),
+                'median': round(refs_per_commit.median(), 1),
+                'std': round(refs_per_commit.std(), 2),
+                'min': int(refs_per_commit.min()),
+                'max': int(refs_per_commit.max()),
+                'percentile_75': round(refs_per_commit.quantile(0.75), 1),
+                'percentile_90': round(refs_per_commit.quantile(0.90), 1)
+            }
+        })
+
+def generate(results_dir, jobs=None, force=False):
+    """
+    Gera o relatório de results/<projeto>/: carrega os dados, exporta os CSVs
+    e JSONs e desenha as figuras cujos dados mudaram.
+
+    Returns:
+        Dicionário com as saídas gravadas, puladas (cache) e com falha
+    """
+    jobs = jobs or os.cpu_count() or 1
+    report = Report(results_dir, force)
+
+    df_all = load_ck(results_dir)
+    print(f"✓ CK: {len(df_all)} classes")
+    if not df_all.empty:
+        ck_section(report, results_dir, df_all)
+
+    df_pmd = load_pmd(results_dir)
+    print(f"✓ PMD: {len(df_pmd)} problemas")
+    if not df_pmd.empty:
+        pmd_section(report, results_dir, df_pmd)
+    del df_pmd
+
+    df_bugs = load_spotbugs(results_dir)
+    print(f"✓ SpotBugs: {len(df_bugs)} bugs")
+    if not df_bugs.empty:
+        spotbugs_section(report, df_bugs)
+    del df_bugs
+
+    refactorings = load_refactorings(results_dir)
+    print(f"✓ RefactoringMiner: {len(refactorings[0])} refatorações em {refactorings[3]} commits")
+    refactorings_section(report, df_all, refactorings)
+    del df_all, refactorings
+
+    report.render(jobs)
+    report.save()
+    return {'written': report.written, 'skipped': report.skipped, 'failed': report.failed}
+
+def resolve_results_dir(target):
+    """Diretório de resultados a partir do caminho, do projeto ou de owner/repo."""
+    if os.path.isdir(target):
+        return target
+    return os.path.join(WORKSPACE_DIR, "results", target.rstrip('/').split('/')[-1])
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: generate_report.py <projeto | owner/repo | results/projeto> [--jobs N] [--force]")
+        print("\nExemplo:")
+        print("  generate_report.py jhy/jsoup")
+        print("  generate_report.py /workspace/results/jsoup --jobs 4")
+        print("\nGera as figuras, CSVs e resumos do analyze_metrics.ipynb em results/<projeto>/;")
+        print(f"saídas cujos dados não mudaram são puladas ({REPORT_CACHE_FILE}).")
+        sys.exit(1)
+
+    results_dir = resolve_results_dir(sys.argv[1])
+    jobs = None
+    if '--jobs' in sys.argv:
+        jobs_idx = sys.argv.index('--jobs')
+        if jobs_idx + 1 < len(sys.argv):
+            jobs = max(1, int(sys.argv[jobs_idx + 1]))
+
+    if not os.path.isdir(results_dir):
+        print(f"Erro: diretório não encontrado: {results_dir}")
+        sys.exit(1)
+
+    outcome = generate(results_dir, jobs, '--force' in sys.argv)
+    print(f"\n✓ Relatório em {results_dir}: {len(outcome['written'])} arquivo(s) gravado(s), "
+          f"{len(outcome['skipped'])} sem mudança")
+    if outcome['failed']:
+        print(f"✗ Falharam: {', '.join(outcome['failed'])}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Agregados por release (contagem, soma, quantis) das métricas do CK e do PMD.
+Uso: metric_sketches.py <results/projeto> [--release TAG] [--table TABELA]
+                        [--metric MÉTRICA]
+
+Logo após o CK e o PMD de cada release, o pipeline grava em
+results/<projeto>/<tag>/aggregates/<tabela>.json, para cada métrica:
+
+    count, sum, sum_sq, min, max    (média e desvio padrão exatos)
+    sketch                          (quantis com erro relativo de 1%)
+
+e contagens por valor de colunas categóricas (prioridade, regra do PMD). Os
+CSVs são lidos linha a linha, então a memória não depende do tamanho da
+release. Os agregados são separados por módulo (diretório antes de src/) e
+todos são combináveis: merge() de dois agregados dá o mesmo resultado que
+agregar as linhas dos dois juntas (os quantis, dentro do erro do sketch).
+Relatórios de tendência de históricos longos leem alguns KB por release em vez
+de milhões de linhas.
+
+Sem argumentos além do projeto, (re)cria os agregados das releases já
+analisadas e mostra a tendência de uma métrica (padrão: wmc do ck_class).
+"""
+
+import sys
+import os
+import csv
+import json
+import math
+
+# Diretório (dentro de cada release) com um JSON por tabela
+AGGREGATES_DIR = "aggregates"
+
+# Muda quando o formato dos agregados muda, invalidando os anteriores
+AGGREGATES_VERSION = 1
+
+# Erro relativo dos quantis (o valor devolvido fica a até 1% do exato)
+SKETCH_ACCURACY = 0.01
+
+# Valores com módulo menor que isto contam como zero no sketch
+SKETCH_MIN_VALUE = 1e-9
+
+# Quantis mostrados nas tendências
+TREND_QUANTILES = (0.5, 0.9, 0.95)
+
+# Tabela -> (arquivo na release, métricas numéricas, colunas categóricas, coluna do arquivo)
+TABLES = {
+    'ck_class': (os.path.join('ck', 'class.csv'),
+                 ('wmc', 'cbo', 'dit', 'noc', 'rfc', 'lcom', 'lcom*', 'tcc', 'lcc', 'loc',
+                  'fanin', 'fanout', 'totalMethodsQty', 'totalFieldsQty'),
+                 ('type',), 'file'),
+    'ck_method': (os.path.join('ck', 'method.csv'),
+                  ('wmc', 'cbo', 'rfc', 'loc', 'parametersQty', 'variablesQty',
+                   'maxNestedBlocksQty'),
+                  (), 'file'),
+    'pmd': ('pmd-report.csv', ('Priority',), ('Priority', 'Rule', 'Rule set'), 'File'),
+}
+
+# Tabelas geradas por cada ferramenta do pipeline
+TOOL_TABLES = {
+    'ck': ('ck_class', 'ck_method'),
+    'pmd': ('pmd',),
+}
+
+class QuantileSketch:
+    """
+    Sketch de quantis com erro relativo limitado (DDSketch).
+
+    Cada valor cai em um balde logarítmico: o balde k guarda os valores em
+    (gamma^(k-1), gamma^k], com gamma = (1 + a) / (1 - a); o representante do
+    balde fica a no máximo `a` (erro relativo) de qualquer valor dentro dele.
+    Juntar dois sketches é somar as contagens dos baldes, então o resultado
+    não depende da ordem nem de como as linhas foram divididas.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def bucket(self, value):
+        """Índice do balde de um valor positivo."""
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value):
+        if value > SKETCH_MIN_VALUE:
+            k = self.bucket(value)
+            self.positive[k] = self.positive.get(k, 0) + 1
+        elif value < -SKETCH_MIN_VALUE:
+            k = self.bucket(-value)
+            self.negative[k] = self.negative.get(k, 0) + 1
+        else:
+            self.zeros += 1
+        self.count += 1
+
+    def merge(self, other):
+        """Soma os baldes de outro sketch (com a mesma precisão) a este."""
+        if other.accuracy != self.accuracy:
+            raise ValueError("sketches com precisões diferentes não podem ser combinados")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for k, n in theirs.items():
+                mine[k] = mine.get(k, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def value(self, k):
+        """Representante do balde k (erro relativo máximo `accuracy`)."""
+        return 2 * self.gamma ** k / (self.gamma + 1)
+
+    def quantile(self, q):
+        """
+        Quantil q (0..1) aproximado; None se o sketch estiver vazio. Como no
+        pandas, interpola entre os dois valores vizinhos da posição q * (n - 1).
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        low = self.at_rank(math.floor(rank))
+        high = self.at_rank(math.ceil(rank))
+        return low + (high - low) * (rank - math.floor(rank))
+
+    def at_rank(self, rank):
+        """Valor aproximado do elemento na posição rank (0 = menor)."""
+        seen = 0
+        for k in sorted(self.negative, reverse=True):
+            seen += self.negative[k]
+            if seen > rank:
+                return -self.value(k)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.positive):
+            seen += self.positive[k]
+            if seen > rank:
+                return self.value(k)
+        return self.value(max(self.positive))
+
+    def to_dict(self):
+        return {
+            'accuracy': self.accuracy,
+            'zeros': self.zeros,
+            'positive': {str(k): n for k, n in sorted(self.positive.items())},
+            'negative': {str(k): n for k, n in sorted(self.negative.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['accuracy'])
+        sketch.zeros = data['zeros']
+        sketch.positive = {int(k): n for k, n in data['positive'].items()}
+        sketch.negative = {int(k): n for k, n in data['negative'].items()}
+        sketch.count = sketch.zeros + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+class MetricSummary:
+    """Contagem, soma, soma dos quadrados, mínimo, máximo e sketch de uma métrica."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        for name, pick in (('min', min), ('max', max)):
+            theirs = getattr(other, name)
+            if theirs is not None:
+                mine = getattr(self, name)
+                setattr(self, name, theirs if mine is None else pick(mine, theirs))
+        self.sketch.merge(other.sketch)
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def std(self):
+        """Desvio padrão amostral (ddof=1, como o pandas)."""
+        if self.count < 2:
+            return None
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(0.0, variance))
+
+    def quantile(self, q):
+        """Quantil aproximado, limitado ao mínimo e máximo exatos."""
+        value = self.sketch.quantile(q)
+        if value is None:
+            return None
+        return min(max(value, self.min), self.max)
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.total, 'sum_sq': self.total_sq,
+                'min': self.min, 'max': self.max, 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        summary.count = data['count']
+        summary.total = data['sum']
+        summary.total_sq = data['sum_sq']
+        summary.min = data['min']
+        summary.max = data['max']
+        summary.sketch = QuantileSketch.from_dict(data['sketch'])
+        return summary
+
+class TableSummary:
+    """Agregados de uma tabela (ou de um módulo dela): linhas, métricas e contagens."""
+
+    def __init__(self):
+        self.rows = 0
+        self.metrics = {}
+        self.counts = {}
+
+    def add_row(self, values, metrics, categories):
+        self.rows += 1
+        for name in metrics:
+            value = to_number(values.get(name))
+            if value is not None:
+                self.metrics.setdefault(name, MetricSummary()).add(value)
+        for name in categories:
+            value = values.get(name)
+            if value not in (None, ''):
+                column = self.counts.setdefault(name, {})
+                column[value] = column.get(value, 0) + 1
+
+    def merge(self, other):
+        self.rows += other.rows
+        for name, summary in other.metrics.items():
+            if name in self.metrics:
+                self.metrics[name].merge(summary)
+            else:
+                self.metrics[name] = MetricSummary().merge(summary)
+        for name, column in other.counts.items():
+            mine = self.counts.setdefault(name, {})
+            for value, n in column.items():
+                mine[value] = mine.get(value, 0) + n
+        return self
+
+    def to_dict(self):
+        return {'rows': self.rows,
+                'metrics': {name: s.to_dict() for name, s in self.metrics.items()},
+                'counts': self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        table = cls()
+        table.rows = data['rows']
+        table.metrics = {name: MetricSummary.from_dict(s) for name, s in data['metrics'].items()}
+        table.counts = data['counts']
+        return table
+
+def to_number(value):
+    """Valor numérico de uma célula do CSV (None se vazio, inválido ou NaN)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) or math.isinf(number) else number
+
+def module_name(path, prefixes):
+    """Módulo de um arquivo: caminho relativo ao projeto antes de src/ ('' na raiz)."""
+    for prefix in prefixes:
+        if prefix and path.startswith(prefix.rstrip(os.sep) + os.sep):
+            path = path[len(prefix.rstrip(os.sep)) + 1:]
+            break
+    marker = path.find('src' + os.sep)
+    if marker <= 0:
+        return ''
+    return path[:marker].rstrip(os.sep)
+
+def summarize_csv(csv_file, metrics, categories=(), file_column=None, prefixes=()):
+    """
+    Agrega um CSV linha a linha, por módulo.
+
+    Returns:
+        Dicionário módulo -> TableSummary
+    """
+    modules = {}
+    with open(csv_file, newline='', encoding='utf-8', errors='replace') as f:
+        for values in csv.DictReader(f):
+            module = module_name(values.get(file_column) or '', prefixes) if file_column else ''
+            if module not in modules:
+                modules[module] = TableSummary()
+            modules[module].add_row(values, metrics, categories)
+    return modules
+
+def aggregates_file(release_dir, table):
+    return os.path.join(release_dir, AGGREGATES_DIR, f"{table}.json")
+
+def source_stamp(source_file):
+    """Identifica a versão do CSV agregada (tamanho + data de modificação)."""
+    stat = os.stat(source_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def write_release(release_dir, source_dir=None, tables=None, missing_only=False):
+    """
+    Grava os agregados das tabelas de uma release (aggregates/<tabela>.json).
+
+    Tabelas cujo CSV não existe são puladas. source_dir é o diretório onde as
+    ferramentas rodaram (para achar o módulo de cada arquivo); sem ele, vale
+    o registrado em ck/.ck-source.json. Com missing_only, só são gravadas as
+    tabelas sem agregado atualizado (ex: etapas reaproveitadas do journal).
+
+    Returns:
+        Dicionário tabela -> número de linhas agregadas
+    """
+    with open(os.path.join(release_dir, "metadata.json")) as f:
+        metadata = json.load(f)
+
+    prefixes = [source_dir]
+    ck_source_file = os.path.join(release_dir, "ck", ".ck-source.json")
+    if os.path.exists(ck_source_file):
+        with open(ck_source_file) as f:
+            prefixes.append(json.load(f).get('source_dir'))
+
+    written = {}
+    for table in tables or TABLES:
+        source, metrics, categories, file_column = TABLES[table]
+        source_file = os.path.join(release_dir, source)
+        if not os.path.exists(source_file) or os.path.getsize(source_file) == 0:
+            continue
+        target = aggregates_file(release_dir, table)
+        stamp = source_stamp(source_file)
+        if missing_only and os.path.exists(target):
+            try:
+                with open(target) as f:
+                    current = json.load(f)
+                if current.get('version') == AGGREGATES_VERSION and current.get('source') == stamp:
+                    continue
+            except (OSError, ValueError):
+                pass
+
+        modules = summarize_csv(source_file, metrics, categories, file_column, prefixes)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_file = f"{target}.tmp-{os.getpid()}"
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'version': AGGREGATES_VERSION,
+                'release': metadata['tag_name'],
+                'release_date': metadata.get('published_date', ''),
+                'table': table,
+                'source': stamp,
+                'modules': {name: summary.to_dict() for name, summary in modules.items()},
+            }, f)
+        os.replace(tmp_file, target)
+        written[table] = sum(summary.rows for summary in modules.values())
+    return written
+
+def load_release(release_dir, table, modules=None):
+    """
+    Agregado de uma tabela em uma release, com os módulos combinados.
+
+    Args:
+        modules: módulos a incluir (None = todos)
+
+    Returns:
+        (metadados do arquivo, TableSummary) ou None se não houver agregado
+    """
+    target = aggregates_file(release_dir, table)
+    if not os.path.exists(target):
+        return None
+    with open(target) as f:
+        data = json.load(f)
+    if data.get('version') != AGGREGATES_VERSION:
+        return None
+    summary = TableSummary()
+    for name, module in data['modules'].items():
+        if modules is None or name in modules:
+            summary.merge(TableSummary.from_dict(module))
+    return data, summary
+
+def release_dirs(results_dir):
+    """Diretórios das releases analisadas em results/<projeto>/, em ordem de nome."""
+    return [os.path.join(results_dir, name) for name in sorted(os.listdir(results_dir))
+            if os.path.exists(os.path.join(results_dir, name, "metadata.json"))]
+
+def load_project(results_dir, table, releases=None):
+    """
+    Agregados de uma tabela em todas as releases do projeto.
+
+    Returns:
+        Lista de (tag, data da release, TableSummary), em ordem de nome
+    """
+    loaded = []
+    for release_dir in release_dirs(results_dir):
+        result = load_release(release_dir, table)
+        if result is None:
+            continue
+        data, summary = result
+        if releases is None or data['release'] in releases:
+            loaded.append((data['release'], data['release_date'], summary))
+    return loaded
+
+def merge_all(summaries):
+    """Combina vários TableSummary (ex: todas as releases) em um só."""
+    merged = TableSummary()
+    for summary in summaries:
+        merged.merge(summary)
+    return merged
+
+def describe(summary, metric, quantiles=TREND_QUANTILES):
+    """Estatísticas de uma métrica de um TableSummary (dicionário)."""
+    values = summary.metrics.get(metric)
+    row = {'count': values.count if values else 0,
+           'sum': values.total if values else None,
+           'mean': values.mean() if values else None,
+           'std': values.std() if values else None,
+           'min': values.min if values else None,
+           'max': values.max if values else None}
+    for q in quantiles:
+        row[f"p{int(q * 100)}"] = values.quantile(q) if values else None
+    return row
+
+def load_trend(results_dir, table, metrics, quantiles=TREND_QUANTILES, to_pandas=True):
+    """
+    Tendência de métricas por release, só a partir dos agregados.
+
+    Returns:
+        DataFrame indexado pela release com colunas (métrica, estatística)
+        (ou lista de dicionários, com to_pandas=False)
+    """
+    rows = []
+    for tag_name, release_date, summary in load_project(results_dir, table):
+        row = {('release', ''): tag_name, ('release_date', ''): release_date,
+               ('rows', ''): summary.rows}
+        for metric in metrics:
+            for stat, value in describe(summary, metric, quantiles).items():
+                row[(metric, stat)] = value
+        rows.append(row)
+    if not to_pandas:
+        return rows
+
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df.columns = pd.MultiIndex.from_tuples(df.columns)
+    return df.set_index(('release', '')).rename_axis('release')
+
+def rebuild(results_dir, only_release=None):
+    """Recria os agregados a partir dos resultados já existentes em disco."""
+    for release_dir in release_dirs(results_dir):
+        with open(os.path.join(release_dir, "metadata.json")) as f:
+            tag_name = json.load(f)['tag_name']
+        if only_release and tag_name != only_release:
+            continue
+        counts = write_release(release_dir)
+        print(f"✓ {tag_name}: " + (", ".join(f"{name} {count}" for name, count in counts.items())
+                                   or "nenhuma tabela"))
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: metric_sketches.py <results/projeto> [--release TAG] [--table TABELA]")
+        print("                         [--metric MÉTRICA]")
+        print("\nExemplo:")
+        print("  metric_sketches.py /workspace/results/jsoup")
+        print("  metric_sketches.py /workspace/results/jsoup --table pmd --metric Priority")
+        print(f"\nRecria {AGGREGATES_DIR}/ em cada release e mostra a tendência da métrica.")
+        sys.exit(1)
+
+    results_dir = sys.argv[1]
+    only_release = None
+    table = 'ck_class'
+    metric = None
+
+    for i in range(2, len(sys.argv)):
+        if sys.argv[i] == '--release' and i + 1 < len(sys.argv):
+            only_release = sys.argv[i + 1]
+        elif sys.argv[i] == '--table' and i + 1 < len(sys.argv):
+            table = sys.argv[i + 1]
+        elif sys.argv[i] == '--metric' and i + 1 < len(sys.argv):
+            metric = sys.argv[i + 1]
+
+    if not os.path.isdir(results_dir):
+        print(f"Erro: diretório não encontrado: {results_dir}")
+        sys.exit(1)
+    if table not in TABLES:
+        print(f"Erro: --table aceita {', '.join(TABLES)}")
+        sys.exit(1)
+    metric = metric or TABLES[table][1][0]
+
+    rebuild(results_dir, only_release)
+
+    loaded = load_project(results_dir, table)
+    print(f"\n{table}.{metric} por release:")
+    print(f"{'Release':30s} {'N':>8s} {'média':>10s} {'desvio':>10s} {'p50':>10s} "
+          f"{'p95':>10s} {'máx':>10s}")
+    for tag_name, _, summary in loaded:
+        row = describe(summary, metric, (0.5, 0.95))
+        print(f"{tag_name:30s} {row['count']:8d} " + " ".join(
+            f"{row[key]:10.2f}" if row[key] is not None else f"{'-':>10s}"
+            for key in ('mean', 'std', 'p50', 'p95', 'max')))
+
+    if loaded:
+        overall = describe(merge_all(summary for _, _, summary in loaded), metric, (0.5, 0.95))
+        print(f"{'(todas)':30s} {overall['count']:8d} " + " ".join(
+            f"{overall[key]:10.2f}" if overall[key] is not None else f"{'-':>10s}"
+            for key in ('mean', 'std', 'p50', 'p95', 'max')))
+
+if __name__ == '__main__':
+    main()
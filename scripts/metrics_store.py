@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Dataset colunar (Parquet) com as métricas de todas as releases de um projeto.
+Uso: metrics_store.py <results/projeto> [--release TAG]
+
+Em vez de cada consumidor ler ck/class.csv, pmd-report.csv etc. de cada
+release, o pipeline grava as tabelas abaixo em results/<projeto>/metrics-store/,
+particionadas por release (layout hive: <tabela>/release=<tag>/part-0.parquet):
+
+    releases       metadados de cada release (uma linha por partição)
+    ck_class       ck/class.csv
+    ck_method      ck/method.csv
+    pmd            pmd-report.csv
+    spotbugs       BugInstance do spotbugs-report.xml
+
+As colunas mantêm os nomes dos CSVs; `file`/`File` ficam relativos ao
+diretório do projeto (comparáveis entre releases) e colunas de texto repetitivas
+(classe, arquivo, regra...) são gravadas com dictionary encoding. Cada release
+é uma partição independente, então o dataset cresce a cada release analisada
+sem reescrever as anteriores, e leituras com `load()` usam projeção de colunas
+e filtro por release/predicado direto no Parquet.
+"""
+
+import sys
+import os
+import csv
+import json
+import xml.etree.ElementTree as ET
+from urllib.parse import quote
+
+# Diretório (dentro de results/<projeto>/) com o dataset
+STORE_DIR = "metrics-store"
+
+# Arquivo gravado em cada partição
+PART_FILE = "part-0.parquet"
+
+# Tipos fixos por coluna, iguais em todas as partições: texto (dictionary
+# encoding), booleanas e decimais; as demais colunas são inteiras. No CK 0.7.0
+# só tcc, lcc e lcom* são decimais.
+CK_TEXT_COLUMNS = {'file', 'class', 'type', 'method'}
+CK_BOOL_COLUMNS = {'constructor', 'hasJavaDoc'}
+CK_FLOAT_COLUMNS = {'tcc', 'lcc', 'lcom*'}
+PMD_TEXT_COLUMNS = {'Package', 'File', 'Description', 'Rule set', 'Rule'}
+
+# Tabela -> arquivo de origem dentro do diretório da release
+TABLE_SOURCES = {
+    'ck_class': os.path.join('ck', 'class.csv'),
+    'ck_method': os.path.join('ck', 'method.csv'),
+    'pmd': 'pmd-report.csv',
+    'spotbugs': 'spotbugs-report.xml',
+}
+
+def partition_dir(store_dir, table, tag_name):
+    """Diretório da partição de uma release (tag codificada como URI, padrão hive)."""
+    return os.path.join(store_dir, table, f"release={quote(tag_name, safe='')}")
+
+def relative_path(path, prefixes):
+    """Caminho relativo ao projeto, quando começa por um dos prefixos conhecidos."""
+    for prefix in prefixes:
+        if prefix and path.startswith(prefix.rstrip(os.sep) + os.sep):
+            return path[len(prefix.rstrip(os.sep)) + 1:]
+    return path
+
+def to_number(value, kind):
+    """Converte um valor de CSV em int/float (None se vazio ou inválido)."""
+    try:
+        return kind(value) if value != '' else None
+    except ValueError:
+        return None
+
+def read_csv_table(pa, csv_file, text_columns, bool_columns=(), float_columns=(),
+                   path_columns=(), prefixes=()):
+    """
+    Lê um CSV como tabela Arrow com tipos fixos por coluna (os mesmos em
+    todas as releases, para que as partições tenham o mesmo schema).
+    """
+    with open(csv_file, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return None
+        columns = {name: [] for name in header}
+        for row in reader:
+            row = row + [''] * (len(header) - len(row))
+            for name, value in zip(header, row):
+                columns[name].append(value)
+
+    arrays = {}
+    for name, values in columns.items():
+        if name in path_columns:
+            values = [relative_path(v, prefixes) for v in values]
+        if name in text_columns:
+            arrays[name] = pa.array(values, pa.string()).dictionary_encode()
+        elif name in bool_columns:
+            arrays[name] = pa.array([v.lower() == 'true' if v else None for v in values],
+                                    pa.bool_())
+        elif name in float_columns:
+            arrays[name] = pa.array([to_number(v, float) for v in values], pa.float64())
+        else:
+            arrays[name] = pa.array([to_number(v, int) for v in values], pa.int64())
+    return pa.table(arrays)
+
+def read_spotbugs_table(pa, xml_file):
+    """
+    BugInstance do relatório do SpotBugs, lidos com spotbugs_stream (XML
+    processado de forma incremental e índice da release reaproveitado).
+    """
+    from spotbugs_stream import load_bugs
+
+    fields = ('type', 'priority', 'rank', 'category', 'abbrev', 'class', 'method',
+              'source_file', 'start_line', 'end_line', 'description')
+    int_fields = {'priority', 'rank', 'start_line', 'end_line'}
+    bugs = load_bugs(xml_file)
+    return pa.table({
+        name: pa.array([bug[name] for bug in bugs], pa.int64()) if name in int_fields
+        else pa.array([bug[name] for bug in bugs], pa.string()).dictionary_encode()
+        for name in fields
+    })
+
+def write_partition(pa, pq, store_dir, table_name, tag_name, table):
+    """Grava (ou substitui) a partição de uma release com rename atômico."""
+    target_dir = partition_dir(store_dir, table_name, tag_name)
+    target = os.path.join(target_dir, PART_FILE)
+    if table is None:
+        if os.path.exists(target):
+            os.remove(target)
+        return 0
+
+    os.makedirs(target_dir, exist_ok=True)
+    # Prefixo '.' para que leitores do dataset ignorem o arquivo temporário
+    tmp_file = os.path.join(target_dir, f".{PART_FILE}.tmp-{os.getpid()}")
+    pq.write_table(table, tmp_file)
+    os.replace(tmp_file, target)
+    return table.num_rows
+
+def write_release(store_dir, release_dir, source_dir=None):
+    """
+    Atualiza as partições de uma release a partir dos arquivos em release_dir.
+
+    Tabelas cujo arquivo de origem não existe (ferramenta não executada)
+    têm a partição removida. source_dir é o diretório onde as ferramentas
+    rodaram, usado para tornar os caminhos relativos; sem ele, vale o
+    registrado em ck/.ck-source.json.
+
+    Returns:
+        Dicionário tabela -> número de linhas gravadas
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with open(os.path.join(release_dir, "metadata.json")) as f:
+        metadata = json.load(f)
+    tag_name = metadata['tag_name']
+    release_date = metadata.get('published_date', '')
+
+    prefixes = [source_dir]
+    ck_source_file = os.path.join(release_dir, "ck", ".ck-source.json")
+    if os.path.exists(ck_source_file):
+        with open(ck_source_file) as f:
+            prefixes.append(json.load(f).get('source_dir'))
+
+    tables = {}
+    for table_name, source in TABLE_SOURCES.items():
+        source_file = os.path.join(release_dir, source)
+        table = None
+        if os.path.exists(source_file) and os.path.getsize(source_file) > 0:
+            if table_name.startswith('ck_'):
+                table = read_csv_table(pa, source_file, CK_TEXT_COLUMNS, CK_BOOL_COLUMNS,
+                                       CK_FLOAT_COLUMNS, path_columns={'file'},
+                                       prefixes=prefixes)
+            elif table_name == 'pmd':
+                table = read_csv_table(pa, source_file, PMD_TEXT_COLUMNS,
+                                       path_columns={'File'}, prefixes=prefixes)
+            else:
+                try:
+                    table = read_spotbugs_table(pa, source_file)
+                except ET.ParseError:
+                    table = None
+        if table is not None:
+            # Data da release repetida em cada linha (dictionary: custo mínimo)
+            date_column = pa.array([release_date] * table.num_rows, pa.string()).dictionary_encode()
+            table = table.append_column('release_date', date_column)
+        tables[table_name] = table
+
+    tables['releases'] = pa.table({
+        key: pa.array([None if value is None else str(value)], pa.string())
+        for key, value in metadata.items()
+        if not isinstance(value, (dict, list))
+    })
+
+    return {table_name: write_partition(pa, pq, store_dir, table_name, tag_name, table)
+            for table_name, table in tables.items()}
+
+def load(store_dir, table_name, columns=None, releases=None, predicate=None, to_pandas=True):
+    """
+    Lê uma tabela do dataset.
+
+    Args:
+        columns: colunas a carregar (None = todas); 'release' é a partição
+        releases: tags a incluir (filtra partições sem abrir os demais arquivos)
+        predicate: expressão pyarrow.dataset extra (ex: ds.field('wmc') > 50)
+        to_pandas: retorna DataFrame (padrão) ou pyarrow.Table
+
+    Returns:
+        DataFrame/Table com a coluna 'release' como categórica/dictionary
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    table_dir = os.path.join(store_dir, table_name)
+    partitioning = ds.partitioning(pa.schema([('release', pa.string())]), flavor='hive')
+    dataset = ds.dataset(table_dir, format='parquet', partitioning=partitioning)
+
+    expression = predicate
+    if releases is not None:
+        release_filter = ds.field('release').isin(list(releases))
+        expression = release_filter if expression is None else expression & release_filter
+
+    table = dataset.to_table(columns=columns, filter=expression)
+    if 'release' in table.column_names:
+        index = table.column_names.index('release')
+        table = table.set_column(index, 'release', table.column('release').dictionary_encode())
+    return table.to_pandas() if to_pandas else table
+
+def rebuild(results_dir, only_release=None):
+    """Recria as partições a partir dos resultados já existentes em disco."""
+    store_dir = os.path.join(results_dir, STORE_DIR)
+    release_dirs = sorted(
+        os.path.join(results_dir, d) for d in os.listdir(results_dir)
+        if os.path.exists(os.path.join(results_dir, d, "metadata.json"))
+    )
+
+    for release_dir in release_dirs:
+        with open(os.path.join(release_dir, "metadata.json")) as f:
+            tag_name = json.load(f)['tag_name']
+        if only_release and tag_name != only_release:
+            continue
+        counts = write_release(store_dir, release_dir)
+        print(f"✓ {tag_name}: " + ", ".join(f"{name} {count}" for name, count in counts.items()))
+    return store_dir
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: metrics_store.py <results/projeto> [--release TAG]")
+        print("\nExemplo:")
+        print("  metrics_store.py /workspace/results/jsoup")
+        print("  metrics_store.py /workspace/results/jsoup --release jsoup-1.15.3")
+        print(f"\nRecria {STORE_DIR}/ a partir dos resultados de cada release.")
+        sys.exit(1)
+
+    results_dir = sys.argv[1]
+    only_release = None
+
+    if '--release' in sys.argv:
+        release_idx = sys.argv.index('--release')
+        if release_idx + 1 < len(sys.argv):
+            only_release = sys.argv[release_idx + 1]
+
+    if not os.path.isdir(results_dir):
+        print(f"Erro: diretório não encontrado: {results_dir}")
+        sys.exit(1)
+
+    try:
+        store_dir = rebuild(results_dir, only_release)
+    except ImportError:
+        print("Erro: pyarrow não está instalado (pip install pyarrow)")
+        sys.exit(1)
+
+    print(f"\n✓ Dataset salvo em {store_dir}")
+
+if __name__ == '__main__':
+    main()
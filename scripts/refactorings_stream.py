@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Leitura incremental do refactorings-all.json (RefactoringMiner) e exportação
+para tabelas colunares (Parquet).
+Uso: refactorings_stream.py <refactorings-all.json> [--output DIR] [--batch-size N]
+
+O JSON do RefactoringMiner chega a vários GB em repositórios com dezenas de
+milhares de commits; aqui ele é lido um commit por vez, com memória limitada
+ao maior commit, e gravado em lotes nas tabelas:
+
+    commits.parquet       commit, url, refactorings (quantidade)
+    refactorings.parquet  refactoring_id, commit, position, type, description
+    locations.parquet     refactoring_id, commit, type, side, file_path,
+                          start_line, end_line, start_column, end_column,
+                          code_element_type, code_element, description
+"""
+
+import sys
+import os
+import json
+import shutil
+
+# Tamanho de cada leitura do arquivo e número de linhas por lote gravado
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 50_000
+
+# Diretório (dentro de results/<projeto>/) com as tabelas exportadas
+PARQUET_DIR = "refactorings-parquet"
+
+LOCATION_SIDES = (('left', 'leftSideLocations'), ('right', 'rightSideLocations'))
+
+def iter_commits(json_file, chunk_size=CHUNK_SIZE, strict=False):
+    """
+    Itera os commits de um refactorings-all.json sem carregar o arquivo todo.
+
+    Procura o array "commits" do objeto raiz e decodifica um elemento por vez
+    (json.JSONDecoder.raw_decode), lendo mais do arquivo apenas quando o
+    elemento atual ainda não está completo no buffer.
+
+    Com strict, um arquivo sem o array "commits" ou cortado antes do `]`
+    final gera ValueError (sem strict, termina a iteração).
+
+    Yields:
+        Dicionário de cada commit, na ordem do arquivo
+    """
+    decoder = json.JSONDecoder()
+    with open(json_file, encoding='utf-8') as f:
+        buffer = ""
+        eof = False
+
+        def fill():
+            nonlocal buffer, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+
+        # Início do array: '"commits"', ':' e '['
+        while True:
+            key_pos = buffer.find('"commits"')
+            if key_pos >= 0:
+                bracket_pos = buffer.find('[', key_pos)
+                if bracket_pos >= 0:
+                    buffer = buffer[bracket_pos + 1:]
+                    break
+            if eof:
+                if strict:
+                    raise ValueError(f'array "commits" não encontrado em {json_file}')
+                return
+            fill()
+
+        pos = 0
+        while True:
+            # Pula separadores entre elementos
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer, pos = "", 0
+                fill()
+            if pos >= len(buffer) or buffer[pos] == ']':
+                if strict and pos >= len(buffer):
+                    raise ValueError(f'array "commits" incompleto em {json_file}')
+                return
+
+            try:
+                commit, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Elemento incompleto: descarta o que já foi lido e busca mais
+                buffer, pos = buffer[pos:], 0
+                fill()
+                continue
+
+            yield commit
+            pos = end
+            if pos > chunk_size:
+                buffer, pos = buffer[pos:], 0
+
+def iter_refactorings(json_file, chunk_size=CHUNK_SIZE):
+    """
+    Itera as refatorações de um refactorings-all.json.
+
+    Yields:
+        (sha1 do commit, posição no commit, dicionário da refatoração)
+    """
+    for commit in iter_commits(json_file, chunk_size):
+        for position, refactoring in enumerate(commit.get('refactorings', [])):
+            yield commit.get('sha1'), position, refactoring
+
+def table_schemas(pa):
+    """Schemas das três tabelas (commits, refactorings, locations)."""
+    return {
+        'commits': pa.schema([
+            ('commit', pa.string()),
+            ('url', pa.string()),
+            ('refactorings', pa.int32()),
+        ]),
+        'refactorings': pa.schema([
+            ('refactoring_id', pa.int64()),
+            ('commit', pa.string()),
+            ('position', pa.int32()),
+            ('type', pa.string()),
+            ('description', pa.string()),
+        ]),
+        'locations': pa.schema([
+            ('refactoring_id', pa.int64()),
+            ('commit', pa.string()),
+            ('type', pa.string()),
+            ('side', pa.string()),
+            ('file_path', pa.string()),
+            ('start_line', pa.int32()),
+            ('end_line', pa.int32()),
+            ('start_column', pa.int32()),
+            ('end_column', pa.int32()),
+            ('code_element_type', pa.string()),
+            ('code_element', pa.string()),
+            ('description', pa.string()),
+        ]),
+    }
+
+def export_parquet(json_file, output_dir, batch_size=BATCH_SIZE):
+    """
+    Converte um refactorings-all.json nas tabelas Parquet de PARQUET_DIR.
+
+    As tabelas são montadas em um diretório temporário e publicadas com
+    rename, então leitores nunca veem uma exportação pela metade.
+
+    Returns:
+        Dicionário tabela -> número de linhas gravadas
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schemas = table_schemas(pa)
+    tmp_dir = f"{output_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    writers = {name: pq.ParquetWriter(os.path.join(tmp_dir, f"{name}.parquet"), schema)
+               for name, schema in schemas.items()}
+    batches = {name: {field.name: [] for field in schema} for name, schema in schemas.items()}
+    counts = {name: 0 for name in schemas}
+
+    def add(name, row):
+        batch = batches[name]
+        for column, value in row.items():
+            batch[column].append(value)
+        counts[name] += 1
+        if len(batch['commit']) >= batch_size:
+            flush(name)
+
+    def flush(name):
+        batch = batches[name]
+        if batch['commit']:
+            writers[name].write_table(pa.table(batch, schema=schemas[name]))
+            for values in batch.values():
+                values.clear()
+
+    try:
+        refactoring_id = 0
+        for commit in iter_commits(json_file):
+            sha1 = commit.get('sha1')
+            refactorings = commit.get('refactorings', [])
+            add('commits', {'commit': sha1, 'url': commit.get('url'),
+                            'refactorings': len(refactorings)})
+
+            for position, refactoring in enumerate(refactorings):
+                ref_type = refactoring.get('type')
+                add('refactorings', {
+                    'refactoring_id': refactoring_id,
+                    'commit': sha1,
+                    'position': position,
+                    'type': ref_type,
+                    'description': refactoring.get('description'),
+                })
+                for side, key in LOCATION_SIDES:
+                    for location in refactoring.get(key, []):
+                        add('locations', {
+                            'refactoring_id': refactoring_id,
+                            'commit': sha1,
+                            'type': ref_type,
+                            'side': side,
+                            'file_path': location.get('filePath'),
+                            'start_line': location.get('startLine'),
+                            'end_line': location.get('endLine'),
+                            'start_column': location.get('startColumn'),
+                            'end_column': location.get('endColumn'),
+                            'code_element_type': location.get('codeElementType'),
+                            'code_element': location.get('codeElement'),
+                            'description': location.get('description'),
+                        })
+                refactoring_id += 1
+
+        for name in schemas:
+            flush(name)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.rename(tmp_dir, output_dir)
+    return counts
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: refactorings_stream.py <refactorings-all.json> [--output DIR] [--batch-size N]")
+        print("\nExemplo:")
+        print("  refactorings_stream.py /workspace/results/jsoup/refactorings-all.json")
+        print(f"\nPor padrão as tabelas vão para {PARQUET_DIR}/ ao lado do JSON.")
+        sys.exit(1)
+
+    json_file = sys.argv[1]
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(json_file)), PARQUET_DIR)
+    batch_size = BATCH_SIZE
+
+    if '--output' in sys.argv:
+        output_idx = sys.argv.index('--output')
+        if output_idx + 1 < len(sys.argv):
+            output_dir = sys.argv[output_idx + 1]
+
+    if '--batch-size' in sys.argv:
+        batch_idx = sys.argv.index('--batch-size')
+        if batch_idx + 1 < len(sys.argv):
+            batch_size = max(1, int(sys.argv[batch_idx + 1]))
+
+    if not os.path.exists(json_file):
+        print(f"Erro: arquivo não encontrado: {json_file}")
+        sys.exit(1)
+
+    try:
+        counts = export_parquet(json_file, output_dir, batch_size)
+    except ImportError:
+        print("Erro: pyarrow não está instalado (pip install pyarrow)")
+        sys.exit(1)
+
+    print(f"✓ Tabelas salvas em {output_dir}")
+    for name, count in counts.items():
+        print(f"  {name}.parquet: {count} linha(s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Leitura incremental de relatórios XML do SpotBugs, com índice por release.
+Uso: spotbugs_stream.py <spotbugs-report.xml | results/projeto> [--rebuild]
+
+Com -xml:withMessages e -effort:max o spotbugs-report.xml de um projeto grande
+passa de centenas de MB; montar o DOM inteiro (ET.parse) de cada release
+esgota a memória. Aqui o XML é lido com iterparse, descartando cada elemento
+já processado, e cada BugInstance vira um registro compacto:
+
+    release, type, category, abbrev, priority, rank, class, method,
+    source_file, start_line, end_line, description
+
+Os registros de cada relatório ficam em spotbugs-index.json, ao lado do XML,
+junto com o tamanho e a data de modificação do XML; consultas seguintes leem o
+índice em vez de reprocessar o XML, até que o relatório mude.
+"""
+
+import sys
+import os
+import json
+import xml.etree.ElementTree as ET
+
+INDEX_FILE = "spotbugs-index.json"
+
+# Muda quando os campos do registro mudam, invalidando índices antigos
+INDEX_VERSION = 1
+
+FIELDS = ('release', 'type', 'category', 'abbrev', 'priority', 'rank', 'class', 'method',
+          'source_file', 'start_line', 'end_line', 'description')
+
+def to_int(value):
+    """Converte um atributo numérico (None se ausente ou inválido)."""
+    try:
+        return int(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+def release_name(xml_file):
+    """Tag da release de um relatório (metadata.json ao lado ou nome do diretório)."""
+    release_dir = os.path.dirname(os.path.abspath(xml_file))
+    metadata_file = os.path.join(release_dir, "metadata.json")
+    if os.path.exists(metadata_file):
+        with open(metadata_file) as f:
+            return json.load(f).get('tag_name', os.path.basename(release_dir))
+    return os.path.basename(release_dir)
+
+def iter_top_level(xml_file):
+    """
+    Itera os filhos diretos da raiz de um XML com iterparse, sem montar o DOM
+    inteiro: cada filho é entregue completo e depois descartado da árvore.
+
+    Yields:
+        (raiz, filho); a raiz guarda tag e atributos, mas não os filhos já vistos
+    """
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        # Só filhos diretos da raiz são descartados; os elementos internos
+        # ainda são lidos quando o filho termina
+        if depth == 1:
+            yield root, elem
+            root.remove(elem)
+
+def iter_bugs(xml_file, release=None):
+    """
+    Itera os BugInstance de um relatório sem montar o DOM inteiro.
+
+    Cada BugInstance é convertido em registro e removido da árvore assim que
+    termina, então a memória fica limitada a um bug por vez.
+
+    Yields:
+        Dicionário com os campos de FIELDS
+    """
+    for _, elem in iter_top_level(xml_file):
+        if elem.tag == 'BugInstance':
+            class_elem = elem.find('Class')
+            method_elem = elem.find('Method')
+            source_elem = elem.find('SourceLine')
+            if source_elem is None and class_elem is not None:
+                source_elem = class_elem.find('SourceLine')
+            long_msg = elem.find('LongMessage')
+            yield {
+                'release': release,
+                'type': elem.get('type'),
+                'category': elem.get('category'),
+                'abbrev': elem.get('abbrev', ''),
+                'priority': to_int(elem.get('priority')),
+                'rank': to_int(elem.get('rank')),
+                'class': class_elem.get('classname', '') if class_elem is not None else '',
+                'method': method_elem.get('name', '') if method_elem is not None else '',
+                'source_file': (source_elem.get('sourcepath') or source_elem.get('sourcefile'))
+                if source_elem is not None else None,
+                'start_line': to_int(source_elem.get('start')) if source_elem is not None else None,
+                'end_line': to_int(source_elem.get('end')) if source_elem is not None else None,
+                'description': long_msg.text if long_msg is not None else '',
+            }
+
+def source_stamp(xml_file):
+    """Identifica a versão do XML indexada (tamanho + data de modificação)."""
+    stat = os.stat(xml_file)
+    return {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def build_index(xml_file, release=None):
+    """
+    Processa o XML e grava o índice ao lado dele.
+
+    Returns:
+        Lista de registros (dicionários)
+    """
+    release = release or release_name(xml_file)
+    stamp = source_stamp(xml_file)
+    rows = [[bug[field] for field in FIELDS] for bug in iter_bugs(xml_file, release)]
+
+    index_file = os.path.join(os.path.dirname(os.path.abspath(xml_file)), INDEX_FILE)
+    tmp_file = f"{index_file}.tmp-{os.getpid()}"
+    with open(tmp_file, 'w') as f:
+        json.dump({'source': stamp, 'fields': list(FIELDS), 'rows': rows}, f)
+    os.replace(tmp_file, index_file)
+    return [dict(zip(FIELDS, row)) for row in rows]
+
+def load_bugs(xml_file, release=None, use_index=True):
+    """
+    Registros de um relatório, do índice quando ele corresponde ao XML atual.
+
+    Args:
+        xml_file: caminho do spotbugs-report.xml
+        release: tag gravada nos registros (padrão: metadata.json da release)
+        use_index: False força reprocessar o XML (o índice é regravado)
+
+    Returns:
+        Lista de registros (dicionários com os campos de FIELDS)
+    """
+    index_file = os.path.join(os.path.dirname(os.path.abspath(xml_file)), INDEX_FILE)
+    if use_index and os.path.exists(index_file):
+        try:
+            with open(index_file) as f:
+                index = json.load(f)
+            if index.get('source') == source_stamp(xml_file) and \
+                    tuple(index.get('fields', ())) == FIELDS:
+                bugs = [dict(zip(FIELDS, row)) for row in index['rows']]
+                if release is not None:
+                    for bug in bugs:
+                        bug['release'] = release
+                return bugs
+        except (OSError, ValueError):
+            pass
+    return build_index(xml_file, release)
+
+def load_project_bugs(results_dir, use_index=True):
+    """
+    Registros de todas as releases de results/<projeto>/ (que tenham relatório).
+
+    Returns:
+        Lista de registros, release a release
+    """
+    bugs = []
+    for name in sorted(os.listdir(results_dir)):
+        xml_file = os.path.join(results_dir, name, "spotbugs-report.xml")
+        if os.path.exists(os.path.join(results_dir, name, "metadata.json")) and \
+                os.path.exists(xml_file):
+            try:
+                bugs.extend(load_bugs(xml_file, use_index=use_index))
+            except ET.ParseError as e:
+                print(f"✗ {name}: relatório SpotBugs inválido ({e})")
+    return bugs
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: spotbugs_stream.py <spotbugs-report.xml | results/projeto> [--rebuild]")
+        print("\nExemplo:")
+        print("  spotbugs_stream.py /workspace/results/jsoup")
+        print("  spotbugs_stream.py /workspace/results/jsoup/jsoup-1.15.3/spotbugs-report.xml")
+        print(f"\nIndexa os relatórios ({INDEX_FILE}) e mostra as contagens por categoria.")
+        sys.exit(1)
+
+    target = sys.argv[1]
+    use_index = '--rebuild' not in sys.argv
+
+    if os.path.isdir(target):
+        bugs = load_project_bugs(target, use_index)
+    elif os.path.exists(target):
+        bugs = load_bugs(target, use_index=use_index)
+    else:
+        print(f"Erro: caminho não encontrado: {target}")
+        sys.exit(1)
+
+    releases = {}
+    for bug in bugs:
+        counts = releases.setdefault(bug['release'], {})
+        counts[bug['category']] = counts.get(bug['category'], 0) + 1
+
+    for release, counts in releases.items():
+        summary = ", ".join(f"{category} {count}" for category, count in sorted(counts.items()))
+        print(f"✓ {release}: {sum(counts.values())} bugs ({summary})")
+    print(f"\nTotal: {len(bugs)} bugs em {len(releases)} release(s)")
+
+if __name__ == '__main__':
+    main()